@@ -0,0 +1,118 @@
+"""
+Benchmark: HTML -> text extraction used by fetch_url.
+
+Compares the original BeautifulSoup implementation (full tree, decompose,
+get_text, then cut to 8000 chars) against the streaming extractor in
+openai_litellm/html_text.py with each available backend, after checking a
+few edge cases (PARITY_CASES) against bs4.
+
+Usage:
+    python benchmarks/bench_html_text.py [page.html ...] [--repeat N] [--max-chars N]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "openai_litellm"))
+
+from bs4 import BeautifulSoup   # noqa: E402
+import html_text                # noqa: E402
+
+
+def bs4_extract(html: str, max_chars: int) -> str:
+    """Original fetch_url implementation."""
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = soup.get_text(separator=" ", strip=True)
+    return text[:max_chars]
+
+
+def synthetic_docs_page(sections: int = 400) -> str:
+    """Builds a large documentation-like page (~300 KB): nav, scripts, code blocks, tables."""
+    head = (
+        "<!DOCTYPE html><html><head><title>Installation - docs</title>"
+        "<style>body{font-family:sans-serif} .nav a{color:#333}</style>"
+        "<script>window.dataLayer=[];function gtag(){dataLayer.push(arguments)}</script>"
+        "</head><body><nav class='nav'>"
+        + "".join(f"<a href='/p{i}'>Page {i}</a>" for i in range(200))
+        + "</nav><main>"
+    )
+    body = []
+    for i in range(sections):
+        body.append(
+            f"<section id='s{i}'><h2>Section {i}</h2>"
+            f"<p>Installing with <code>pip install pkg=={i}.0</code> requires a recent "
+            f"<a href='/python'>Python</a> &amp; a C compiler for optional extensions.</p>"
+            f"<pre><code>import pkg\npkg.configure(level={i})\nprint(pkg.__version__)</code></pre>"
+            "<table><tr><th>Dependency</th><th>Minimum</th></tr>"
+            + "".join(f"<tr><td>dep{j}</td><td>{j}.{i}</td></tr>" for j in range(8))
+            + "</table><script>track('section', %d)</script><noscript>enable js</noscript></section>" % i
+        )
+    return head + "".join(body) + "</main><footer>© docs</footer></body></html>"
+
+
+# Edge cases that must match bs4 exactly: text after the last tag, CDATA
+PARITY_CASES = [
+    "text only",
+    "hi<br>there",
+    "<p>a</p>tail",
+    "<script>x</script>after",
+    "<div>x</div><!-- c -->trailing &amp; text",
+    "<![CDATA[foo]]>bar",
+]
+LXML_CDATA = "<![CDATA["   # libxml2 drops CDATA sections in HTML
+
+
+def parity_failures(backends: list[str]) -> list[str]:
+    failures = []
+    for case in PARITY_CASES:
+        expected = bs4_extract(case, 8000)
+        for backend in backends:
+            if backend == "lxml" and LXML_CDATA in case:
+                continue
+            got = html_text.extract_text(case, 8000, backend=backend)
+            if got != expected:
+                failures.append(f"{backend}: {case!r} -> {got!r}, bs4 {expected!r}")
+    return failures
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pages", nargs="*", help="HTML files to benchmark (default: synthetic page)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-chars", type=int, default=8000)
+    args = parser.parse_args()
+
+    docs = {p: Path(p).read_text(encoding="utf-8", errors="replace") for p in args.pages}
+    if not docs:
+        docs = {"synthetic": synthetic_docs_page()}
+
+    backends = ["html.parser"] + (["lxml"] if html_text.etree is not None else [])
+    failures = parity_failures(backends)
+    print(f"parity cases: {len(PARITY_CASES)}, mismatches: {len(failures)}")
+    for failure in failures:
+        print("  " + failure)
+    print(f"{'page':<24} {'size':>9} {'impl':<22} {'best ms':>9} {'speedup':>8}  same")
+    for name, doc in docs.items():
+        reference = bs4_extract(doc, args.max_chars)
+        base = timeit(lambda: bs4_extract(doc, args.max_chars), args.repeat)
+        print(f"{name[:24]:<24} {len(doc):>9} {'bs4 (original)':<22} {base * 1000:>9.2f} {1.0:>7.1f}x")
+        for backend in backends:
+            out = html_text.extract_text(doc, args.max_chars, backend=backend)
+            t = timeit(lambda: html_text.extract_text(doc, args.max_chars, backend=backend), args.repeat)
+            print(f"{'':<24} {'':>9} {'stream/' + backend:<22} {t * 1000:>9.2f} {base / t:>7.1f}x  {out == reference}")
+
+
+if __name__ == "__main__":
+    main()
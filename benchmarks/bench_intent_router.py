@@ -0,0 +1,133 @@
+"""
+Benchmark: semantic-kernel intent router (Aho-Corasick) vs the original linear
+`any(keyword in query)` scans, as the keyword tables grow.
+
+Keyword tables are synthetic (random Spanish-like stems) on top of the real
+routes.json entries; queries mix filler words with 0-3 keywords. The real
+routes.json is first checked against FIXTURES (query -> expected route).
+
+Usage:
+    python benchmarks/bench_intent_router.py [--queries 20000] [--sizes 10 100 1000 5000]
+"""
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "semantic-kernel"))
+
+from intent_router import IntentRouter, normalize, ROUTES_PATH   # noqa: E402
+
+SYLLABLES = ["ma", "re", "to", "ci", "lo", "pa", "ne", "su", "ga", "fe", "bri", "cor", "tan", "ves", "qui", "do"]
+FILLER = ("hola quiero saber por que mi cuenta tiene algo raro desde ayer y necesito ayuda con esto "
+          "gracias de antemano buen dia").split()
+
+
+# Routing the real routes.json must keep (regressions of stem matching)
+FIXTURES = [
+    ("Quiero pedir un reembolso", "RefundAgent"),
+    ("Quiero pagar mi factura", "BillingAgent"),
+    ("Me cobraron dos veces", "BillingAgent"),
+    ("error al hacer login", "TechSupportAgent"),
+    ("La PÁGINA no carga", "TechSupportAgent"),        # "pag" is a billing stem
+    ("No puedo apagar el equipo", "TechSupportAgent"),  # Stems only match at the start of a word
+]
+
+
+def fixture_failures() -> list[str]:
+    router = IntentRouter.from_file(ROUTES_PATH)
+    failures = []
+    for query, expected in FIXTURES:
+        decision = router.route(query)
+        if decision.route != expected:
+            failures.append(f"{query!r} -> {decision.route} {decision.scores}, expected {expected}")
+    return failures
+
+
+def synthetic_routes(per_route: int, rng: random.Random) -> dict:
+    config = json.loads(ROUTES_PATH.read_text(encoding="utf-8"))
+    seen = {normalize(k) for r in config["routes"] for k in r["keywords"]}
+    for route in config["routes"]:
+        keywords = dict(route["keywords"])
+        while len(keywords) < per_route:
+            word = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(3, 5)))
+            if word not in seen:
+                seen.add(word)
+                keywords[word] = rng.choice([1, 2, 3])
+        route["keywords"] = keywords
+    return config
+
+
+def synthetic_queries(config: dict, n: int, rng: random.Random) -> list[str]:
+    all_keywords = [k for r in config["routes"] for k in r["keywords"]]
+    queries = []
+    for _ in range(n):
+        words = rng.sample(FILLER, rng.randint(6, 14))
+        for _ in range(rng.choice([0, 1, 1, 2, 3])):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(all_keywords) + rng.choice(["", "s", "ción"]))
+        queries.append(" ".join(words))
+    return queries
+
+
+def linear_router(config: dict):
+    """The original route_query: one any() scan per route, first match wins."""
+    tables = [(r["name"], list(r["keywords"])) for r in config["routes"]]
+    default = config["default"]
+
+    def route(query: str) -> str:
+        q = query.lower()
+        for name, keywords in tables:
+            if any(k in q for k in keywords):
+                return name
+        return default
+    return route
+
+
+def timed(fn, queries: list[str]) -> list[float]:
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000],
+                        help="Keywords per route")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    failures = fixture_failures()
+    print(f"fixtures: {len(FIXTURES)}, mismatches: {len(failures)}")
+    for failure in failures:
+        print("  " + failure)
+
+    print(f"{'kw/route':>8} {'build ms':>9} {'states':>8} | {'linear p50':>11} {'p99':>9} | "
+          f"{'router p50':>11} {'p99':>9} {'qps':>9} {'ambig':>6}")
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        config = synthetic_routes(size, rng)
+        queries = synthetic_queries(config, args.queries, rng)
+
+        start = time.perf_counter()
+        router = IntentRouter(config["routes"], config["default"], config["ambiguity_margin"])
+        build_ms = (time.perf_counter() - start) * 1000
+        linear = linear_router(config)
+
+        lin = timed(linear, queries)
+        fast = timed(router.route, queries)
+        us = lambda t: f"{t * 1e6:8.1f}us"   # noqa: E731
+        p = lambda t, q: t[min(len(t) - 1, int(q * len(t)))]   # noqa: E731
+        print(f"{size:>8} {build_ms:>9.1f} {len(router._automaton):>8} | {us(p(lin, .5)):>11} {us(p(lin, .99)):>9} | "
+              f"{us(p(fast, .5)):>11} {us(p(fast, .99)):>9} {len(fast) / sum(fast):>9.0f} "
+              f"{router.stats['_ambiguous'] / len(queries):>6.1%}")
+
+
+if __name__ == "__main__":
+    main()
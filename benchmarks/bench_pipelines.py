@@ -0,0 +1,184 @@
+"""
+Benchmark: end-to-end and per-hop latency/throughput of the agent pipelines
+against the offline mock LLM server (no Azure credentials needed).
+
+Starts mock_llm_server in-process, points the Azure env vars at it and runs
+each pipeline sequentially (latency) and concurrently (throughput). With the
+default zero simulated model latency, the numbers are pure framework overhead
+(LiteLLM, openai-agents, tools, HTTP); pass --ttft-ms/--tps to model a real
+deployment and see how overhead compares to model time.
+
+Usage:
+    python benchmarks/bench_pipelines.py [--iterations 20] [--concurrency 8]
+                                         [--ttft-ms 0] [--tps 0] [--only issue-pipeline ...]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "openai_litellm"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_llm_server import MockLLMServer   # noqa: E402
+from mock_scripts import ALL_RULES, SAMPLE_ISSUE   # noqa: E402
+
+
+def configure_env(base_url: str) -> None:
+    """Points every client in the repo at the mock server (before their modules are imported)."""
+    os.environ.update({
+        "AZURE_API_BASE": base_url,
+        "AZURE_API_KEY": "mock",
+        "AZURE_API_VERSION": "2024-10-21",
+        "AZURE_OPENAI_ENDPOINT": base_url,
+        "AZURE_OPENAI_API_KEY": "mock",
+        "AZURE_OPENAI_DEPLOYMENT_NAME": "gpt-4.1",
+        "PAGE_CACHE": "off",   # Measure the real fetch path on every run
+    })
+
+
+def percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+# --- Scenarios: name -> coroutine factory(hooks) ---
+def build_scenarios() -> dict:
+    from agents import Runner
+    import issue_solver_agent
+    import issue_pipeline
+    import multiagent
+    import code_multiagent
+    from openai import AsyncOpenAI
+
+    responses_client = AsyncOpenAI(
+        api_key=os.environ["AZURE_API_KEY"],
+        base_url=f"{os.environ['AZURE_API_BASE']}/openai/v1/",
+    )
+
+    async def responses_text(hooks):
+        r = await responses_client.responses.create(model="gpt-4.1", input='Solamente di: "OK, esto es una prueba"')
+        return r.output_text
+
+    scenarios = {
+        "issue-orchestrator": lambda hooks: Runner.run(
+            issue_solver_agent.orchestrator_agent, SAMPLE_ISSUE, hooks=hooks),
+        "issue-pipeline": lambda hooks: issue_pipeline.run_pipeline(SAMPLE_ISSUE, hooks=hooks),
+        "issue-speculative": lambda hooks: issue_pipeline.run_pipeline(SAMPLE_ISSUE, candidates=3, hooks=hooks),
+        "multiagent-triage": lambda hooks: Runner.run(
+            multiagent.triage_agent, "Puedes darme el clima de CDMX ??", hooks=hooks),
+        "multiagent-fastpath": lambda hooks: multiagent.run("Puedes darme el clima de CDMX ??", hooks=hooks),
+        "code-multiagent": lambda hooks: Runner.run(
+            code_multiagent.triage_agent,
+            "Como puedo instalar pandas https://pandas.pydata.org/docs/getting_started/install.html",
+            hooks=hooks),
+        "responses-text": responses_text,
+    }
+
+    try:
+        from semantic_kernel.agents import ChatCompletionAgent
+        from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+
+        from openai import AsyncAzureOpenAI
+
+        # SK only accepts https endpoints; the mock is plain http, so hand it a ready client
+        sk_agent = ChatCompletionAgent(
+            service=AzureChatCompletion(
+                deployment_name="gpt-4.1",
+                endpoint="https://mock.openai.azure.com",
+                async_client=AsyncAzureOpenAI(
+                    api_key=os.environ["AZURE_OPENAI_API_KEY"],
+                    azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
+                    api_version=os.environ["AZURE_API_VERSION"],
+                ),
+            ),
+            name="BillingAgent",
+            instructions="Eres un experto en facturación. Responde siempre en español de manera clara y profesional.",
+        )
+
+        async def sk_support(hooks):
+            return (await sk_agent.get_response(messages="Quiero pedir un reembolso")).content
+
+        scenarios["semantic-kernel"] = sk_support
+    except ImportError:
+        pass
+    return scenarios
+
+
+async def bench(name: str, factory, server: MockLLMServer, iterations: int, concurrency: int) -> dict:
+    from usage_report import UsageRecorder
+
+    recorder = UsageRecorder()
+    await factory(recorder.hooks("warmup"))   # Imports, connection pools, schema caches
+    recorder.events.clear()
+
+    latencies, overheads = [], []
+    for i in range(iterations):
+        simulated = server.stats["simulated_s"]
+        start = time.perf_counter()
+        await factory(recorder.hooks(f"{name}-{i}"))
+        elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        overheads.append(elapsed - (server.stats["simulated_s"] - simulated))
+
+    requests_before = server.stats["requests"]
+    start = time.perf_counter()
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with sem:
+            await factory(None)
+
+    await asyncio.gather(*(one(i) for i in range(iterations)))
+    wall = time.perf_counter() - start
+    return {
+        "name": name,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "overhead_p50": percentile(overheads, 50),
+        "throughput": iterations / wall,
+        "llm_calls": (server.stats["requests"] - requests_before) / iterations,
+        "hops": recorder.summary(),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--ttft-ms", type=float, default=0.0)
+    parser.add_argument("--tps", type=float, default=0.0)
+    parser.add_argument("--only", nargs="+", default=None, help="Scenario names to run")
+    args = parser.parse_args()
+
+    server = MockLLMServer(ALL_RULES, ttft_ms=args.ttft_ms, tps=args.tps)
+    configure_env(await server.start())
+    scenarios = build_scenarios()
+
+    print(f"mock: ttft={args.ttft_ms}ms tps={args.tps or 'inf'}  iterations={args.iterations} "
+          f"concurrency={args.concurrency}\n")
+    print(f"{'scenario':<20} {'LLM calls':>9} {'p50 ms':>9} {'p95 ms':>9} {'overhead p50':>13} {'runs/s':>8}")
+    results = []
+    for name, factory in scenarios.items():
+        if args.only and name not in args.only:
+            continue
+        r = await bench(name, factory, server, args.iterations, args.concurrency)
+        results.append(r)
+        print(f"{name:<20} {r['llm_calls']:>9.1f} {r['p50'] * 1000:>9.1f} {r['p95'] * 1000:>9.1f} "
+              f"{r['overhead_p50'] * 1000:>10.1f} ms {r['throughput']:>8.1f}")
+
+    print("\nPer-hop LLM wall time (sequential runs):")
+    print(f"{'scenario':<20} {'agent':<18} {'calls':>6} {'p50 ms':>9} {'p95 ms':>9} {'tool p95 ms':>12} "
+          f"{'cached %':>9}")
+    for r in results:
+        for agent, s in r["hops"].items():
+            print(f"{r['name']:<20} {agent[:18]:<18} {s['llm_calls']:>6} {s['llm_p50_s'] * 1000:>9.1f} "
+                  f"{s['llm_p95_s'] * 1000:>9.1f} {s['tool_p95_s'] * 1000:>12.1f} {s['cache_hit_rate'] * 100:>9.1f}")
+    await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Benchmark: throughput against a rate-limited deployment, with and without the
+rate scheduler (openai_litellm/rate_scheduler.py).
+
+The mock server enforces an Azure-like quota (per 10 s window) and answers 429 +
+Retry-After over it. A burst of agent runs is fired at once:
+    scheduled  ScheduledModel on the primary deployment only
+    spill      ScheduledModel that may spill over to an equivalent deployment
+    direct     LitellmModel with the OpenAI client's own retries (what agents did before)
+
+Usage:
+    python benchmarks/bench_rate_scheduler.py [--requests 200] [--rpm 600] [--concurrency 64]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "openai_litellm"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from mock_llm_server import MockLLMServer   # noqa: E402
+from mock_scripts import ALL_RULES   # noqa: E402
+
+TPM = 10_000_000   # Requests per minute is the binding limit in this benchmark
+
+
+async def burst(model, n: int, concurrency: int) -> tuple[int, int, float]:
+    from agents import Agent, Runner
+
+    agent = Agent(name="Bench", instructions="Reply OK.", model=model)
+    sem = asyncio.Semaphore(concurrency)
+    ok = failed = 0
+
+    async def one(i):
+        nonlocal ok, failed
+        async with sem:
+            try:
+                await Runner.run(agent, f"ping {i}")
+                ok += 1
+            except Exception:
+                failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return ok, failed, time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rpm", type=int, default=600, help="Quota of each mock deployment")
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    import deployments
+    primary, spare = deployments.deployment("gpt-4o"), deployments.deployment("gpt-4.1")
+    quotas = {primary: (args.rpm, TPM), spare: (args.rpm, TPM)}
+    deployments.QUOTAS.update({"gpt-4o": (args.rpm, TPM), "gpt-4.1": (args.rpm, TPM)})
+
+    import litellm
+    from agents import set_tracing_disabled
+    from agents.extensions.models.litellm_model import LitellmModel
+    from rate_scheduler import RateScheduler, ScheduledModel
+    set_tracing_disabled(True)
+    litellm.suppress_debug_info = True
+
+    server = MockLLMServer(ALL_RULES, quotas=quotas)
+    url = await server.start()
+    os.environ.update({"AZURE_API_BASE": url, "AZURE_API_KEY": "mock", "AZURE_API_VERSION": "2024-10-21"})
+    # LiteLLM caches one Azure client per key/base URL, and the client it creates first
+    # decides whether the OpenAI SDK retries 429s itself: give "direct" its own base URL
+    direct_url = url.replace("127.0.0.1", "localhost")
+    scenarios = {
+        "scheduled": lambda: ScheduledModel("gpt-4o", api_key="mock", spill=False, scheduler=RateScheduler()),
+        "spill": lambda: ScheduledModel("gpt-4o", api_key="mock", spill=True, scheduler=RateScheduler()),
+        "direct": lambda: LitellmModel(model=f"azure/{primary}", base_url=direct_url, api_key="mock"),
+    }
+    print(f"{args.requests} runs, concurrency {args.concurrency}, quota {args.rpm} rpm per deployment "
+          f"({args.rpm / 60:.1f} req/s)\n")
+    print(f"{'scenario':<10} {'ok':>5} {'failed':>7} {'429s':>6} {'wall s':>8} {'req/s':>7} {'of quota':>9}")
+    for name, factory in scenarios.items():
+        server.reset_quotas()
+        await asyncio.sleep(1)
+        ok, failed, wall = await burst(factory(), args.requests, args.concurrency)
+        rate = ok / wall
+        print(f"{name:<10} {ok:>5} {failed:>7} {server.stats['throttled']:>6} {wall:>8.1f} {rate:>7.1f} "
+              f"{rate / (args.rpm / 60):>8.0%}")
+    await server.stop()
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(main())
+    sys.stdout.flush()
+    # LiteLLM drains its queue of success-logging callbacks on loop shutdown, which can
+    # take minutes after a burst of calls; the results are already printed
+    os._exit(0)
@@ -0,0 +1,104 @@
+"""
+Benchmark: startup cost of the CLI and of each pipeline module.
+
+Every target is imported in a fresh interpreter (`python -X importtime`), so the
+numbers are what a short CLI call or a newly spawned batch worker pays before
+doing any work. Reports the median wall time (interpreter start included; the
+`python` row is the bare interpreter), the module's cumulative import time and
+the heaviest top-level packages it pulls in.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--top 3] [--only cli evaluate ...]
+                                       [--json startup.json]
+"""
+import argparse
+import json
+import re
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# --- Targets: name -> (directory put on sys.path, module to import) ---
+TARGETS = {
+    "python": (None, None),
+    "cli": (ROOT, "cli"),
+    "evaluate": (ROOT / "openai_litellm", "evaluate"),
+    "multiagent": (ROOT / "openai_litellm", "multiagent"),
+    "code-multiagent": (ROOT / "openai_litellm", "code_multiagent"),
+    "issue-solver": (ROOT / "openai_litellm", "issue_solver_agent"),
+    "issue-pipeline": (ROOT / "openai_litellm", "issue_pipeline"),
+    "batch-solver": (ROOT / "openai_litellm", "batch_solver"),
+    "responses": (ROOT / "responses-function", "async_client"),
+    "sk-agents": (ROOT / "semantic-kernel", "agents_semantic"),
+    "sk-server": (ROOT / "semantic-kernel", "support_server"),
+}
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def run_once(path: Path | None, module: str | None) -> tuple[float, str]:
+    code = "pass" if module is None else f"import sys; sys.path.insert(0, {str(path)!r}); import {module}"
+    start = time.perf_counter()
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                       capture_output=True, text=True, cwd=ROOT)
+    elapsed = time.perf_counter() - start
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1] if r.stderr.strip() else f"exit {r.returncode}")
+    return elapsed, r.stderr
+
+
+def parse_importtime(stderr: str, module: str | None) -> tuple[float, list[tuple[str, float]]]:
+    """
+    Returns (cumulative seconds of module, [(top-level package, cumulative seconds)...] heaviest first).
+    """
+    total, packages = 0.0, {}
+    for line in stderr.splitlines():
+        m = _LINE.match(line)
+        if not m:
+            continue
+        cumulative, indent, name = int(m.group(2)) / 1e6, m.group(3), m.group(4)
+        if name == module:
+            total = cumulative
+        if indent == "  " or (indent == "" and name != module):
+            # Direct imports of the target (or roots imported before it)
+            root = name.split(".")[0]
+            packages[root] = packages.get(root, 0.0) + cumulative
+    return total, sorted(packages.items(), key=lambda kv: -kv[1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=3, help="Heaviest packages listed per target")
+    parser.add_argument("--only", nargs="+", default=None, help="Target names to run")
+    parser.add_argument("--json", default=None, help="Also write the results to this file")
+    args = parser.parse_args()
+
+    print(f"{'target':<16} {'wall p50 ms':>11} {'import ms':>10}  heaviest imports")
+    results = []
+    for name, (path, module) in TARGETS.items():
+        if args.only and name not in args.only:
+            continue
+        try:
+            runs = [run_once(path, module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            print(f"{name:<16} {'-':>11} {'-':>10}  skipped ({e})")
+            continue
+        wall = statistics.median(r[0] for r in runs)
+        parsed = [parse_importtime(stderr, module) for _, stderr in runs]
+        import_s = statistics.median(p[0] for p in parsed)
+        heaviest = parsed[len(parsed) // 2][1][:args.top]
+        results.append({"target": name, "wall_s": wall, "import_s": import_s, "heaviest": heaviest})
+        print(f"{name:<16} {wall * 1000:>11.0f} {import_s * 1000:>10.0f}  "
+              + ", ".join(f"{pkg} {s * 1000:.0f}" for pkg, s in heaviest))
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
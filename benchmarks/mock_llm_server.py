@@ -0,0 +1,408 @@
+"""
+Offline OpenAI / Azure OpenAI compatible stand-in server with scripted replies.
+
+Serves the endpoints used across the repo:
+    POST /openai/deployments/{deployment}/chat/completions   (LiteLLM azure/*, Semantic Kernel)
+    POST /openai/v1/chat/completions, /v1/chat/completions
+    POST /openai/v1/responses, /v1/responses                 (main.py, responses.py)
+    GET  /docs/{page}                                        (pages for fetch_url)
+    GET  /mock/stats                                         (request counters)
+
+Replies come from a list of rules (see mock_scripts.py). The first rule whose
+conditions match the request wins:
+    system      substring of the system prompt / instructions
+    user        substring of the latest user message
+    after_tool  name of the function whose result is the latest message
+    structured  True if the request asks for a JSON schema (output_type agents)
+    model       deployment / model name
+and replies with "text" and/or "tool_calls" ([{"name", "arguments"}]); handoffs
+are just tool calls to transfer_to_<agent_name>. Latency is simulated with a
+time-to-first-token (ttft_ms) plus a generation speed (tps, tokens/s), per
+rule or server-wide. Both streaming (SSE) and non-streaming calls are supported.
+Optional per-deployment quotas ({deployment: (rpm, tpm)}) reject calls over
+quota with 429 + Retry-After, like Azure does. Chat calls report cached_tokens
+like the provider's prompt cache: the longest previously seen prefix of
+tools + messages, from 1024 tokens in 128-token steps.
+
+Usage:
+    python benchmarks/mock_llm_server.py --port 8089 --ttft-ms 300 --tps 80
+    AZURE_API_BASE=http://127.0.0.1:8089 AZURE_API_KEY=mock python openai_litellm/multiagent.py
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from pathlib import Path
+
+from aiohttp import web
+
+from mock_scripts import ALL_RULES, DOC_PAGES
+
+_ids = itertools.count(1)
+CACHE_MIN_TOKENS = 1024      # Prompt caching: minimum cacheable prefix
+CACHE_STEP_TOKENS = 128      # and its granularity
+
+
+def _approx_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+
+class MockLLMServer:
+    """
+    Scripted chat/responses server. Run it in-process (await start()) or as a script.
+
+    Args:
+        rules (list[dict]): Reply rules, first match wins
+        ttft_ms (float): Default simulated time to first token
+        tps (float): Default simulated output tokens per second (0 = instant)
+        chunk_tokens (int): Approximate tokens per streamed delta
+        quotas (dict): Deployment -> (rpm, tpm) enforced over 10 s windows (None = unlimited)
+        prompt_cache (bool): Report cached_tokens for repeated prompt prefixes
+    """
+
+    def __init__(self, rules: list[dict] = ALL_RULES, ttft_ms: float = 0.0, tps: float = 0.0,
+                 chunk_tokens: int = 4, pages: dict[str, str] = DOC_PAGES,
+                 quotas: dict[str, tuple[int, int]] | None = None, prompt_cache: bool = True):
+        self.rules = rules
+        self.ttft_ms = ttft_ms
+        self.tps = tps
+        self.chunk_tokens = chunk_tokens
+        self.pages = pages
+        self.base_url = ""
+        self.quotas = quotas or {}
+        self._windows: dict[str, list] = {}   # deployment -> [window start, requests, tokens]
+        self.prompt_cache = prompt_cache
+        self._prefixes: set[str] = set()      # Hashes of (deployment, prompt prefix) already seen
+        self.stats = {"requests": 0, "streamed": 0, "simulated_s": 0.0, "throttled": 0,
+                      "prompt_tokens": 0, "cached_tokens": 0, "by_rule": {}}
+        self._runner: web.AppRunner | None = None
+
+    # --- Lifecycle ---
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_post("/openai/deployments/{deployment}/chat/completions", self.chat)
+        app.router.add_post("/openai/v1/chat/completions", self.chat)
+        app.router.add_post("/v1/chat/completions", self.chat)
+        app.router.add_post("/openai/v1/responses", self.responses)
+        app.router.add_post("/v1/responses", self.responses)
+        app.router.add_get("/docs/{page}", self.docs)
+        app.router.add_get("/mock/stats", self.get_stats)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    # --- Rule matching ---
+    def match(self, model: str, system: str, user: str, after_tool: str | None, structured: bool) -> dict:
+        for i, rule in enumerate(self.rules):
+            if "model" in rule and rule["model"] != model:
+                continue
+            if "system" in rule and rule["system"] not in system:
+                continue
+            if "user" in rule and rule["user"].lower() not in user.lower():
+                continue
+            if "after_tool" in rule and rule["after_tool"] != after_tool:
+                continue
+            if "structured" in rule and rule["structured"] != structured:
+                continue
+            key = rule.get("id", str(i))
+            self.stats["by_rule"][key] = self.stats["by_rule"].get(key, 0) + 1
+            return rule
+        self.stats["by_rule"]["<default>"] = self.stats["by_rule"].get("<default>", 0) + 1
+        return {"text": "OK"}
+
+    def _reply(self, rule: dict) -> tuple[str, list[dict], float, float]:
+        text = rule.get("text", "").replace("{base_url}", self.base_url)
+        calls = []
+        for call in rule.get("tool_calls", []):
+            args = json.dumps(call.get("arguments", {})).replace("{base_url}", self.base_url)
+            n = next(_ids)
+            calls.append({"id": f"call_mock_{n}", "name": call["name"], "arguments": args})
+        ttft = rule.get("ttft_ms", self.ttft_ms) / 1000
+        tps = rule.get("tps", self.tps)
+        return text, calls, ttft, tps
+
+    def _gen_time(self, tokens: int, tps: float) -> float:
+        return tokens / tps if tps else 0.0
+
+    # --- Quotas ---
+    def reset_quotas(self) -> None:
+        """
+        Starts fresh quota windows and clears the 429 counter.
+        """
+        self._windows.clear()
+        self.stats["throttled"] = 0
+
+    def _over_quota(self, model: str, tokens: int) -> float | None:
+        """
+        Seconds until the current 10 s window resets if this call exceeds the quota.
+        """
+        if model not in self.quotas:
+            return None
+        rpm, tpm = self.quotas[model]
+        now = time.monotonic()
+        window = self._windows.setdefault(model, [now, 0, 0])
+        if now - window[0] >= 10:
+            window[:] = [now, 0, 0]
+        if window[1] + 1 > rpm / 6 or window[2] + tokens > tpm / 6:
+            return 10 - (now - window[0])
+        window[1] += 1
+        window[2] += tokens
+        return None
+
+    # --- Prompt cache ---
+    def _cached_tokens(self, model: str, prompt: str) -> int:
+        """
+        Tokens of the longest prefix of prompt already sent to this deployment.
+        """
+        if not self.prompt_cache:
+            return 0
+        step, first = CACHE_STEP_TOKENS * 4, CACHE_MIN_TOKENS * 4   # ~4 chars per token
+        digest = hashlib.sha256(model.encode())
+        cached, hit, start = 0, True, 0
+        for end in range(first, len(prompt) + 1, step):
+            digest.update(prompt[start:end].encode())
+            start = end
+            key = digest.copy().hexdigest()
+            if hit and key in self._prefixes:
+                cached = end // 4
+            else:
+                hit = False
+                self._prefixes.add(key)
+        return cached
+
+    # --- Chat Completions ---
+    @staticmethod
+    def _chat_context(body: dict) -> tuple[str, str, str | None]:
+        messages = body.get("messages", [])
+        system = "\n".join(_content_text(m.get("content")) for m in messages if m.get("role") in ("system", "developer"))
+        user = next((_content_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+        after_tool = None
+        if messages and messages[-1].get("role") == "tool":
+            call_id = messages[-1].get("tool_call_id")
+            for m in reversed(messages):
+                for tc in m.get("tool_calls") or []:
+                    if tc.get("id") == call_id:
+                        after_tool = tc["function"]["name"]
+                        break
+                if after_tool:
+                    break
+        return system, user, after_tool
+
+    async def chat(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = request.match_info.get("deployment") or body.get("model", "")
+        system, user, after_tool = self._chat_context(body)
+        structured = (body.get("response_format") or {}).get("type") == "json_schema"
+        text, calls, ttft, tps = self._reply(self.match(model, system, user, after_tool, structured))
+        prompt = json.dumps(body.get("tools", [])) + json.dumps(body.get("messages", []))
+        prompt_tokens = _approx_tokens(prompt)
+        completion_tokens = _approx_tokens(text) + sum(_approx_tokens(c["arguments"]) + 5 for c in calls)
+        retry_after = self._over_quota(model, prompt_tokens + (body.get("max_tokens") or completion_tokens))
+        if retry_after is not None:
+            self.stats["throttled"] += 1
+            return web.json_response(
+                {"error": {"code": "429", "message": "Rate limit is exceeded. Try again later."}},
+                status=429, headers={"retry-after": str(max(1, round(retry_after))),
+                                     "retry-after-ms": str(int(retry_after * 1000))},
+            )
+        cached_tokens = self._cached_tokens(model, prompt)
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["cached_tokens"] += cached_tokens
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens},
+            "completion_tokens_details": {"reasoning_tokens": 0},
+        }
+        self.stats["requests"] += 1
+        self.stats["simulated_s"] += ttft + self._gen_time(completion_tokens, tps)
+        cid = f"chatcmpl-mock-{next(_ids)}"
+        created = int(time.time())
+        finish = "tool_calls" if calls else "stop"
+
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + self._gen_time(completion_tokens, tps))
+            message = {"role": "assistant", "content": text or None}
+            if calls:
+                message["tool_calls"] = [
+                    {"id": c["id"], "type": "function", "function": {"name": c["name"], "arguments": c["arguments"]}}
+                    for c in calls
+                ]
+            return web.json_response({
+                "id": cid, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": message, "finish_reason": finish}],
+                "usage": usage,
+            })
+
+        self.stats["streamed"] += 1
+        resp = await self._sse_start(request)
+        await asyncio.sleep(ttft)
+
+        def chunk(delta: dict, finish_reason=None, **extra) -> dict:
+            return {"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+
+        await _sse(resp, chunk({"role": "assistant", "content": ""}))
+        for piece in _pieces(text, self.chunk_tokens):
+            await asyncio.sleep(self._gen_time(_approx_tokens(piece), tps))
+            await _sse(resp, chunk({"content": piece}))
+        for i, c in enumerate(calls):
+            await _sse(resp, chunk({"tool_calls": [{
+                "index": i, "id": c["id"], "type": "function",
+                "function": {"name": c["name"], "arguments": c["arguments"]},
+            }]}))
+        await _sse(resp, chunk({}, finish))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            await _sse(resp, {"id": cid, "object": "chat.completion.chunk", "created": created,
+                              "model": model, "choices": [], "usage": usage})
+        await resp.write(b"data: [DONE]\n\n")
+        return resp
+
+    # --- Responses API ---
+    async def responses(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        model = body.get("model", "")
+        system, user, after_tool = _responses_context(body)
+        structured = ((body.get("text") or {}).get("format") or {}).get("type") == "json_schema"
+        text, calls, ttft, tps = self._reply(self.match(model, system, user, after_tool, structured))
+        input_tokens = _approx_tokens(json.dumps(body.get("input", "")) + (body.get("instructions") or ""))
+        output_tokens = _approx_tokens(text) + sum(_approx_tokens(c["arguments"]) + 5 for c in calls)
+        self.stats["requests"] += 1
+        self.stats["simulated_s"] += ttft + self._gen_time(output_tokens, tps)
+
+        rid = f"resp_mock_{next(_ids)}"
+        msg_id = f"msg_mock_{next(_ids)}"
+        output = []
+        if text:
+            output.append({
+                "type": "message", "id": msg_id, "status": "completed", "role": "assistant",
+                "content": [{"type": "output_text", "text": text, "annotations": []}],
+            })
+        for c in calls:
+            output.append({"type": "function_call", "id": f"fc_{c['id']}", "call_id": c["id"],
+                           "name": c["name"], "arguments": c["arguments"], "status": "completed"})
+        response = {
+            "id": rid, "object": "response", "created_at": int(time.time()), "status": "completed",
+            "model": model, "output": output, "parallel_tool_calls": True, "tool_choice": "auto",
+            "tools": [], "usage": {
+                "input_tokens": input_tokens, "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": output_tokens, "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": input_tokens + output_tokens,
+            },
+        }
+        if not body.get("stream"):
+            await asyncio.sleep(ttft + self._gen_time(output_tokens, tps))
+            return web.json_response(response)
+
+        self.stats["streamed"] += 1
+        resp = await self._sse_start(request)
+        seq = itertools.count()
+        created = dict(response, status="in_progress", output=[], usage=None)
+        await _sse(resp, {"type": "response.created", "sequence_number": next(seq), "response": created},
+                   event="response.created")
+        await asyncio.sleep(ttft)
+        if text:
+            for piece in _pieces(text, self.chunk_tokens):
+                await asyncio.sleep(self._gen_time(_approx_tokens(piece), tps))
+                await _sse(resp, {
+                    "type": "response.output_text.delta", "sequence_number": next(seq),
+                    "item_id": msg_id, "output_index": 0, "content_index": 0, "delta": piece, "logprobs": [],
+                }, event="response.output_text.delta")
+        await _sse(resp, {"type": "response.completed", "sequence_number": next(seq), "response": response},
+                   event="response.completed")
+        return resp
+
+    # --- Misc ---
+    async def docs(self, request: web.Request) -> web.Response:
+        page = self.pages.get(request.match_info["page"])
+        if page is None:
+            raise web.HTTPNotFound()
+        return web.Response(text=page, content_type="text/html")
+
+    async def get_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.stats)
+
+    @staticmethod
+    async def _sse_start(request: web.Request) -> web.StreamResponse:
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await resp.prepare(request)
+        return resp
+
+
+# --- Helpers ---
+def _content_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(p.get("text", "") for p in content if isinstance(p, dict))
+    return ""
+
+
+def _responses_context(body: dict) -> tuple[str, str, str | None]:
+    items = body.get("input", "")
+    system = body.get("instructions") or ""
+    if isinstance(items, str):
+        return system, items, None
+    user = ""
+    for item in items:
+        if item.get("role") in ("system", "developer"):
+            system += "\n" + _content_text(item.get("content"))
+        elif item.get("role") == "user":
+            user = _content_text(item.get("content"))
+    after_tool = None
+    if items and items[-1].get("type") == "function_call_output":
+        call_id = items[-1].get("call_id")
+        after_tool = next((i.get("name") for i in items if i.get("type") == "function_call"
+                           and i.get("call_id") == call_id), None)
+    return system, user, after_tool
+
+
+def _pieces(text: str, chunk_tokens: int) -> list[str]:
+    size = max(1, chunk_tokens * 4)
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+async def _sse(resp: web.StreamResponse, payload: dict, event: str | None = None) -> None:
+    head = f"event: {event}\n" if event else ""
+    await resp.write(f"{head}data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--ttft-ms", type=float, default=0.0, help="Simulated time to first token")
+    parser.add_argument("--tps", type=float, default=0.0, help="Simulated output tokens/s (0 = instant)")
+    parser.add_argument("--script", default=None, help="JSON file with a list of rules (default: built-in)")
+    args = parser.parse_args()
+
+    rules = json.loads(Path(args.script).read_text(encoding="utf-8")) if args.script else ALL_RULES
+    server = MockLLMServer(rules, ttft_ms=args.ttft_ms, tps=args.tps)
+
+    async def serve() -> None:
+        url = await server.start(args.host, args.port)
+        print(f"Mock LLM server on {url} ({len(rules)} rules)")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
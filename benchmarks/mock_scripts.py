@@ -0,0 +1,124 @@
+"""
+Scripted replies for mock_llm_server.py, one block per pipeline in the repo.
+
+Agents are recognised by a distinctive substring of their instructions, so
+the rules keep working if prompts are lightly edited. Handoffs are tool calls
+named like the SDK's default handoff tools (transfer_to_<agent_name>).
+"""
+import json
+
+
+def handoff(agent_name: str) -> dict:
+    """Tool call that hands off to agent_name (openai-agents default tool name)."""
+    return {"name": f"transfer_to_{agent_name.replace(' ', '_').lower()}", "arguments": {}}
+
+
+SAMPLE_DIFF = (
+    "diff --git a/src/pkg/utils.py b/src/pkg/utils.py\n"
+    "index 3a9a26e..f860837 100644\n"
+    "--- a/src/pkg/utils.py\n"
+    "+++ b/src/pkg/utils.py\n"
+    "@@ -10,7 +10,7 @@ def parse_version(value):\n"
+    "     if not value:\n"
+    "         return None\n"
+    "     parts = value.split('.')\n"
+    "-    return tuple(int(p) for p in parts[:2])\n"
+    "+    return tuple(int(p) for p in parts[:3])\n"
+    " \n"
+    " \n"
+    " def is_compatible(a, b):\n"
+)
+
+SAMPLE_ANALYSIS = {
+    "type": "bug",
+    "affected_paths": ["src/pkg/utils.py"],
+    "severity": "med",
+    "technologies": ["python"],
+    "symptoms": "parse_version drops the patch component",
+    "reproduction_steps": ["parse_version('1.2.3') returns (1, 2)"],
+    "open_questions": [],
+}
+
+SAMPLE_VALIDATION = {
+    "applies_cleanly": True,
+    "matches_issue": True,
+    "risks": ["Callers comparing 2-tuples"],
+    "gaps": [],
+    "test_plan": ["pytest tests/test_utils.py"],
+    "verdict": "approve",
+}
+
+SAMPLE_ISSUE = (
+    "parse_version ignores patch releases\n\n"
+    "`pkg.utils.parse_version('1.2.3')` returns `(1, 2)` instead of `(1, 2, 3)`, so "
+    "`is_compatible('1.2.3', '1.2.4')` is always True."
+)
+
+# --- openai_litellm/issue_solver_agent.py (orchestrator + pipeline modes) ---
+ISSUE_SOLVER_RULES = [
+    {"id": "orchestrator", "system": "You orchestrate four agents", "tool_calls": [handoff("Analyzer")]},
+    {"id": "analyzer-structured", "system": "Issue analyzer and normalizer", "structured": True,
+     "text": json.dumps(SAMPLE_ANALYSIS)},
+    {"id": "analyzer", "system": "Issue analyzer and normalizer",
+     "text": "Type: bug\nAffected: src/pkg/utils.py (parse_version)\nSeverity: med",
+     "tool_calls": [handoff("Explorer")]},
+    {"id": "explorer", "system": "Quick research and context gathering", "user": "## Analysis",
+     "text": "Root cause: parts[:2] slices off the patch number. source: internal"},
+    {"id": "explorer-handoff", "system": "Quick research and context gathering",
+     "text": "Root cause: parts[:2] slices off the patch number. source: internal",
+     "tool_calls": [handoff("Engineer")]},
+    {"id": "engineer", "system": "Git Patch Generator", "text": SAMPLE_DIFF},
+    {"id": "validator", "system": "Patch Validator", "text": json.dumps(SAMPLE_VALIDATION)},
+]
+
+# --- openai_litellm/multiagent.py (language triage + weather tool) ---
+MULTIAGENT_RULES = [
+    {"id": "triage-es", "system": "Decide el handoff", "user": "clima", "tool_calls": [handoff("Spanish agent")]},
+    {"id": "triage-en", "system": "Decide el handoff", "tool_calls": [handoff("English Assistant")]},
+    {"id": "spanish-answer", "system": "Responde en español", "after_tool": "get_weather",
+     "text": "En CDMX hay 22°C y está nublado."},
+    {"id": "spanish-tool", "system": "Responde en español",
+     "tool_calls": [{"name": "get_weather", "arguments": {"city": "CDMX", "unit": "C"}}]},
+    {"id": "english-answer", "system": "Reply in concise English", "after_tool": "get_weather",
+     "text": "Madrid: 77°F, clear."},
+    {"id": "english-tool", "system": "Reply in concise English",
+     "tool_calls": [{"name": "get_weather", "arguments": {"city": "Madrid", "unit": "F"}}]},
+]
+
+# --- openai_litellm/code_multiagent.py (docs explainer with fetch_url) ---
+CODE_MULTIAGENT_RULES = [
+    {"id": "code-triage", "system": "handoff to the Documentation Explainer", "tool_calls": [handoff("Explorer")]},
+    {"id": "docs-answer", "system": "explains documentation", "after_tool": "fetch_url",
+     "text": "Install pandas with `pip install pandas` (Python 3.10+), or `conda install pandas`."},
+    {"id": "docs-fetch", "system": "explains documentation",
+     "tool_calls": [{"name": "fetch_url", "arguments": {"url": "{base_url}/docs/install.html"}}]},
+    {"id": "code-engineer", "system": "You are a coding assistant", "text": "```python\nimport pandas as pd\n```"},
+]
+
+# --- main.py / responses-function/responses.py / semantic-kernel ---
+MISC_RULES = [
+    {"id": "smoke", "user": "OK, esto es una prueba", "text": "OK, esto es una prueba"},
+    {"id": "vision", "user": "name of the animal", "text": "It is a golden retriever."},
+    {"id": "rag", "user": "Que es RAG", "text": "RAG (Retrieval-Augmented Generation) combina " * 20},
+    {"id": "sk-support", "system": "Responde siempre en español", "text": "Con gusto le ayudo con su solicitud."},
+]
+
+# --- openai_litellm/chunking.py (summariser for long pages / issue threads) ---
+CHUNKING_RULES = [
+    {"id": "chunk-summary", "system": "condense one excerpt",
+     "text": "Install pandas with `pip install pandas`; optional dependency groups add I/O backends."},
+]
+
+ALL_RULES = ISSUE_SOLVER_RULES + MULTIAGENT_RULES + CODE_MULTIAGENT_RULES + CHUNKING_RULES + MISC_RULES
+
+DOC_PAGES = {
+    "install.html": (
+        "<html><head><title>Installation - pandas</title><script>var x = 1;</script></head><body>"
+        + "".join(
+            f"<section><h2>Step {i}</h2><p>Install pandas with <code>pip install pandas</code>; "
+            f"optional dependency group {i} adds extra I/O backends.</p></section>"
+            for i in range(200)
+        )
+        + "</body></html>"
+    ),
+}
@@ -0,0 +1,61 @@
+"""
+Single entry point for the repo's pipelines.
+
+Each command runs one of the existing scripts as __main__, with the remaining
+arguments passed through unchanged (`python cli.py batch --help` shows the
+batch options). Only the chosen script is imported: listing the commands or
+running a light one such as `evaluate` does not load agents, litellm or
+semantic_kernel.
+
+Usage:
+    python cli.py                      # List the commands
+    python cli.py solve --stream
+    python cli.py batch --dataset swe_bench_lite_test.jsonl --mode pipeline --evaluate
+    python cli.py evaluate --predictions predictions.jsonl
+    python cli.py support-server --port 8080
+"""
+import runpy
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+
+# --- Commands: name -> (script, description) ---
+COMMANDS = {
+    "solve": ("openai_litellm/issue_solver_agent.py", "Solve a pasted GitHub issue (LLM-driven handoffs)"),
+    "pipeline": ("openai_litellm/issue_pipeline.py", "Solve a pasted GitHub issue (code-driven stages)"),
+    "batch": ("openai_litellm/batch_solver.py", "Solve SWE-bench instances concurrently"),
+    "evaluate": ("openai_litellm/evaluate.py", "Run the SWE-bench tests on a predictions file"),
+    "multiagent": ("openai_litellm/multiagent.py", "Language-routed assistant demo (weather tool)"),
+    "docs": ("openai_litellm/code_multiagent.py", "Documentation explainer / code generator demo"),
+    "support": ("semantic-kernel/agents_semantic.py", "Routed support agents, interactive (Semantic Kernel)"),
+    "support-server": ("semantic-kernel/support_server.py", "Routed support agents as an HTTP server"),
+    "responses": ("responses-function/responses.py", "Responses API demos (text, vision, streaming)"),
+    "export-dataset": ("data_sets.py", "Download SWE-bench and write the JSONL instance store"),
+}
+
+
+def usage() -> str:
+    width = max(map(len, COMMANDS))
+    lines = ["usage: python cli.py <command> [args...]", "", "commands:"]
+    lines += [f"  {name:<{width}}  {description}" for name, (_, description) in COMMANDS.items()]
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> None:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    if argv[0] not in COMMANDS:
+        sys.exit(f"unknown command: {argv[0]}\n\n{usage()}")
+
+    script = ROOT / COMMANDS[argv[0]][0]
+    # Same environment as `python <script>`: its directory first on the path, its own argv
+    sys.path.insert(0, str(script.parent))
+    sys.argv = [str(script), *argv[1:]]
+    runpy.run_path(str(script), run_name="__main__")
+
+
+if __name__ == "__main__":
+    main()
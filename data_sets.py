@@ -1,5 +1,8 @@
 from datasets import load_dataset
-import json
+
+from openai_litellm.swe_store import write_store, index_path
+
+OUTPUT = "swe_bench_lite_test.jsonl"
 
 # Cargar dataset
 # dev = load_dataset('SWE-bench/SWE-bench', split='dev')
@@ -7,11 +10,9 @@ test = load_dataset('SWE-bench/SWE-bench', split='test')
 # train = load_dataset('SWE-bench/SWE-bench', split='train')
 # tot_len = len(dev) + len(test) + len(train)
 print(f"Dataset cargado con {len(test)} entradas.")
-# Convertir a lista de diccionarios
-data = [item for item in test]
 
-# Guardar en un archivo JSON
-with open("swe_bench_lite_test.json", "w", encoding="utf-8") as f:
-    json.dump(data, f, indent=2, ensure_ascii=False)
+# Guardar en JSONL (una instancia por línea) + índice de offsets por instance_id,
+# sin materializar todo el split como lista en memoria
+count = write_store(test, OUTPUT)
 
-print("Archivo guardado como swe_bench_lite_test.json")
\ No newline at end of file
+print(f"{count} instancias guardadas en {OUTPUT} (índice: {index_path(OUTPUT)})")
@@ -1,17 +1,23 @@
+import asyncio
 import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from openai import OpenAI
+
+sys.path.insert(0, str(Path(__file__).resolve().parent / "responses-function"))
+from async_client import create, aclose
 
 load_dotenv()
 
 
-client = OpenAI(
-    api_key=os.getenv("AZURE_API_KEY"),
-    base_url=f"{os.getenv('AZURE_API_BASE').rstrip('/')}/openai/v1/",
-)
+async def main():
+    resp, metrics = await create(
+        model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
+        input="Solamente di: ""OK, esto es una prueba""",
+    )
+    print(resp.output_text)
+    print(metrics)
+    await aclose()
+
 
-resp = client.responses.create(
-    model=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
-    input="Solamente di: ""OK, esto es una prueba""",
-)
-print(resp.output_text)
+asyncio.run(main())
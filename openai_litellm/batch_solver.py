@@ -0,0 +1,298 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+
+from agents import Runner
+from agents.items import MessageOutputItem, ItemHelpers
+
+import llm_cache
+import prompt_layout
+from chunking import fit_to_budget
+from code_index import CodeContext
+from issue_solver_agent import orchestrator_agent
+from issue_pipeline import run_pipeline
+from swe_store import InstanceStore
+from usage_report import UsageRecorder
+
+MODEL_NAME = "multiagent-issue-solver"
+ISSUE_BUDGET_TOKENS = int(os.getenv("ISSUE_BUDGET_TOKENS", "6000"))   # Longer problem statements are condensed
+ISSUE_FOCUS = "the reported problem: reproduction steps, expected vs actual behaviour, tracebacks, code involved"
+
+
+# --- Dataset / predictions I/O ---
+def load_instances(path: str, repo: str | None = None, ids: list[str] | None = None) -> list[dict]:
+    """
+    Loads SWE-bench instances from the JSONL store written by data_sets.py.
+
+    Args:
+        path (str): Path to the .jsonl store (its offset index sits next to it)
+        repo (str | None): Only instances of this repo (e.g. "django/django")
+        ids (list[str] | None): Only these instance ids
+
+    Returns:
+        list[dict]: One dict per instance
+    """
+    with InstanceStore(path) as store:
+        return list(store.iter(repo=repo, ids=ids))
+
+
+def load_predictions(path: str) -> dict[str, dict]:
+    """
+    Reads an existing predictions file (JSONL) so a batch can resume.
+    Later records win, so a retried instance replaces its failed attempt.
+    """
+    done = {}
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Truncated last line from an interrupted run
+            done[record["instance_id"]] = record
+    return done
+
+
+def build_issue_text(instance: dict) -> str:
+    """
+    Formats a SWE-bench instance as the plain-text issue the Orchestrator expects.
+    """
+    return (
+        f"Repository: {instance['repo']}\n"
+        f"Base commit: {instance['base_commit']}\n\n"
+        f"{instance['problem_statement']}"
+    )
+
+
+async def condensed_issue_text(instance: dict) -> str:
+    """
+    build_issue_text with the problem statement condensed to ISSUE_BUDGET_TOKENS
+    (long issue threads are chunked and summarised; short ones are unchanged).
+    """
+    statement = await fit_to_budget(instance["problem_statement"], ISSUE_BUDGET_TOKENS, focus=ISSUE_FOCUS)
+    return build_issue_text({**instance, "problem_statement": statement})
+
+
+def extract_patch(result) -> str:
+    """
+    Returns the git diff produced by a run.
+
+    The final output is used when it already is a diff; otherwise the last
+    message emitted by the Engineer is taken (e.g. if a later agent answered).
+    """
+    final = (result.final_output or "") if isinstance(result.final_output, str) else ""
+    if final.lstrip().startswith("diff --git"):
+        return final
+    for item in reversed(result.new_items):
+        if isinstance(item, MessageOutputItem) and item.agent.name == "Engineer":
+            text = ItemHelpers.text_message_output(item)
+            if text.lstrip().startswith("diff --git"):
+                return text
+    return final
+
+
+# --- Batch execution ---
+async def solve_instance(
+    instance: dict,
+    timeout: float,
+    mode: str = "orchestrator",
+    recorder: UsageRecorder | None = None,
+    candidates: int = 1,
+    select: str = "first",
+) -> dict:
+    """
+    Runs the issue solver on a single instance.
+
+    Args:
+        instance (dict): SWE-bench instance
+        timeout (float): Seconds before the run is cancelled
+        mode (str): "orchestrator" (LLM-driven handoffs) or "pipeline" (code-driven stages)
+        recorder (UsageRecorder | None): Collects per-agent timings and token usage
+        candidates (int): Speculative Engineer candidates per round (pipeline mode)
+        select (str): "first" valid candidate or "rank" all (pipeline mode)
+
+    Returns:
+        dict: Prediction record (SWE-bench format plus status fields)
+    """
+    start = time.perf_counter()
+    record = {
+        "instance_id": instance["instance_id"],
+        "model_name_or_path": MODEL_NAME,
+        "model_patch": "",
+    }
+    run_kwargs = {"hooks": recorder.hooks(instance["instance_id"])} if recorder else {}
+    # search_code / read_file_range read the target repo at base_commit from the run context
+    run_kwargs["context"] = CodeContext(instance["repo"], instance["base_commit"])
+
+    async def solve() -> None:
+        # Shared repo context of the cached prompt prefix (git, once per repo and period), off the event loop
+        await asyncio.to_thread(prompt_layout.warm, instance["repo"], instance["base_commit"])
+        issue_text = await condensed_issue_text(instance)
+        if mode == "pipeline":
+            result = await run_pipeline(
+                issue_text,
+                repo=instance["repo"],
+                base_commit=instance["base_commit"],
+                candidates=candidates,
+                select=select,
+                **run_kwargs,
+            )
+            record["model_patch"] = result.diff
+            if result.candidates:
+                record["candidates"] = len(result.candidates)
+        else:
+            result = await Runner.run(
+                orchestrator_agent,
+                input=[{"role": "user", "content": issue_text}],
+                **run_kwargs,
+            )
+            record["model_patch"] = extract_patch(result)
+
+    try:
+        # The timeout covers the whole instance: clone, issue condensing and the agents
+        await asyncio.wait_for(solve(), timeout=timeout)
+    except asyncio.TimeoutError:
+        record["error"] = f"timeout after {timeout:.0f}s"
+    except Exception as e:
+        record["error"] = f"{type(e).__name__}: {e}"
+    record["elapsed_s"] = round(time.perf_counter() - start, 2)
+    return record
+
+
+async def run_batch(
+    instances: list[dict],
+    output_path: str,
+    concurrency: int = 8,
+    timeout: float = 900.0,
+    retry_failed: bool = False,
+    mode: str = "orchestrator",
+    usage_path: str | None = None,
+    prometheus_path: str | None = None,
+    candidates: int = 1,
+    select: str = "first",
+) -> None:
+    """
+    Solves many instances concurrently and appends one record per instance
+    to output_path as soon as it finishes.
+
+    Args:
+        instances (list[dict]): SWE-bench instances
+        output_path (str): Predictions JSONL file (also the resume checkpoint)
+        concurrency (int): Maximum number of instances in flight
+        timeout (float): Per-instance timeout in seconds
+        retry_failed (bool): Re-run instances whose previous record has an error
+        mode (str): "orchestrator" or "pipeline" (see solve_instance)
+        usage_path (str | None): JSONL file receiving per-call usage events
+        prometheus_path (str | None): File receiving Prometheus counters at the end
+        candidates (int): Speculative Engineer candidates per round (pipeline mode)
+        select (str): "first" or "rank" (see issue_pipeline.speculate)
+    """
+    done = load_predictions(output_path)
+    pending = [
+        inst for inst in instances
+        if inst["instance_id"] not in done
+        or (retry_failed and "error" in done[inst["instance_id"]])
+    ]
+    print(f"[batch] {len(instances)} instances, {len(instances) - len(pending)} already done, "
+          f"{len(pending)} to run (concurrency={concurrency})")
+    if not pending:
+        return
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    semaphore = asyncio.Semaphore(concurrency)
+    recorder = UsageRecorder()
+    finished = 0
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        async def worker(instance: dict) -> None:
+            nonlocal finished
+            async with semaphore:
+                record = await solve_instance(instance, timeout, mode, recorder, candidates, select)
+            # Single event loop thread: one write per record, flushed so a crash keeps progress
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+            if usage_path:
+                recorder.write_jsonl(usage_path)
+            finished += 1
+            status = record.get("error", "ok")
+            print(f"[batch] {finished}/{len(pending)} {record['instance_id']} "
+                  f"({record['elapsed_s']}s) {status}")
+
+        await asyncio.gather(*(worker(inst) for inst in pending))
+
+    print("\n[batch] Per-agent usage:")
+    print(recorder.format_summary())
+    if llm_cache.stats:
+        print(f"LLM cache ({llm_cache.MODE}): {dict(llm_cache.stats)}")
+    if prometheus_path:
+        with open(prometheus_path, "w", encoding="utf-8") as f:
+            f.write(recorder.prometheus())
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Batch SWE-bench runner for the issue solver")
+    parser.add_argument("--dataset", default="swe_bench_lite_test.jsonl",
+                        help="JSONL store exported by data_sets.py")
+    parser.add_argument("--repo", default=None, help="Only instances of this repo (owner/name)")
+    parser.add_argument("--ids", nargs="+", default=None, help="Only these instance ids")
+    parser.add_argument("--output", default="predictions.jsonl",
+                        help="Predictions JSONL (resumed if it exists)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Instances in flight")
+    parser.add_argument("--timeout", type=float, default=900.0, help="Per-instance timeout (s)")
+    parser.add_argument("--limit", type=int, default=None, help="Only run the first N instances")
+    parser.add_argument("--mode", choices=["orchestrator", "pipeline"], default="orchestrator",
+                        help="LLM Orchestrator handoffs or the code-driven stage pipeline")
+    parser.add_argument("--candidates", type=int, default=1,
+                        help="Pipeline mode: Engineer candidates generated concurrently per round")
+    parser.add_argument("--select", choices=["first", "rank"], default="first",
+                        help="Pipeline mode: first candidate passing local checks wins, or rank them all")
+    parser.add_argument("--usage", default=None,
+                        help="Usage events JSONL (default: <output>.usage.jsonl)")
+    parser.add_argument("--prometheus", default=None, help="Write Prometheus counters to this file")
+    parser.add_argument("--retry-failed", action="store_true",
+                        help="Re-run instances that previously errored or timed out")
+    parser.add_argument("--llm-cache", choices=llm_cache.MODES, default=llm_cache.MODE,
+                        help="Record/replay cache for model calls (default: env LLM_CACHE or passthrough)")
+    parser.add_argument("--evaluate", action="store_true",
+                        help="Run the SWE-bench tests on the predictions afterwards (see evaluate.py)")
+    parser.add_argument("--eval-workers", type=int, default=None, help="Instances evaluated in parallel (default: cores)")
+    return parser.parse_args()
+
+
+# --- Example execution ---
+if __name__ == "__main__":
+    args = parse_args()
+    llm_cache.set_mode(args.llm_cache)
+    instances = load_instances(args.dataset, repo=args.repo, ids=args.ids)
+    if args.limit is not None:
+        instances = instances[:args.limit]
+    asyncio.run(run_batch(
+        instances,
+        args.output,
+        concurrency=args.concurrency,
+        timeout=args.timeout,
+        retry_failed=args.retry_failed,
+        mode=args.mode,
+        usage_path=args.usage or f"{os.path.splitext(args.output)[0]}.usage.jsonl",
+        prometheus_path=args.prometheus,
+        candidates=args.candidates,
+        select=args.select,
+    ))
+    if args.evaluate:
+        import evaluate
+
+        by_id = {i["instance_id"]: i for i in instances}
+        predictions = [p for p in load_predictions(args.output).values() if p["instance_id"] in by_id]
+        results = evaluate.evaluate_predictions(
+            predictions, by_id,
+            output_path=f"{os.path.splitext(args.output)[0]}.eval.jsonl",
+            workers=args.eval_workers,
+        )
+        print(evaluate.format_summary(results))
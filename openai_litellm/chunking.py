@@ -0,0 +1,215 @@
+"""
+Token-budgeted condensing of long texts (fetched pages, issue threads) before
+they reach an agent.
+
+fit_to_budget(text, budget, focus) returns text unchanged when it already fits;
+otherwise it:
+    1. splits it into ~CHUNK_TOKENS chunks on paragraph/line boundaries (split_tokens)
+    2. keeps the MAX_CHUNKS most relevant to `focus` (lexical overlap, no model call)
+    3. map: summarises every chunk concurrently with a cheap deployment
+       (SUMMARY_MODEL, gpt-4.1-nano), each within its share of the budget
+    4. reduce: joins the summaries in document order, and summarises the joined
+       text again if it still exceeds the budget
+
+If the summariser is disabled (env CHUNK_SUMMARIES=off) or a call fails, the
+affected chunks fall back to pack_chunks: the most relevant chunks verbatim, in
+document order, until the budget is filled.
+
+Usage:
+    text = await fit_to_budget(page_text, 3000, focus="install pandas with conda")
+"""
+import asyncio
+import os
+import re
+from collections import Counter
+
+from agents import Agent, ModelSettings, RunContextWrapper, Runner
+
+from llm_cache import cached
+from rate_scheduler import scheduled
+from tokens import _encoding, count_tokens, truncate_tokens
+
+API_KEY = os.getenv("AZURE_API_KEY")
+SUMMARY_MODEL = os.getenv("CHUNK_SUMMARY_MODEL", "gpt-4.1-nano")
+SUMMARIES = os.getenv("CHUNK_SUMMARIES", "on").lower() not in ("0", "off", "false")
+CHUNK_TOKENS = 1500          # Size of each chunk sent to the summariser
+MAX_CHUNKS = 24              # Chunks summarised per text (the least relevant are dropped)
+MIN_SUMMARY_TOKENS = 120     # Floor for one chunk's share of the budget
+CONCURRENCY = 8              # Summaries in flight per text
+MAX_ROUNDS = 2               # Reduce rounds before falling back to truncation
+
+_WORD = re.compile(r"[A-Za-z_][A-Za-z0-9_]{2,}")
+
+summarizer_agent = Agent(
+    name="Summarizer",
+    instructions=(
+        "You condense one excerpt of a longer document for another agent. "
+        "Keep only what matters for the stated focus (or, without a focus, the main facts). "
+        "Copy code, commands, identifiers, file paths, versions and error messages verbatim; "
+        "drop navigation, boilerplate and repetition. "
+        "If the excerpt has nothing relevant, answer with an empty line. "
+        "Never exceed the requested length and do not add commentary."
+    ),
+    model=cached(scheduled(SUMMARY_MODEL, api_key=API_KEY)),
+    model_settings=ModelSettings(include_usage=True, temperature=0),
+)
+
+
+# --- Splitting ---
+def _split_long(block: str, max_tokens: int) -> list[str]:
+    """
+    Splits a block larger than max_tokens by lines, then by raw tokens.
+    """
+    pieces, current, size = [], [], 0
+    for line in block.split("\n"):
+        n = count_tokens(line) + 1
+        if n > max_tokens:
+            if current:
+                pieces.append("\n".join(current))
+                current, size = [], 0
+            enc = _encoding()
+            if enc is None:
+                step = max_tokens * 4
+                pieces += [line[i:i + step] for i in range(0, len(line), step)]
+            else:
+                ids = enc.encode(line, disallowed_special=())
+                pieces += [enc.decode(ids[i:i + max_tokens]) for i in range(0, len(ids), max_tokens)]
+            continue
+        if size + n > max_tokens and current:
+            pieces.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += n
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def split_tokens(text: str, max_tokens: int = CHUNK_TOKENS) -> list[str]:
+    """
+    Splits text into chunks of at most max_tokens, cutting between paragraphs
+    where possible (then between lines, then inside a line).
+
+    Returns:
+        list[str]: Chunks in document order
+    """
+    chunks, current, size = [], [], 0
+    for paragraph in re.split(r"\n\s*\n", text):
+        if not paragraph.strip():
+            continue
+        n = count_tokens(paragraph) + 2
+        if n > max_tokens:
+            if current:
+                chunks.append("\n\n".join(current))
+                current, size = [], 0
+            chunks += _split_long(paragraph, max_tokens)
+            continue
+        if size + n > max_tokens and current:
+            chunks.append("\n\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += n
+    if current:
+        chunks.append("\n\n".join(current))
+    return chunks
+
+
+# --- Ranking ---
+def _terms(text: str) -> Counter:
+    return Counter(w.lower() for w in _WORD.findall(text))
+
+
+def rank_chunks(chunks: list[str], focus: str) -> list[int]:
+    """
+    Orders chunk indexes by lexical relevance to focus (best first); without a
+    focus, document order.
+    """
+    query = set(_terms(focus))
+    if not query:
+        return list(range(len(chunks)))
+    scores = []
+    for i, chunk in enumerate(chunks):
+        terms = _terms(chunk)
+        total = sum(terms.values()) or 1
+        # Distinct query terms matter most; frequency breaks ties, normalised by length
+        score = len(query & terms.keys()) + sum(terms[t] for t in query) / total
+        scores.append((-score, i))
+    return [i for _, i in sorted(scores)]
+
+
+def pack_chunks(chunks: list[str], budget: int, focus: str = "") -> str:
+    """
+    Most relevant chunks verbatim, in document order, within budget tokens.
+    """
+    chosen, left = [], budget
+    for i in rank_chunks(chunks, focus):
+        n = count_tokens(chunks[i]) + 2
+        if n <= left:
+            chosen.append(i)
+            left -= n
+    if not chosen and chunks:
+        return truncate_tokens(chunks[rank_chunks(chunks, focus)[0]], budget)
+    return "\n\n".join(chunks[i] for i in sorted(chosen))
+
+
+# --- Map-reduce ---
+async def summarize_chunk(chunk: str, max_tokens: int, focus: str = "",
+                          ctx: RunContextWrapper | None = None) -> str:
+    """
+    Condenses one chunk with the summariser deployment (at most max_tokens).
+
+    Args:
+        ctx (RunContextWrapper | None): Calling tool's context; the summariser's
+            usage is added to the parent run's usage
+    """
+    prompt = (f"Focus: {focus or '(none)'}\nMaximum length: {max_tokens} tokens\n\n"
+              f"Excerpt:\n{chunk}")
+    agent = summarizer_agent.clone(
+        model_settings=summarizer_agent.model_settings.resolve(ModelSettings(max_tokens=max_tokens + 32)))
+    result = await Runner.run(agent, prompt)
+    if ctx is not None:
+        ctx.usage.add(result.context_wrapper.usage)
+    return truncate_tokens(str(result.final_output or "").strip(), max_tokens)
+
+
+async def fit_to_budget(text: str, budget: int, focus: str = "", ctx: RunContextWrapper | None = None,
+                        summarize: bool | None = None) -> str:
+    """
+    Condenses text to at most budget tokens (see module docstring).
+
+    Args:
+        text (str): Long input (page text, issue thread...)
+        budget (int): Max tokens of the result
+        focus (str): What the reader is looking for; steers ranking and summaries
+        ctx (RunContextWrapper | None): Tool context, to account the summariser's usage
+        summarize (bool | None): Use the summariser (default: env CHUNK_SUMMARIES)
+
+    Returns:
+        str: text itself if it fits, else its condensed version
+    """
+    if count_tokens(text) <= budget:
+        return text
+    summarize = SUMMARIES if summarize is None else summarize
+    for _ in range(MAX_ROUNDS):
+        chunks = split_tokens(text)
+        if not summarize:
+            return pack_chunks(chunks, budget, focus)
+        keep = sorted(rank_chunks(chunks, focus)[:MAX_CHUNKS])
+        share = max(MIN_SUMMARY_TOKENS, budget // len(keep))
+        sem = asyncio.Semaphore(CONCURRENCY)
+
+        async def one(i: int) -> str:
+            async with sem:
+                try:
+                    return await summarize_chunk(chunks[i], share, focus, ctx)
+                except Exception:
+                    return pack_chunks([chunks[i]], share)   # Summariser unavailable: verbatim excerpt
+
+        summaries = await asyncio.gather(*(one(i) for i in keep))
+        condensed = "\n\n".join(s for s in summaries if s.strip())
+        if not condensed:
+            return pack_chunks(chunks, budget, focus)   # Every summary came back empty: verbatim excerpts
+        text = condensed
+        if count_tokens(text) <= budget:
+            return text
+    return pack_chunks(split_tokens(text, max(MIN_SUMMARY_TOKENS, budget // 4)), budget, focus)
@@ -0,0 +1,351 @@
+"""
+Local code search over SWE-bench target repositories, for the Analyzer and Explorer.
+
+One SQLite database per repo (CACHE_ROOT/code_index/<owner>__<name>.sqlite),
+built from the bare mirror of WorktreePool (no checkout needed):
+    blobs     every blob already read (git blob sha -> line count)
+    chunks    FTS5 table of CHUNK_LINES-line windows of each blob (BM25 ranking)
+    symbols   definitions (functions, classes, methods) with their line
+    trees     path -> blob sha for every indexed commit
+
+Indexing a commit lists its tree (`git ls-tree`) and only reads and indexes the
+blobs the database has not seen yet, so the next instance of the same repo
+costs little more than the files that changed between the two commits.
+
+Agents get two tools that read the repo/commit from the run context:
+    search_code(query)                     definitions + best matching line windows
+    read_file_range(path, start, end)      numbered source lines
+
+Usage:
+    result = await Runner.run(agent, issue, context=CodeContext(repo, base_commit))
+"""
+import ast
+import asyncio
+import re
+import sqlite3
+import subprocess
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from agents import RunContextWrapper, function_tool
+
+from page_cache import CACHE_ROOT
+from worktree_pool import GIT_TIMEOUT, GitError, _git, _slug, default_pool
+
+INDEX_ROOT = CACHE_ROOT / "code_index"
+CHUNK_LINES = 30
+MAX_FILE_BYTES = 512 * 1024          # Larger files are usually generated or vendored
+MAX_RANGE_LINES = 200                # read_file_range cap per call
+MAX_RESULTS = 20
+TEXT_SUFFIXES = {
+    ".py", ".pyi", ".pyx", ".js", ".jsx", ".ts", ".tsx", ".java", ".go", ".rs", ".rb", ".php",
+    ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".kt", ".scala", ".swift", ".sh", ".sql",
+    ".md", ".rst", ".txt", ".toml", ".cfg", ".ini", ".yaml", ".yml", ".json", ".html", ".css",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (sha TEXT PRIMARY KEY, lines INTEGER);
+CREATE TABLE IF NOT EXISTS trees (commit_sha TEXT, path TEXT, sha TEXT, PRIMARY KEY (commit_sha, path));
+CREATE INDEX IF NOT EXISTS trees_sha ON trees (sha);
+CREATE TABLE IF NOT EXISTS commits (commit_sha TEXT PRIMARY KEY, files INTEGER);
+CREATE TABLE IF NOT EXISTS symbols (sha TEXT, name TEXT, qualname TEXT, kind TEXT, line INTEGER);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(text, sha UNINDEXED, start UNINDEXED);
+"""
+
+_DEFINITION = re.compile(
+    r"^\s*(?:export\s+)?(?:default\s+)?(?:public\s+|private\s+|protected\s+|static\s+)*(?:async\s+)?"
+    r"(def|class|function|func|fn|interface|struct|type|trait|impl)\s+([A-Za-z_]\w*)"
+)
+
+
+# --- Symbol extraction ---
+def extract_symbols(path: str, text: str) -> list[tuple[str, str, str, int]]:
+    """
+    Definitions in a file as (name, qualname, kind, line). Python files are
+    parsed with ast (qualified names like Class.method); other languages use a
+    keyword regex.
+    """
+    if path.endswith((".py", ".pyi")):
+        try:
+            tree = ast.parse(text)
+        except (SyntaxError, ValueError):
+            tree = None
+        if tree is not None:
+            found = []
+
+            def visit(node, prefix: str) -> None:
+                for child in ast.iter_child_nodes(node):
+                    if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                        kind = "class" if isinstance(child, ast.ClassDef) else "def"
+                        found.append((child.name, prefix + child.name, kind, child.lineno))
+                        visit(child, f"{prefix}{child.name}.")
+
+            visit(tree, "")
+            return found
+    found = []
+    for number, line in enumerate(text.splitlines(), 1):
+        m = _DEFINITION.match(line)
+        if m:
+            found.append((m.group(2), m.group(2), m.group(1), number))
+    return found
+
+
+def _fts_query(query: str) -> str:
+    """
+    Free text / identifiers -> FTS5 query: each word quoted (so punctuation and
+    keywords are literal), any of them may match; BM25 ranks the best windows.
+    """
+    words = re.findall(r"\w+", query)
+    return " OR ".join(f'"{w}"' for w in dict.fromkeys(words))
+
+
+# --- Index ---
+class CodeIndex:
+    """
+    Incremental BM25 + symbol index of one repo. Thread-safe; blocking (git and
+    SQLite), so call it with asyncio.to_thread from async code.
+    """
+
+    def __init__(self, repo: str, root: Path = INDEX_ROOT):
+        self.repo = repo
+        root.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(root / f"{_slug(repo)}.sqlite", check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _mirror(self, commit: str) -> Path:
+        return default_pool().mirror(self.repo, commit)
+
+    # --- Building ---
+    def ensure(self, commit: str) -> dict:
+        """
+        Indexes the repo at commit if needed.
+
+        Returns:
+            dict: files, new_blobs (0 when the commit was already indexed)
+        """
+        with self._lock:
+            row = self._db.execute("SELECT files FROM commits WHERE commit_sha = ?", (commit,)).fetchone()
+            if row:
+                return {"files": row[0], "new_blobs": 0}
+            mirror = self._mirror(commit)
+            entries = []
+            for line in _git("ls-tree", "-r", "-l", "--full-tree", commit, cwd=mirror).splitlines():
+                meta, path = line.split("\t", 1)
+                _mode, kind, sha, size = meta.split()
+                if kind == "blob" and size != "-" and int(size) <= MAX_FILE_BYTES \
+                        and Path(path).suffix.lower() in TEXT_SUFFIXES:
+                    entries.append((path, sha))
+            known = {sha for (sha,) in self._db.execute("SELECT sha FROM blobs")}
+            new = {sha: path for path, sha in entries if sha not in known}
+            for sha, text in self._read_blobs(mirror, list(new)):
+                self._index_blob(sha, new[sha], text)
+            self._db.executemany("INSERT OR REPLACE INTO trees VALUES (?, ?, ?)",
+                                 [(commit, path, sha) for path, sha in entries])
+            self._db.execute("INSERT INTO commits VALUES (?, ?)", (commit, len(entries)))
+            self._db.commit()
+            return {"files": len(entries), "new_blobs": len(new)}
+
+    @staticmethod
+    def _read_blobs(mirror: Path, shas: list[str]):
+        """
+        Yields (sha, text) for each blob through one `git cat-file --batch` process.
+        """
+        if not shas:
+            return
+        proc = subprocess.Popen(["git", "cat-file", "--batch"], cwd=mirror,
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        # Feed the requests from a thread so a full stdout pipe cannot deadlock us
+        writer = threading.Thread(target=lambda: (proc.stdin.write("".join(s + "\n" for s in shas).encode()),
+                                                  proc.stdin.close()))
+        writer.start()
+        try:
+            for _ in shas:
+                header = proc.stdout.readline().split()
+                if len(header) < 3:   # "<sha> missing"
+                    continue
+                data = proc.stdout.read(int(header[2]))
+                proc.stdout.read(1)   # Trailing newline
+                if b"\0" in data[:8000]:
+                    yield header[0].decode(), None   # Binary: remembered, not indexed
+                    continue
+                yield header[0].decode(), data.decode("utf-8", errors="replace")
+        finally:
+            writer.join()
+            proc.stdout.close()
+            proc.wait(timeout=GIT_TIMEOUT)
+
+    def _index_blob(self, sha: str, path: str, text: str | None) -> None:
+        lines = text.splitlines() if text is not None else []
+        self._db.execute("INSERT OR IGNORE INTO blobs VALUES (?, ?)", (sha, len(lines)))
+        if text is None:
+            return
+        self._db.executemany(
+            "INSERT INTO chunks (text, sha, start) VALUES (?, ?, ?)",
+            [("\n".join(lines[i:i + CHUNK_LINES]), sha, i + 1) for i in range(0, len(lines), CHUNK_LINES)],
+        )
+        self._db.executemany("INSERT INTO symbols VALUES (?, ?, ?, ?, ?)",
+                             [(sha, *symbol) for symbol in extract_symbols(path, text)])
+
+    # --- Queries ---
+    def find_symbols(self, commit: str, name: str, limit: int = MAX_RESULTS) -> list[tuple[str, str, str, int]]:
+        """
+        Definitions named `name` (or whose qualified name ends with it) at commit: (path, qualname, kind, line).
+        """
+        name = name.rsplit(".", 1)[-1]
+        with self._lock:
+            return self._db.execute(
+                "SELECT t.path, s.qualname, s.kind, s.line FROM symbols s JOIN trees t ON t.sha = s.sha "
+                "WHERE s.name = ? AND t.commit_sha = ? ORDER BY t.path, s.line LIMIT ?",
+                (name, commit, limit),
+            ).fetchall()
+
+    def search(self, commit: str, query: str, limit: int = 10) -> list[tuple[str, int, str]]:
+        """
+        Best matching CHUNK_LINES windows at commit: (path, start line, text), best first.
+        """
+        fts = _fts_query(query)
+        if not fts:
+            return []
+        with self._lock:
+            return self._db.execute(
+                "SELECT t.path, c.start, c.text FROM chunks c JOIN trees t ON t.sha = c.sha "
+                "WHERE chunks MATCH ? AND t.commit_sha = ? ORDER BY bm25(chunks) LIMIT ?",
+                (fts, commit, limit),
+            ).fetchall()
+
+    def read_range(self, commit: str, path: str, start: int, end: int) -> list[str]:
+        """
+        Lines start..end (1-based, inclusive) of path at commit.
+
+        Raises:
+            GitError: The path does not exist at commit
+        """
+        text = _git("cat-file", "blob", f"{commit}:{path}", cwd=self._mirror(commit))
+        return text.splitlines()[max(start, 1) - 1:end]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_indexes: dict[str, CodeIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_index(repo: str) -> CodeIndex:
+    """
+    Process-wide CodeIndex per repo (one SQLite connection each).
+    """
+    with _indexes_lock:
+        if repo not in _indexes:
+            _indexes[repo] = CodeIndex(repo)
+        return _indexes[repo]
+
+
+# --- Run context for the tools ---
+@dataclass
+class CodeContext:
+    repo: str             # SWE-bench "repo" (owner/name)
+    base_commit: str
+
+    @property
+    def index(self) -> CodeIndex:
+        return get_index(self.repo)
+
+
+def _code_context(ctx: RunContextWrapper[Any]) -> CodeContext | None:
+    context = ctx.context
+    return context if isinstance(context, CodeContext) else None
+
+
+def _matching_lines(text: str, start: int, query: str, max_lines: int = 3) -> list[str]:
+    words = {w.lower() for w in re.findall(r"\w+", query)}
+    hits = []
+    for offset, line in enumerate(text.split("\n")):
+        if any(w in line.lower() for w in words):
+            hits.append(f"  {start + offset}: {line.strip()[:160]}")
+            if len(hits) == max_lines:
+                break
+    return hits
+
+
+def format_search(index: CodeIndex, commit: str, query: str, limit: int = 10) -> str:
+    """
+    Compact search report: definitions of identifiers in the query, then the
+    best line windows with only their matching lines (use read_file_range for more).
+    """
+    out = []
+    identifiers = [w for w in re.findall(r"[A-Za-z_][\w.]*", query) if len(w) > 2]
+    definitions = []
+    for name in dict.fromkeys(identifiers):
+        definitions += index.find_symbols(commit, name, limit=5)
+    if definitions:
+        out.append("Definitions:")
+        out += [f"  {path}:{line} {kind} {qualname}" for path, qualname, kind, line in definitions[:limit]]
+    hits = index.search(commit, query, limit)
+    if hits:
+        out.append("Matches:")
+        for path, start, text in hits:
+            end = start + text.count("\n")
+            out.append(f"{path}:{start}-{end}")
+            out += _matching_lines(text, start, query)
+    return "\n".join(out) or f"No matches for {query!r}"
+
+
+# --- function_tools ---
+@function_tool
+async def search_code(ctx: RunContextWrapper[Any], query: str, limit: int = 10) -> str:
+    """
+    Searches the target repository (at the issue's base commit) for code matching
+    identifiers or keywords, e.g. "parse_version" or "timezone aware datetime".
+
+    Args:
+        query (str): Identifiers and/or keywords
+        limit (int): Maximum number of matching windows (default 10)
+
+    Returns:
+        str: Definitions and "path:start-end" windows with their matching lines
+    """
+    code = _code_context(ctx)
+    if code is None:
+        return "Code search is not available (no repository/commit for this run)."
+    try:
+        await asyncio.to_thread(code.index.ensure, code.base_commit)
+        return await asyncio.to_thread(format_search, code.index, code.base_commit, query,
+                                       max(1, min(limit, MAX_RESULTS)))
+    except (GitError, OSError, sqlite3.Error) as e:
+        return f"Code search failed: {e}"
+
+
+@function_tool
+async def read_file_range(ctx: RunContextWrapper[Any], path: str, start: int, end: int) -> str:
+    """
+    Reads lines start..end (1-based, inclusive; at most 200) of a file of the
+    target repository at the issue's base commit.
+
+    Args:
+        path (str): Repository-relative path, e.g. "src/pkg/utils.py"
+        start (int): First line
+        end (int): Last line
+
+    Returns:
+        str: Numbered source lines
+    """
+    code = _code_context(ctx)
+    if code is None:
+        return "File reading is not available (no repository/commit for this run)."
+    end = min(end, start + MAX_RANGE_LINES - 1)
+    try:
+        lines = await asyncio.to_thread(code.index.read_range, code.base_commit, path.lstrip("/"), start, end)
+    except GitError:
+        return f"{path} does not exist at {code.base_commit[:12]}"
+    except UnicodeDecodeError:
+        return f"{path} is not a text file"
+    if not lines:
+        return f"{path} has fewer than {start} lines"
+    return "\n".join(f"{n}: {line}" for n, line in enumerate(lines, max(start, 1)))
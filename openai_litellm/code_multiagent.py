@@ -1,8 +1,12 @@
 from dotenv import load_dotenv
-import os, requests
-from bs4 import BeautifulSoup
-from agents import Agent, Runner, set_tracing_disabled, function_tool, ModelSettings
-from agents.extensions.models.litellm_model import LitellmModel
+import os
+from agents import Agent, Runner, set_tracing_disabled, ModelSettings
+
+from llm_cache import cached
+from prompt_layout import layered
+from rate_scheduler import scheduled
+from usage_report import UsageRecorder
+from web_fetch import fetch_url_for
 
 # --- Cargar variables de entorno ---
 load_dotenv()
@@ -11,46 +15,14 @@ set_tracing_disabled(True)   # Desactiva el tracing (útil para debug/logs inter
 API_KEY = os.getenv("AZURE_API_KEY")
 
 
-# --- function_tool : fetch_url -> scrappea una URL usando BS4 ---
-@function_tool
-def fetch_url(url: str) -> str:
-    """
-    Scrapea el contenido de una URL y devuelve solo el texto plano.
-    
-    Args:
-        url (str): URL proporcionada por el usuario
-    
-    Returns:
-        str: Texto plano de la página (máx. 8000 caracteres)
-    """
-    try:
-        print("[Looking for info]")
-        r = requests.get(url, timeout=15)    # Timeout de 15s para evitar colgarse
-        r.raise_for_status()                 # Lanza excepción si status != 200
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        # Elimina etiquetas irrelevantes para lectura
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-
-        # Extrae texto limpio
-        text = soup.get_text(separator=" ", strip=True)
-        return text[:8000]  # Limita a 8k caracteres (para no saturar al modelo)
-    except Exception as e:
-        return f"Error fetching {url}: {e}"
-
-
 # --- Agent : code_agent -> generador de código ---
 code_agent = Agent(
     name="Engineer",
-    instructions=(
+    instructions=layered(
         "You are a coding assistant. If the user asks for code, generate correct and concise examples. "
         "Use best practices for clarity."
     ),
-    model=LitellmModel(
-        model="azure/gpt-4.1",   # Modelo usado (deployment en Azure)
-        api_key=API_KEY,
-    ),
+    model=cached(scheduled("gpt-4.1", api_key=API_KEY)),   # Modelo usado (deployment en Azure)
     model_settings=ModelSettings(include_usage=True),  # Incluye métricas de uso en la salida
 )
 
@@ -58,16 +30,13 @@ code_agent = Agent(
 # --- Agent : doc_explainer -> que explica documentación ---
 doc_explainer = Agent(
     name="Explorer",
-    instructions=(
+    instructions=layered(
         "You are a helpful assistant that explains documentation in simple English. "
         "If the user provides a URL, call fetch_doc to get the content and then summarize or explain it clearly."
         "If the user needs "
     ),
-    model=LitellmModel(
-        model="azure/gpt-4.1",
-        api_key=API_KEY,
-    ),
-    tools=[fetch_url],   # Usa fetch_url para obtener contenido de páginas
+    model=cached(scheduled("gpt-4.1", api_key=API_KEY)),
+    tools=[fetch_url_for("Explorer")],   # Usa fetch_url para obtener contenido de páginas
     model_settings=ModelSettings(
         include_usage=True,
         parallel_tool_calls=True   # Permite llamadas paralelas a herramientas
@@ -79,16 +48,13 @@ doc_explainer = Agent(
 # --- Agent : doc_explainer decide a quién mandar la petición ---
 triage_agent = Agent(
     name="Orchestrator",
-    instructions = (
+    instructions = layered(
         "If the user provides a URL, handoff to the Documentation Explainer. "
         "If the user explicitly asks for code, and also gave a URL, "
         "handoff first to Documentation Explainer, then to Code Generator. "
         "If the user just wants code without URL, handoff to Code Generator directly."
     ),
-    model = LitellmModel(
-        model="azure/gpt-5",
-        api_key=API_KEY,
-    ),
+    model = cached(scheduled("gpt-5", api_key=API_KEY)),
     handoffs = [doc_explainer, code_agent],
     model_settings=ModelSettings(include_usage=True),
 )
@@ -96,12 +62,15 @@ triage_agent = Agent(
 # --- Ejemplo de ejecución ---
 if __name__ == "__main__":
     # Aquí pruebas directamente al doc_explainer
+    usage = UsageRecorder()
     r = Runner.run_sync(
         triage_agent,
         input = [{
             "role": "user",
             "content": 
                 "Como puedo instalar pandas https://pandas.pydata.org/docs/getting_started/install.html"
-        }]
+        }],
+        hooks=usage.hooks("demo"),   # Tiempos, tokens y costo por agente
     )
-    print(r.final_output)
\ No newline at end of file
+    print(r.final_output)
+    print("\n" + usage.format_summary())
\ No newline at end of file
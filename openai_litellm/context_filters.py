@@ -0,0 +1,154 @@
+"""
+Handoff input filters for the issue solver: each agent receives only the stage
+outputs it needs, within a token budget.
+
+By default a handoff carries the whole transcript forward (raw issue, fetched
+pages, tool calls, every earlier agent's output). stage_filter(target) keeps:
+    - the user's issue text ("issue"), truncated head+tail if it alone exceeds half the budget
+    - the final messages of the agents listed in STAGE_INPUTS[target]
+and drops tool calls/results, reasoning items, handoff bookkeeping and other
+agents' chatter. If the kept outputs still exceed the budget, the newest ones
+are kept verbatim and older ones are replaced by a short excerpt summary.
+
+Usage:
+    handoffs=[handoff(solver_agent, input_filter=stage_filter("Engineer"))]
+"""
+import os
+from collections import Counter
+
+from agents.handoffs import HandoffInputData, HandoffInputFilter
+from agents.items import ItemHelpers, MessageOutputItem, RunItem, ToolCallItem, ToolCallOutputItem
+
+from tokens import count_tokens, truncate_tokens
+
+BUDGET_TOKENS = int(os.getenv("HANDOFF_BUDGET_TOKENS", 12000))
+SUMMARY_SHARE = 0.25       # Part of the budget reserved for the summary of older outputs
+EXCERPT_TOKENS = 200       # Per summarized output
+SUMMARY_HEADER = "[Earlier context, summarized]"
+
+# Stage outputs each agent needs; "issue" is the user's original message(s)
+STAGE_INPUTS = {
+    "Analyzer": ("issue",),
+    "Explorer": ("issue", "Analyzer"),
+    "Engineer": ("issue", "Analyzer", "Explorer"),
+    "Validator": ("issue", "Analyzer", "Engineer"),
+}
+
+stats: Counter = Counter()   # handoffs, tokens_before, tokens_after
+
+
+# --- Item text ---
+def _message_text(item: dict) -> str:
+    content = item.get("content", "")
+    if isinstance(content, str):
+        return content
+    return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+
+
+def _run_item_text(item: RunItem) -> str:
+    if isinstance(item, MessageOutputItem):
+        return ItemHelpers.text_message_output(item)
+    if isinstance(item, ToolCallOutputItem):
+        return str(item.output)
+    if isinstance(item, ToolCallItem):
+        return str(getattr(item.raw_item, "arguments", ""))
+    return ""
+
+
+def _is_user_message(item: dict) -> bool:
+    return (item.get("role") == "user" and item.get("type", "message") == "message"
+            and not _message_text(item).startswith(SUMMARY_HEADER))
+
+
+def _history_tokens(data: HandoffInputData) -> int:
+    history = data.input_history
+    total = count_tokens(history) if isinstance(history, str) else sum(
+        count_tokens(_message_text(i) or str(i.get("output", i.get("arguments", "")))) for i in history)
+    return total + sum(count_tokens(_run_item_text(i)) for i in data.pre_handoff_items + data.new_items)
+
+
+def _truncated(item: MessageOutputItem, max_tokens: int) -> MessageOutputItem:
+    raw = item.raw_item
+    text = truncate_tokens(ItemHelpers.text_message_output(item), max_tokens)
+    part = raw.content[0].model_copy(update={"text": text})
+    return MessageOutputItem(agent=item.agent, raw_item=raw.model_copy(update={"content": [part]}))
+
+
+# --- Filter ---
+def stage_filter(target: str, keep: tuple[str, ...] | None = None,
+                 budget: int = BUDGET_TOKENS) -> HandoffInputFilter:
+    """
+    Builds the input filter for a handoff to `target`.
+
+    Args:
+        target (str): Name of the agent receiving the handoff
+        keep (tuple): Stage names to forward (default: STAGE_INPUTS[target])
+        budget (int): Max tokens of forwarded context
+
+    Returns:
+        HandoffInputFilter: For handoff(agent, input_filter=...)
+    """
+    keep = set(keep if keep is not None else STAGE_INPUTS[target])
+
+    def _filter(data: HandoffInputData) -> HandoffInputData:
+        history = data.input_history
+        if isinstance(history, str):
+            history = ({"role": "user", "content": history},)
+
+        # 1) The issue itself (at most half of the budget)
+        issue = [dict(i) for i in history if _is_user_message(i)] if "issue" in keep else []
+        issue_tokens = sum(count_tokens(_message_text(i)) for i in issue)
+        if issue_tokens > budget // 2:
+            share = (budget // 2) // len(issue)
+            for i in issue:
+                i["content"] = truncate_tokens(_message_text(i), share)
+            issue_tokens = sum(count_tokens(_message_text(i)) for i in issue)
+
+        # 2) Final messages of the needed stages, newest first until the budget runs out
+        outputs = [i for i in data.pre_handoff_items + data.new_items
+                   if isinstance(i, MessageOutputItem) and i.agent.name in keep
+                   and ItemHelpers.text_message_output(i).strip()]
+        sizes = [count_tokens(ItemHelpers.text_message_output(i)) for i in outputs]
+        available = budget - issue_tokens
+        kept, older = outputs, []
+        if sum(sizes) > available:
+            available -= int(budget * SUMMARY_SHARE)
+            kept = []
+            for index in range(len(outputs) - 1, -1, -1):
+                if sizes[index] <= available:
+                    kept.insert(0, outputs[index])
+                    available -= sizes[index]
+                elif not kept:
+                    # The latest output is what the next agent needs most: keep it, truncated
+                    kept.insert(0, _truncated(outputs[index], max(available, EXCERPT_TOKENS)))
+                    available = 0
+                else:
+                    older = outputs[:index + 1]
+                    break
+
+        # 3) Excerpts of the older outputs that did not fit
+        summary = []
+        if older:
+            per_item = max(1, min(EXCERPT_TOKENS, int(budget * SUMMARY_SHARE) // len(older)))
+            lines = [f"- {i.agent.name}: {truncate_tokens(ItemHelpers.text_message_output(i), per_item)}"
+                     for i in older]
+            summary = [{"role": "user", "content": SUMMARY_HEADER + "\n" + "\n".join(lines)}]
+
+        filtered = data.clone(
+            input_history=tuple(issue + summary),
+            pre_handoff_items=tuple(kept),
+            new_items=(),
+        )
+        stats["handoffs"] += 1
+        stats["tokens_before"] += _history_tokens(data)
+        stats["tokens_after"] += _history_tokens(filtered)
+        return filtered
+
+    return _filter
+
+
+def format_stats() -> str:
+    before, after = stats["tokens_before"], stats["tokens_after"]
+    saved = 1 - after / before if before else 0.0
+    return (f"Handoff context: {stats['handoffs']} handoffs, {before} -> {after} tokens "
+            f"forwarded ({saved:.0%} less)")
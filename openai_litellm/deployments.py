@@ -0,0 +1,83 @@
+import json
+import os
+
+# --- Azure deployments (alias -> deployment name) ---
+models = {
+    "gpt-4o-mini": "Innovation-gpt4o-mini",
+    "gpt-4o": "Innovation-gpt4o",
+    "gpt-4.1": "gpt-4.1",
+    "gpt-4.1-mini": "gpt-4.1-mini",
+    "gpt-4.1-nano": "gpt-4.1-nano",
+    "gpt-o1": "o1",
+    "gpt-o3": "o3-mini",
+    "gpt-o4-mini": "o4-mini",
+    "gpt-5": "gpt-5"
+}
+
+# --- Provisioned quota per alias: (requests per minute, tokens per minute) ---
+# Override with env DEPLOYMENT_QUOTAS, a JSON object or a path to one:
+#   DEPLOYMENT_QUOTAS='{"gpt-5": [250, 250000]}'
+DEFAULT_QUOTA = (300, 300_000)
+QUOTAS = {
+    "gpt-4o-mini": (1_000, 1_000_000),
+    "gpt-4o": (300, 300_000),
+    "gpt-4.1": (300, 300_000),
+    "gpt-4.1-mini": (1_000, 1_000_000),
+    "gpt-4.1-nano": (1_000, 1_000_000),
+    "gpt-o1": (100, 100_000),
+    "gpt-o3": (300, 300_000),
+    "gpt-o4-mini": (300, 300_000),
+    "gpt-5": (250, 250_000),
+}
+
+# --- Interchangeable aliases, used to spill over when a deployment is throttled ---
+EQUIVALENTS = {
+    "gpt-4o": ["gpt-4.1"],
+    "gpt-4.1": ["gpt-4o"],
+    "gpt-4o-mini": ["gpt-4.1-mini"],
+    "gpt-4.1-mini": ["gpt-4o-mini"],
+    "gpt-o3": ["gpt-o4-mini"],
+    "gpt-o4-mini": ["gpt-o3"],
+}
+
+
+def _load_overrides() -> None:
+    raw = os.getenv("DEPLOYMENT_QUOTAS")
+    if not raw:
+        return
+    if not raw.lstrip().startswith("{"):
+        with open(raw, encoding="utf-8") as f:
+            raw = f.read()
+    for alias, (rpm, tpm) in json.loads(raw).items():
+        QUOTAS[alias] = (int(rpm), int(tpm))
+
+
+_load_overrides()
+
+
+def deployment(alias: str) -> str:
+    """
+    Deployment name for an alias ("gpt-4o" -> "Innovation-gpt4o"); unknown names pass through.
+    """
+    return models.get(alias, alias)
+
+
+def alias_of(name: str) -> str:
+    for alias, dep in models.items():
+        if dep == name:
+            return alias
+    return name
+
+
+def quota(name: str) -> tuple[int, int]:
+    """
+    (rpm, tpm) for an alias or deployment name.
+    """
+    return QUOTAS.get(name) or QUOTAS.get(alias_of(name), DEFAULT_QUOTA)
+
+
+def equivalents(alias: str) -> list[str]:
+    """
+    Deployment names that can serve the same requests as `alias`.
+    """
+    return [deployment(a) for a in EQUIVALENTS.get(alias, [])]
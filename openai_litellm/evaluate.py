@@ -0,0 +1,435 @@
+"""
+Evaluates predicted patches against the SWE-bench tests of each instance.
+
+For every prediction: lease a checkout of the repo at base_commit (WorktreePool),
+apply the model patch and the instance's test_patch, run the FAIL_TO_PASS and
+PASS_TO_PASS tests and grade the instance as SWE-bench does: resolved when every
+FAIL_TO_PASS test passes and no PASS_TO_PASS test breaks.
+
+Tests of an instance run in one test process (pytest, Django's runtests.py or
+sympy's bin/test, with the worktree first on PYTHONPATH so the patched code is
+what gets imported) with a budget of timeout seconds per test; if that process
+hits the budget, the tests without a result are re-run one per process, each
+with its own timeout, so a single hanging test only costs itself. The whole
+instance never runs longer than instance_timeout. Instances are evaluated in
+parallel (default: one per core); the work happens in the test subprocesses, so
+threads are enough to keep every core busy and they share one WorktreePool.
+
+Results are cached by (instance_id, sha256 of the patch, EVAL_PYTHON):
+re-evaluating an unchanged prediction is free. Only conclusive results are
+kept: errors and runs with a TIMEOUT or MISSING test are evaluated again.
+
+The tests run with EVAL_PYTHON (default: this interpreter), which must have the
+target repo's dependencies installed; unlike the official harness there is no
+per-instance Docker environment.
+
+Usage:
+    python openai_litellm/evaluate.py --predictions predictions.jsonl \\
+        --dataset swe_bench_lite_test.jsonl [--workers 8] [--timeout 120] [--instance-timeout 1800]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from page_cache import CACHE_ROOT
+from swe_store import InstanceStore
+from worktree_pool import GitError, WorktreePool, default_pool
+
+EVAL_PYTHON = os.getenv("EVAL_PYTHON", sys.executable)
+TEST_TIMEOUT = 120.0         # Seconds per test
+INSTANCE_TIMEOUT = float(os.getenv("EVAL_INSTANCE_TIMEOUT", "1800"))   # Seconds of tests per instance, at most
+APPLY_TIMEOUT = 120
+LOG_TAIL = 4000              # Characters of test output kept in the result
+PASSING = {"PASSED", "XFAIL"}
+INCONCLUSIVE = {"TIMEOUT", "MISSING"}   # Outcomes that may depend on the machine, not the patch
+
+
+@dataclass
+class EvalResult:
+    instance_id: str
+    patch_sha: str
+    status: str                                   # resolved | unresolved | empty_patch | patch_failed | error
+    fail_to_pass: dict[str, str] = field(default_factory=dict)   # test -> PASSED | FAILED | ERROR | TIMEOUT | MISSING
+    pass_to_pass: dict[str, str] = field(default_factory=dict)
+    duration_s: float = 0.0
+    log: str = ""
+    cached: bool = False
+
+    @property
+    def resolved(self) -> bool:
+        return self.status == "resolved"
+
+
+def patch_sha(patch: str) -> str:
+    return hashlib.sha256(patch.encode("utf-8")).hexdigest()
+
+
+def _test_list(value) -> list[str]:
+    # The datasets export keeps FAIL_TO_PASS / PASS_TO_PASS as JSON strings
+    return json.loads(value) if isinstance(value, str) else list(value or [])
+
+
+# --- Result cache ---
+class EvalCache:
+    """
+    One JSON file per (instance_id, patch sha, interpreter):
+    root/<instance_id>/<sha>-<interpreter hash>.json.
+    """
+
+    def __init__(self, root: Path = CACHE_ROOT / "eval", python: str = EVAL_PYTHON):
+        self.root = Path(root)
+        self.env = hashlib.sha256(python.encode("utf-8")).hexdigest()[:12]
+
+    def _path(self, instance_id: str, sha: str) -> Path:
+        return self.root / instance_id / f"{sha}-{self.env}.json"
+
+    @staticmethod
+    def cacheable(result: EvalResult) -> bool:
+        if result.status == "error":
+            return False
+        outcomes = [*result.fail_to_pass.values(), *result.pass_to_pass.values()]
+        return not INCONCLUSIVE.intersection(outcomes)
+
+    def get(self, instance_id: str, sha: str) -> EvalResult | None:
+        try:
+            data = json.loads(self._path(instance_id, sha).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return EvalResult(**{**data, "cached": True})
+
+    def put(self, result: EvalResult) -> None:
+        path = self._path(result.instance_id, result.patch_sha)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(result), ensure_ascii=False))
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+
+# --- Test runners ---
+_PYTEST_LINE = re.compile(r"^(PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS) (.+?)(?: - .*)?$")
+_PYTEST_VERBOSE = re.compile(r"^(.+?) (PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)(?:\s+\[\s*\d+%\])?$")
+_DJANGO_LINE = re.compile(r"^(\w+) \(([\w.]+)\)(?:\n.*)?\s\.\.\.\s(ok|FAIL|ERROR|skipped.*|expected failure)\s*$",
+                          re.MULTILINE)
+_DJANGO_STATUS = {"ok": "PASSED", "FAIL": "FAILED", "ERROR": "ERROR", "expected failure": "XFAIL"}
+_SYMPY_LINE = re.compile(r"^(test_\w+) (ok|F|E|f|X|T|s|w)\b", re.MULTILINE)
+_SYMPY_STATUS = {"ok": "PASSED", "F": "FAILED", "E": "ERROR", "f": "XFAIL", "X": "XPASS", "T": "TIMEOUT"}
+_DIFF_FILE = re.compile(r"^diff --git a/(\S+) b/", re.MULTILINE)
+
+
+class PytestRunner:
+    """
+    SWE-bench test ids are pytest node ids ("tests/test_x.py::TestA::test_b[1]").
+    Verbose lines give the results of a run cut short by a timeout; the -rA
+    summary, printed at the end, has the final word.
+    """
+
+    def command(self, tests: list[str], files: list[str]) -> list[str]:
+        return [EVAL_PYTHON, "-m", "pytest", "-v", "-rA", "--tb=no", "-p", "no:cacheprovider", *tests]
+
+    def parse(self, output: str) -> dict[str, str]:
+        results = {}
+        for line in output.splitlines():
+            line = line.strip()
+            if m := _PYTEST_LINE.match(line):
+                results[m.group(2)] = m.group(1)
+            elif m := _PYTEST_VERBOSE.match(line):
+                results[m.group(1)] = m.group(2)
+        return results
+
+
+class DjangoRunner:
+    """
+    Django ids are "test_name (module.Class)"; runtests.py takes "module.Class.test_name".
+    """
+
+    def command(self, tests: list[str], files: list[str]) -> list[str]:
+        labels = []
+        for test in tests:
+            m = re.match(r"^(\w+) \(([\w.]+)\)", test)
+            labels.append(f"{m.group(2)}.{m.group(1)}" if m else test)
+        return [EVAL_PYTHON, "tests/runtests.py", "--verbosity", "2", "--parallel", "1", *labels]
+
+    def parse(self, output: str) -> dict[str, str]:
+        results = {}
+        for name, cls, status in _DJANGO_LINE.findall(output):
+            results[f"{name} ({cls})"] = _DJANGO_STATUS.get(status, "SKIPPED")
+        return results
+
+
+class SympyRunner:
+    """
+    Sympy ids are bare function names ("test_issue_1234") for bin/test, which
+    runs the test files touched by the test_patch; a single test is picked with -k.
+    """
+
+    def command(self, tests: list[str], files: list[str]) -> list[str]:
+        command = [EVAL_PYTHON, "bin/test", "-C", "--verbose", *files]
+        return command + ["-k", tests[0]] if len(tests) == 1 else command
+
+    def parse(self, output: str) -> dict[str, str]:
+        return {name: _SYMPY_STATUS.get(status, "SKIPPED") for name, status in _SYMPY_LINE.findall(output)}
+
+
+RUNNERS = {"django/django": DjangoRunner(), "sympy/sympy": SympyRunner()}
+
+
+def runner_for(repo: str):
+    return RUNNERS.get(repo, PytestRunner())
+
+
+def import_root(tree: Path) -> Path:
+    """
+    Directory holding the tree's packages: src/ or lib/ layouts, else the tree itself.
+    """
+    for name in ("src", "lib"):
+        layout = tree / name
+        if layout.is_dir() and any(p.is_dir() and (p / "__init__.py").exists() for p in layout.iterdir()):
+            return layout
+    return tree
+
+
+def _run(command: list[str], cwd: Path, timeout: float) -> tuple[str, bool]:
+    """
+    Runs a test command in a tree; returns (combined output, timed_out).
+    """
+    # The patched tree must shadow any installed copy (runtests.py puts tests/ first on sys.path)
+    pythonpath = os.pathsep.join(filter(None, [str(import_root(cwd)), os.environ.get("PYTHONPATH")]))
+    try:
+        # Unbuffered, so the output up to a timeout is not lost
+        r = subprocess.run(command, cwd=cwd, capture_output=True, text=True, errors="replace", timeout=timeout,
+                           env={**os.environ, "PYTHONUNBUFFERED": "1", "PYTHONPATH": pythonpath})
+        return r.stdout + r.stderr, False
+    except subprocess.TimeoutExpired as e:
+        out = (e.stdout or b"") + (e.stderr or b"")
+        return out.decode("utf-8", errors="replace") if isinstance(out, bytes) else out, True
+
+
+def run_tests(repo: str, tree: Path, tests: list[str], timeout: float = TEST_TIMEOUT,
+              files: list[str] | None = None,
+              instance_timeout: float = INSTANCE_TIMEOUT) -> tuple[dict[str, str], str]:
+    """
+    Runs tests in one process (budget: timeout per test, at most instance_timeout
+    in total); tests left without a result by a timeout are re-run one per
+    process while the instance budget lasts.
+
+    Args:
+        files (list[str] | None): Test files of the instance (from its test_patch)
+
+    Returns:
+        tuple[dict, str]: (test -> status, output log)
+    """
+    runner = runner_for(repo)
+    files = files or []
+    deadline = time.monotonic() + instance_timeout
+    output, timed_out = _run(runner.command(tests, files), tree, min(timeout * len(tests), instance_timeout))
+    results = {t: s for t, s in runner.parse(output).items() if t in tests}
+    log = output
+    if timed_out:
+        for test in (t for t in tests if t not in results):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                results[test] = "TIMEOUT"   # Instance budget spent
+                continue
+            single, single_timeout = _run(runner.command([test], files), tree, min(timeout, remaining))
+            log += single
+            results[test] = "TIMEOUT" if single_timeout else runner.parse(single).get(test, "MISSING")
+    return {t: results.get(t, "MISSING") for t in tests}, log
+
+
+# --- Evaluation ---
+def _apply(tree: Path, patch: str) -> tuple[bool, str]:
+    """
+    git apply, then a fuzzier `patch` as fallback (as the SWE-bench harness does).
+    """
+    errors = ""
+    for command in (["git", "apply", "--whitespace=nowarn", "-"],
+                    ["patch", "--batch", "--fuzz=5", "-p1", "--forward"]):
+        try:
+            r = subprocess.run(command, cwd=tree, input=patch, capture_output=True, text=True,
+                               timeout=APPLY_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            errors += f"{command[0]}: {e}\n"
+            continue
+        if r.returncode == 0:
+            return True, ""
+        errors += f"{command[0]}: {(r.stderr or r.stdout).strip()}\n"
+        subprocess.run(["git", "checkout", "--", "."], cwd=tree, capture_output=True)
+    return False, errors
+
+
+def evaluate_instance(instance: dict, patch: str, timeout: float = TEST_TIMEOUT,
+                      pool: WorktreePool | None = None, cache: EvalCache | None = None,
+                      instance_timeout: float = INSTANCE_TIMEOUT) -> EvalResult:
+    """
+    Applies patch + test_patch at base_commit and grades the instance.
+
+    Args:
+        instance (dict): SWE-bench instance (repo, base_commit, test_patch, FAIL_TO_PASS, PASS_TO_PASS)
+        patch (str): Predicted diff
+        timeout (float): Seconds per test
+        pool (WorktreePool | None): Checkout pool (defaults to the process-wide one)
+        cache (EvalCache | None): Result cache (None = no caching; inconclusive results are never stored)
+        instance_timeout (float): Seconds of tests for the whole instance
+
+    Returns:
+        EvalResult: Status and per-test outcomes
+    """
+    sha = patch_sha(patch)
+    if cache and (hit := cache.get(instance["instance_id"], sha)):
+        return hit
+    result = EvalResult(instance_id=instance["instance_id"], patch_sha=sha, status="error")
+    start = time.perf_counter()
+    fail_to_pass = _test_list(instance.get("FAIL_TO_PASS"))
+    pass_to_pass = _test_list(instance.get("PASS_TO_PASS"))
+
+    if not patch.strip():
+        result.status = "empty_patch"
+    elif not fail_to_pass + pass_to_pass:
+        result.log = "instance has no FAIL_TO_PASS / PASS_TO_PASS tests"
+    else:
+        try:
+            with (pool or default_pool()).lease(instance["repo"], instance["base_commit"]) as tree:
+                applied, errors = _apply(tree, patch)
+                if not applied:
+                    result.status, result.log = "patch_failed", errors
+                elif instance.get("test_patch") and not _apply(tree, instance["test_patch"])[0]:
+                    result.log = "test_patch does not apply"
+                else:
+                    files = _DIFF_FILE.findall(instance.get("test_patch") or "")
+                    outcomes, log = run_tests(instance["repo"], tree, fail_to_pass + pass_to_pass, timeout,
+                                              files, instance_timeout)
+                    result.fail_to_pass = {t: outcomes[t] for t in fail_to_pass}
+                    result.pass_to_pass = {t: outcomes[t] for t in pass_to_pass}
+                    result.log = log[-LOG_TAIL:]
+                    if all(s == "MISSING" for s in outcomes.values()):
+                        # Nothing collected: the runner does not fit this repo, not a verdict on the patch
+                        result.status = "error"
+                    elif all(s in PASSING for s in outcomes.values()):
+                        result.status = "resolved"
+                    else:
+                        result.status = "unresolved"
+        except (GitError, OSError, subprocess.SubprocessError) as e:
+            result.log = f"{type(e).__name__}: {e}"   # Infrastructure error: not cached
+
+    result.duration_s = round(time.perf_counter() - start, 2)
+    if cache and cache.cacheable(result):
+        cache.put(result)
+    return result
+
+
+def evaluate_predictions(
+    predictions: list[dict],
+    instances: dict[str, dict],
+    output_path: str | None = None,
+    workers: int | None = None,
+    timeout: float = TEST_TIMEOUT,
+    use_cache: bool = True,
+    instance_timeout: float = INSTANCE_TIMEOUT,
+) -> list[EvalResult]:
+    """
+    Evaluates many predictions in parallel.
+
+    Args:
+        predictions (list[dict]): Records with instance_id and model_patch (batch_solver output)
+        instances (dict): instance_id -> SWE-bench instance
+        output_path (str | None): JSONL receiving one EvalResult per line as they finish
+        workers (int | None): Instances evaluated at once (default: cores, capped by the worktree pool)
+        timeout (float): Seconds per test
+        use_cache (bool): Reuse results of unchanged (instance_id, patch) pairs
+        instance_timeout (float): Seconds of tests per instance, at most
+
+    Returns:
+        list[EvalResult]: In completion order
+    """
+    pool = default_pool()
+    workers = min(workers or os.cpu_count() or 1, pool.max_trees)
+    cache = EvalCache() if use_cache else None
+    todo = [p for p in predictions if p["instance_id"] in instances]
+    results = []
+    out = open(output_path, "w", encoding="utf-8") if output_path else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(evaluate_instance, instances[p["instance_id"]], p.get("model_patch") or "",
+                                timeout, pool, cache, instance_timeout): p["instance_id"]
+                for p in todo
+            }
+            for n, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                if out:
+                    out.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+                    out.flush()
+                print(f"[eval] {n}/{len(todo)} {result.instance_id} {result.status}"
+                      f"{' (cached)' if result.cached else f' ({result.duration_s}s)'}")
+    finally:
+        if out:
+            out.close()
+    return results
+
+
+def format_summary(results: list[EvalResult]) -> str:
+    counts = {}
+    for r in results:
+        counts[r.status] = counts.get(r.status, 0) + 1
+    resolved = counts.get("resolved", 0)
+    cached = sum(r.cached for r in results)
+    rate = resolved / len(results) if results else 0.0
+    return (f"Resolved {resolved}/{len(results)} ({rate:.1%}); {cached} from cache; "
+            + ", ".join(f"{k}={v}" for k, v in sorted(counts.items())))
+
+
+def load_predictions(path: str) -> list[dict]:
+    """
+    Last record per instance wins (batch_solver appends retries).
+    """
+    latest = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                latest[record["instance_id"]] = record
+    return list(latest.values())
+
+
+# --- Example execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate predicted patches with the SWE-bench tests")
+    parser.add_argument("--predictions", default="predictions.jsonl")
+    parser.add_argument("--dataset", default="swe_bench_lite_test.jsonl", help="JSONL store exported by data_sets.py")
+    parser.add_argument("--output", default=None, help="Results JSONL (default: <predictions>.eval.jsonl)")
+    parser.add_argument("--workers", type=int, default=None, help="Instances in parallel (default: cores)")
+    parser.add_argument("--timeout", type=float, default=TEST_TIMEOUT, help="Seconds per test")
+    parser.add_argument("--instance-timeout", type=float, default=INSTANCE_TIMEOUT,
+                        help="Seconds of tests per instance, at most")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run even unchanged predictions")
+    args = parser.parse_args()
+
+    predictions = load_predictions(args.predictions)
+    with InstanceStore(args.dataset) as store:
+        instances = {i["instance_id"]: i for i in store.iter(ids=[p["instance_id"] for p in predictions])}
+    results = evaluate_predictions(
+        predictions, instances,
+        output_path=args.output or f"{os.path.splitext(args.predictions)[0]}.eval.jsonl",
+        workers=args.workers, timeout=args.timeout, use_cache=not args.no_cache,
+        instance_timeout=args.instance_timeout,
+    )
+    print("\n" + format_summary(results))
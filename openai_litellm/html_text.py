@@ -0,0 +1,168 @@
+from html.parser import HTMLParser
+
+try:
+    from lxml import etree   # Optional: libxml2 tokenizer, several times faster than html.parser
+except ImportError:
+    etree = None
+
+SKIP_TAGS = {"script", "style", "noscript"}
+BACKEND = "lxml" if etree is not None else "html.parser"
+_SYNTAX_ERRORS = (etree.XMLSyntaxError,) if etree is not None else ()
+
+
+class BudgetFilled(Exception):
+    """Raised from parser callbacks to stop tokenizing once enough text was collected."""
+
+
+class _TextCollector:
+    """
+    Parser target shared by both backends.
+
+    Mirrors BeautifulSoup's get_text(separator=" ", strip=True) after removing
+    script/style/noscript: every run of text between two tags is stripped and
+    the non-empty runs are joined with a single space.
+    """
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self.parts: list[str] = []
+        self.length = 0
+        self.skip_depth = 0
+        self.pending: list[str] = []
+
+    def _flush(self) -> None:
+        if not self.pending:
+            return
+        text = "".join(self.pending).strip()
+        self.pending = []
+        if not text:
+            return
+        self.length += len(text) + (1 if self.parts else 0)
+        self.parts.append(text)
+        if self.length >= self.max_chars:
+            raise BudgetFilled
+
+    # --- Target interface (lxml names; html.parser handlers delegate here) ---
+    def start(self, tag, attrib=None):
+        self._flush()
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+
+    def end(self, tag):
+        self._flush()
+        if tag in SKIP_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+
+    def data(self, data):
+        if not self.skip_depth:
+            self.pending.append(data)
+
+    def comment(self, text):
+        self._flush()
+
+    def close(self):
+        self._flush()
+        return self.text()
+
+    def text(self) -> str:
+        return " ".join(self.parts)[:self.max_chars]
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, target: _TextCollector):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+    def handle_comment(self, data):
+        self.target.comment(data)
+
+    def handle_decl(self, decl):
+        self.target.comment(decl)
+
+    def handle_pi(self, data):
+        self.target.comment(data)
+
+    def unknown_decl(self, data):
+        # <![CDATA[...]]>: its content is a separate text run, as in bs4
+        self.target.comment(data)
+        if data.startswith("CDATA["):
+            self.target.data(data[len("CDATA["):])
+            self.target.comment(data)
+
+
+class TextExtractor:
+    """
+    Incremental HTML -> plain text extractor with a character budget.
+
+    Feed the document in chunks (e.g. straight from the HTTP stream); feed()
+    returns True once the budget is filled so the caller can stop reading.
+    libxml2 drops CDATA sections in HTML, so only html.parser keeps their text.
+
+    Args:
+        max_chars (int): Maximum number of characters to collect
+        backend (str): "lxml" or "html.parser" (defaults to the fastest installed)
+    """
+
+    def __init__(self, max_chars: int, backend: str = BACKEND):
+        self.collector = _TextCollector(max_chars)
+        self.backend = backend
+        self.done = False
+        if backend == "lxml":
+            if etree is None:
+                raise ImportError("lxml is not installed")
+            self.parser = etree.HTMLParser(target=self.collector, recover=True)
+        else:
+            self.parser = _StdlibParser(self.collector)
+
+    def feed(self, chunk: str) -> bool:
+        if self.done:
+            return True
+        try:
+            self.parser.feed(chunk)
+        except BudgetFilled:
+            self.done = True
+        except _SYNTAX_ERRORS:
+            pass   # lxml reports unrecoverable markup; keep the text collected so far
+        return self.done
+
+    def close(self) -> str:
+        if not self.done:
+            try:
+                self.parser.close()
+                self.collector._flush()   # Text after the last tag (lxml already flushed it in close())
+            except BudgetFilled:
+                pass
+            except _SYNTAX_ERRORS:
+                pass
+            self.done = True
+        return self.collector.text()
+
+
+def extract_text(html: str, max_chars: int, backend: str = BACKEND, chunk_size: int = 16384) -> str:
+    """
+    Extracts readable text from an HTML document, stopping as soon as
+    max_chars characters have been collected.
+
+    Args:
+        html (str): HTML document
+        max_chars (int): Maximum number of characters returned
+        backend (str): Parser backend ("lxml" or "html.parser")
+        chunk_size (int): Characters handed to the tokenizer per step
+
+    Returns:
+        str: Plain text (at most max_chars characters)
+    """
+    extractor = TextExtractor(max_chars, backend)
+    for i in range(0, len(html), chunk_size):
+        if extractor.feed(html[i:i + chunk_size]):
+            break
+    return extractor.close()
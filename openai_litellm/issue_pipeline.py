@@ -0,0 +1,329 @@
+import asyncio
+import json
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Literal
+
+from pydantic import BaseModel
+from agents import ModelSettings, Runner
+from openai.types.responses import ResponseTextDeltaEvent
+
+from issue_solver_agent import (
+    API_KEY,
+    analyzer_agent,
+    researcher_agent,
+    solver_agent,
+    validator_agent,
+    normalize_text_to_one_line,
+)
+from llm_cache import cached
+from patch_check import CheckResult, StreamingPatchCheck, check_patch
+from prompt_layout import static_text
+from rate_scheduler import scheduled
+from usage_report import UsageHooks
+
+
+# --- Structured stage outputs ---
+class IssueAnalysis(BaseModel):
+    type: Literal["bug", "feature", "regression", "doc"]
+    affected_paths: list[str]
+    severity: Literal["low", "med", "high", "critical"]
+    technologies: list[str]
+    symptoms: str
+    reproduction_steps: list[str]
+    open_questions: list[str]
+
+
+class ValidationReport(BaseModel):
+    applies_cleanly: bool
+    matches_issue: bool
+    risks: list[str]
+    gaps: list[str]
+    test_plan: list[str]
+    verdict: Literal["approve", "revise"]
+
+
+# --- Stage agents: same prompts/models, no handoffs ---
+_HANDOFF_LINE = re.compile(r"^.*(transfer back|return control|^\s*Handoff:).*$\n?", re.MULTILINE | re.IGNORECASE)
+_PIPELINE_NOTE = "\nReturn your result directly; the pipeline passes it to the next stage.\n"
+
+
+def _stage(agent, **overrides):
+    """
+    Clones an issue solver agent for pipeline mode: drops the handoff
+    instructions (code decides what runs next) and removes its handoffs.
+    """
+    instructions = agent.instructions.replace(_HANDOFF_LINE.sub("", static_text(agent)) + _PIPELINE_NOTE)
+    return agent.clone(instructions=instructions, handoffs=[], **overrides)
+
+
+analyzer_stage = _stage(analyzer_agent, output_type=IssueAnalysis)
+explorer_stage = _stage(researcher_agent)
+engineer_stage = _stage(solver_agent)
+validator_stage = _stage(validator_agent, output_type=ValidationReport)
+
+
+# --- Speculative Engineer candidates: (model alias, temperature) per candidate slot ---
+# gpt-5 is a reasoning model (no temperature), so diversity comes from the other deployments
+CANDIDATE_VARIANTS = [
+    ("gpt-5", None),
+    ("gpt-4.1", 0.2),
+    ("gpt-4.1", 0.8),
+    ("gpt-4o", 0.5),
+]
+
+
+def engineer_variant(index: int):
+    """
+    Engineer stage for candidate slot `index`: slot 0 is the regular Engineer, the
+    others cycle through CANDIDATE_VARIANTS[1:].
+    """
+    if index == 0:
+        return engineer_stage
+    alias, temperature = CANDIDATE_VARIANTS[1 + (index - 1) % (len(CANDIDATE_VARIANTS) - 1)]
+    return engineer_stage.clone(
+        model=cached(scheduled(alias, api_key=API_KEY)),
+        model_settings=ModelSettings(include_usage=True, temperature=temperature),
+    )
+
+
+@dataclass
+class Candidate:
+    index: int
+    model: str
+    diff: str = ""
+    check: CheckResult | None = None
+    aborted: bool = False         # Cancelled mid-generation by the streaming format check
+    elapsed_s: float = 0.0
+    run: object = None            # RunResultStreaming (None if aborted)
+
+
+@dataclass
+class PipelineResult:
+    diff: str
+    analysis: IssueAnalysis
+    research: str | None = None
+    validation: ValidationReport | None = None
+    check: CheckResult | None = None
+    revisions: int = 0
+    runs: list = field(default_factory=list)   # RunResult of every stage call, in order
+    candidates: list = field(default_factory=list)   # Every speculative Candidate, all rounds
+
+    @property
+    def final_output(self) -> str:
+        return self.diff
+
+
+def _section(title: str, body: str) -> str:
+    return f"## {title}\n{body.strip()}\n"
+
+
+def needs_research(analysis: IssueAnalysis) -> bool:
+    """
+    Same rule the Orchestrator follows: explore for bugs/regressions or when
+    the analysis left open questions.
+    """
+    return analysis.type in ("bug", "regression") or bool(analysis.open_questions)
+
+
+# --- Speculative candidates ---
+def _candidate_hooks(run_kwargs: dict, index: int) -> dict:
+    """
+    UsageHooks time calls per agent name, so concurrent candidates (all named
+    "Engineer") each need their own hooks; they report to the same recorder.
+    """
+    hooks = run_kwargs.get("hooks")
+    if isinstance(hooks, UsageHooks):
+        return {**run_kwargs, "hooks": UsageHooks(hooks.recorder, f"{hooks.run_id}#c{index}")}
+    return run_kwargs
+
+
+async def generate_candidate(index: int, engineer_input: str, repo: str | None = None,
+                             base_commit: str | None = None, **run_kwargs) -> Candidate:
+    """
+    Streams one Engineer candidate, aborting at the first format violation, and
+    runs the local gate (patch_check) on it once complete.
+    """
+    agent = engineer_variant(index)
+    candidate = Candidate(index=index, model=str(getattr(agent.model, "model", agent.model)))
+    start = time.perf_counter()
+    run = Runner.run_streamed(agent, engineer_input, **_candidate_hooks(run_kwargs, index))
+    stream_check = StreamingPatchCheck()
+    try:
+        async for event in run.stream_events():
+            if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                if error := stream_check.feed(event.data.delta):
+                    run.cancel()
+                    candidate.diff, candidate.aborted = stream_check.text, True
+                    candidate.check = CheckResult(ok=False, errors=[error])
+                    return candidate
+    except asyncio.CancelledError:
+        run.cancel()   # Another candidate won: stop this generation too
+        raise
+    finally:
+        candidate.elapsed_s = time.perf_counter() - start
+    candidate.run = run
+    candidate.diff = str(run.final_output)
+    candidate.check = await asyncio.to_thread(check_patch, candidate.diff, repo, base_commit)
+    return candidate
+
+
+def rank_key(candidate: Candidate) -> tuple:
+    """
+    Best first: passes the checks, applies at base_commit, fewest errors, then
+    the smallest diff (least collateral change), then the earliest slot.
+    """
+    check = candidate.check
+    return (not check.ok, check.applied is not True, len(check.errors), len(candidate.diff), candidate.index)
+
+
+async def speculate(
+    engineer_input: str,
+    n: int,
+    select: Literal["first", "rank"] = "first",
+    repo: str | None = None,
+    base_commit: str | None = None,
+    **run_kwargs,
+) -> tuple[Candidate, list[Candidate]]:
+    """
+    Requests n Engineer candidates concurrently (see CANDIDATE_VARIANTS).
+
+    With select="first" the first candidate that passes the local gate wins and
+    the others are cancelled; with select="rank" all of them complete and the
+    best by rank_key wins. If none passes, the best-ranked failure is returned so
+    its errors can be fed back to the Engineer.
+
+    Returns:
+        tuple[Candidate, list[Candidate]]: (selected, every candidate that finished)
+    """
+    tasks = [asyncio.create_task(generate_candidate(i, engineer_input, repo, base_commit, **run_kwargs))
+             for i in range(n)]
+    finished: list[Candidate] = []
+    error: Exception | None = None
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                candidate = await next_done
+            except Exception as e:
+                error = e   # One failed candidate (API error, ...) does not sink the round
+                continue
+            finished.append(candidate)
+            if select == "first" and candidate.check.ok:
+                return candidate, finished
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    if not finished:
+        raise error
+    return min(finished, key=rank_key), finished
+
+
+# --- Pipeline ---
+async def run_pipeline(
+    issue_text: str,
+    max_revisions: int = 1,
+    repo: str | None = None,
+    base_commit: str | None = None,
+    candidates: int = 1,
+    select: Literal["first", "rank"] = "first",
+    **run_kwargs,
+) -> PipelineResult:
+    """
+    Runs Analyzer -> (Explorer) -> Engineer -> Validator without the LLM Orchestrator.
+
+    Each stage is called directly and only receives what it needs: Explorer gets
+    the structured analysis, Engineer gets the issue, analysis and research, and
+    Validator gets the diff and the analysis.
+
+    Every diff first goes through the local gate (patch_check): a malformed
+    patch, or one that does not `git apply --check` at base_commit, goes
+    straight back to the Engineer without a Validator call. A "revise" verdict
+    also sends the Validator's gaps back. Both count towards max_revisions.
+
+    With candidates > 1 each Engineer round is speculative: that many patches
+    are generated concurrently and the first (or best ranked) one that passes
+    the local gate goes on to the Validator (see speculate).
+
+    Args:
+        issue_text (str): Raw GitHub issue
+        max_revisions (int): Extra Engineer rounds allowed after a rejected patch
+        repo (str | None): SWE-bench repo (owner/name); enables `git apply --check`
+        base_commit (str | None): Commit the patch must apply to
+        candidates (int): Engineer candidates per round (1 = no speculation)
+        select (str): "first" valid candidate wins, or "rank" all of them
+        **run_kwargs: Forwarded to every Runner.run call (hooks, context, ...)
+
+    Returns:
+        PipelineResult: Final diff plus every stage output
+    """
+    runs = []
+
+    r = await Runner.run(analyzer_stage, issue_text, **run_kwargs)
+    runs.append(r)
+    analysis = r.final_output_as(IssueAnalysis)
+    analysis_json = analysis.model_dump_json(indent=2)
+
+    research = None
+    if needs_research(analysis):
+        r = await Runner.run(explorer_stage, _section("Analysis", analysis_json), **run_kwargs)
+        runs.append(r)
+        research = str(r.final_output)
+
+    engineer_input = _section("Issue", issue_text) + _section("Analysis", analysis_json)
+    if research:
+        engineer_input += _section("Research", research)
+
+    result = PipelineResult(diff="", analysis=analysis, research=research, runs=runs)
+    feedback = ""
+    for attempt in range(max_revisions + 1):
+        result.revisions = attempt
+        result.validation = None
+        if candidates > 1:
+            best, finished = await speculate(engineer_input + feedback, candidates, select,
+                                             repo, base_commit, **run_kwargs)
+            result.candidates.extend(finished)
+            runs.extend(c.run for c in finished if c.run is not None)
+            result.diff, result.check = best.diff, best.check
+        else:
+            r = await Runner.run(engineer_stage, engineer_input + feedback, **run_kwargs)
+            runs.append(r)
+            result.diff = str(r.final_output)
+            result.check = await asyncio.to_thread(check_patch, result.diff, repo, base_commit)
+        if not result.check.ok:
+            feedback = _section(
+                "Local checks rejected your previous patch (fix it and output the full diff again)",
+                result.check.feedback() + "\n\nPrevious patch:\n" + result.diff,
+            )
+            continue
+
+        r = await Runner.run(
+            validator_stage,
+            _section("Patch", result.diff) + _section("Analysis", analysis_json),
+            **run_kwargs,
+        )
+        runs.append(r)
+        result.validation = r.final_output_as(ValidationReport)
+        if result.validation.verdict == "approve":
+            break
+        feedback = _section(
+            "Validator feedback on your previous patch (fix it and output the full diff again)",
+            json.dumps({"gaps": result.validation.gaps, "risks": result.validation.risks}, indent=2)
+            + "\n\nPrevious patch:\n" + result.diff,
+        )
+    return result
+
+
+# --- Example execution ---
+if __name__ == "__main__":
+    n = int(os.getenv("PATCH_CANDIDATES", 1))
+    issue_text = input("Paste a GitHub issue here:\n")
+    print("Processing (pipeline mode)...\n")
+    result = asyncio.run(run_pipeline(issue_text, candidates=n))
+    os.system('cls' if os.name == 'nt' else 'clear')
+    verdict = result.validation.verdict if result.validation else "rejected by local checks"
+    print(f"\nFinal output (git diff, {result.revisions} revision(s), verdict: {verdict}):\n")
+
+    print(normalize_text_to_one_line(result.diff))
@@ -1,49 +1,30 @@
 
 
 from dotenv import load_dotenv
-import os, requests
-from bs4 import BeautifulSoup
-from agents import Agent, Runner, set_tracing_disabled, function_tool, ModelSettings
-from agents.extensions.models.litellm_model import LitellmModel
+import argparse
+import asyncio
+import os
+from agents import Agent, Runner, set_tracing_disabled, ModelSettings, handoff
+from openai.types.responses import ResponseTextDeltaEvent
+
+from code_index import read_file_range, search_code
+from context_filters import stage_filter, format_stats
+from llm_cache import cached
+from patch_check import StreamingPatchCheck
+from prompt_layout import layered
+from rate_scheduler import scheduled
+from usage_report import UsageRecorder
+from web_fetch import fetch_url_for
 
 # --- Load environment variables ---
 load_dotenv()
 set_tracing_disabled(True)
 API_KEY = os.getenv('AZURE_API_KEY')
 
-# --- function_tool: fetch_url -> scrapes a URL using BS4 ---
-@function_tool
-def fetch_url(url: str) -> str:
-    """
-    Scrapes the content of a URL and returns only plain text.
-    
-    Args:
-        url (str): URL provided by the user
-    
-    Returns:
-        str: Plain text from the page (max 8000 characters)
-    """
-    try:
-        print("[Looking for info]")
-        r = requests.get(url, timeout=15)    # 15s timeout to avoid hanging
-        r.raise_for_status()                 # Raises exception if status != 200
-        soup = BeautifulSoup(r.text, "html.parser")
-
-        # Remove irrelevant tags for reading
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-
-        # Extract clean text
-        text = soup.get_text(separator=" ", strip=True)
-        return text[:8000]  # Limit to 8k characters (to avoid saturating the model)
-    except Exception as e:
-        return f"Error fetching {url}: {e}"
-
-
 # --- Validator: evaluates the patch, does NOT generate code ---
 validator_agent = Agent(
     name="Validator",
-    instructions="""
+    instructions=layered("""
 You are a Patch Validator.
 
 **Input:** A unified git diff produced by Engineer and the original issue summary.
@@ -71,11 +52,8 @@ You are a Patch Validator.
 - Only provide validation analysis
 
 **IMPORTANT: After providing your JSON validation, immediately transfer back to Orchestrator.**
-""",
-    model=LitellmModel(
-        model="azure/gpt-5",
-        api_key=API_KEY,
-    ),
+"""),
+    model=cached(scheduled("gpt-5", api_key=API_KEY)),
     model_settings=ModelSettings(include_usage=True),
 )
 
@@ -83,7 +61,7 @@ You are a Patch Validator.
 # --- Engineer / Solver: returns ONLY the patch in git format ---
 solver_agent = Agent(
     name="Engineer",
-    instructions="""
+    instructions=layered("""
         You are a Git Patch Generator.
 
         **Input:** A normalized analysis of a GitHub issue (and optional research context).
@@ -115,11 +93,8 @@ solver_agent = Agent(
         - First line MUST start with "diff --git"
 
         **IMPORTANT: After outputting the diff, immediately transfer back to Orchestrator.**
-    """,
-    model=LitellmModel(
-        model="azure/gpt-5",
-        api_key=API_KEY,
-    ),
+    """),
+    model=cached(scheduled("gpt-5", api_key=API_KEY)),
     model_settings=ModelSettings(include_usage=True)
 )
 
@@ -127,31 +102,31 @@ solver_agent = Agent(
 # --- Researcher / Explorer ---
 researcher_agent = Agent(
     name="Explorer",
-    instructions="""
+    instructions=layered("""
         Role: Quick research and context gathering.
 
         Task:
         - Investigate similar patterns, probable root causes, and signals to check.
         - If you rely on a source, mention it briefly (e.g., "source: <url>" or "source: internal").
+        - Use search_code / read_file_range (when available) to locate the code involved; cite
+          "path:line" and quote only the few relevant lines instead of whole files.
         - Be concise, technical, and actionable.
         - Do not invent links.
 
         Handoff:
         - After finishing, return control to the Solver Agent.
-    """,
-    model=LitellmModel(
-        model="azure/gpt-5",
-        api_key=API_KEY,
-    ),
+    """),
+    model=cached(scheduled("gpt-5", api_key=API_KEY)),
     model_settings=ModelSettings(include_usage=True),
-    handoffs=[solver_agent]
+    tools=[search_code, read_file_range],
+    handoffs=[handoff(solver_agent, input_filter=stage_filter("Engineer"))]   # Issue + analysis + research only
 )
 
 
 # --- Analyzer ---
 analyzer_agent = Agent(
     name="Analyzer",
-    instructions="""
+    instructions=layered("""
         **Role:** Issue analyzer and normalizer.
 
         **Task:** Parse and categorize the issue; extract:
@@ -161,27 +136,27 @@ analyzer_agent = Agent(
         - Mentioned technologies
         - Symptoms and reproduction steps (if available)
 
+        When search_code / read_file_range are available, confirm the affected paths in the
+        repository (real file paths and line numbers) instead of guessing them from the issue.
+
         **IMPORTANT: After providing your analysis, ALWAYS immediately transfer back to Researhcer Agent.**
 
         **Rules:**
         - Be objective and factual
         - Extract information directly from the issue text
         - Don't add assumptions not present in the original issue
-    """,
-    model=LitellmModel(
-        model="azure/gpt-5",
-        api_key=API_KEY,
-    ),
+    """),
+    model=cached(scheduled("gpt-5", api_key=API_KEY)),
     model_settings=ModelSettings(include_usage=True),
-    tools=[fetch_url],
-    handoffs=[researcher_agent]  # Solo puede regresar al Orchestrator
+    tools=[fetch_url_for("Analyzer"), search_code, read_file_range],
+    handoffs=[handoff(researcher_agent, input_filter=stage_filter("Explorer"))]  # Solo puede regresar al Orchestrator
 )
 
 
 # --- Orchestrator: returns VERBATIM the diff from Solver ---
 orchestrator_agent = Agent(
     name="Orchestrator",
-    instructions="""
+    instructions=layered("""
         You orchestrate four agents to resolve a plain-text GitHub issue.
 
         Workflow:
@@ -199,13 +174,10 @@ orchestrator_agent = Agent(
         - Keep trailing newline at end of file
         - Must be applicable with `git apply` or `patch -p1`
         - First line MUST start with "diff --git"
-    """,
-    model=LitellmModel(
-        model="azure/gpt-5",
-        api_key=API_KEY,
-    ),
+    """),
+    model=cached(scheduled("gpt-5", api_key=API_KEY)),
     model_settings=ModelSettings(include_usage=True, parallel_tool_calls=False),
-    handoffs=[analyzer_agent]
+    handoffs=[handoff(analyzer_agent, input_filter=stage_filter("Analyzer"))]   # Raw issue only
 )
 
 
@@ -221,18 +193,74 @@ def normalize_text_to_one_line(text: str) -> str:
     return text
 
 
+# --- Streamed execution ---
+async def solve_streamed(issue_text: str, hooks=None) -> tuple[str | None, str | None]:
+    """
+    Runs the chain with the streamed runner: prints each stage as it starts and
+    the Engineer's patch as it is generated. The patch is format-checked while it
+    streams and the run is cancelled at the first unrecoverable violation (text
+    before "diff --git", Markdown fences, broken hunks), so a bad attempt does not
+    pay for the rest of its generation.
+
+    Args:
+        issue_text (str): Plain-text GitHub issue
+        hooks (RunHooks): Optional run hooks (e.g. UsageRecorder.hooks())
+
+    Returns:
+        tuple[str | None, str | None]: (final output, abort reason); output is None if aborted
+    """
+    result = Runner.run_streamed(
+        orchestrator_agent,
+        input=[{"role": "user", "content": issue_text}],
+        hooks=hooks,
+    )
+    check = StreamingPatchCheck()
+    stage = None
+    async for event in result.stream_events():
+        if event.type == "agent_updated_stream_event":
+            stage = event.new_agent.name
+            print(f"[{stage}]", flush=True)
+        elif event.type == "run_item_stream_event" and event.name == "tool_called":
+            print(f"  tool: {getattr(event.item.raw_item, 'name', '?')}", flush=True)
+        elif (event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent)
+              and stage == solver_agent.name):
+            print(event.data.delta, end="", flush=True)
+            if error := check.feed(event.data.delta):
+                result.cancel()   # Closes the model stream: no more tokens are generated
+                return None, f"{error} (after {len(check.text)} chars)"
+    return result.final_output, None
+
+
 # --- Example execution ---
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stream", action="store_true",
+                        help="Show progress and the patch as it is generated; abort on malformed output")
+    args = parser.parse_args()
+
     issue_text = input("Paste a GitHub issue here:\n")
     print("Processing...\n")
-    r = Runner.run_sync(
-        orchestrator_agent,
-        input=[{
-            "role": "user",
-            "content": issue_text
-        }]
-    )
-    os.system('cls' if os.name == 'nt' else 'clear')
-    print("\nFinal output (git diff):\n")
-    
-    print(normalize_text_to_one_line(r.final_output))
\ No newline at end of file
+    usage = UsageRecorder()
+    if args.stream:
+        output, aborted = asyncio.run(solve_streamed(issue_text, hooks=usage.hooks("interactive")))
+        print()
+        if aborted:
+            print(f"\nAborted: {aborted}")
+        else:
+            print("\nFinal output (git diff):\n")
+            print(normalize_text_to_one_line(output))
+    else:
+        r = Runner.run_sync(
+            orchestrator_agent,
+            input=[{
+                "role": "user",
+                "content": issue_text
+            }],
+            hooks=usage.hooks("interactive"),
+        )
+        os.system('cls' if os.name == 'nt' else 'clear')
+        print("\nFinal output (git diff):\n")
+
+        print(normalize_text_to_one_line(r.final_output))
+    print("\n" + usage.format_summary())
+    print(format_stats())
@@ -0,0 +1,169 @@
+"""
+Local Spanish/English detector (character n-gram naive Bayes, stdlib only).
+
+Used by multiagent.py to route chat messages straight to the Spanish or English
+agent without an LLM triage round trip. Below the confidence threshold (short,
+mixed or language-neutral input such as URLs or code) the caller falls back to
+the LLM triage agent.
+
+Usage:
+    lang, confidence = detect("¿Me dices el clima de Monterrey?")   # ("es", 0.99...)
+"""
+import math
+import os
+import re
+from collections import Counter
+
+THRESHOLD = float(os.getenv("LANG_DETECT_THRESHOLD", "0.9"))
+NGRAM_SIZES = (1, 2, 3)
+MIN_LETTERS = 4
+TEMPERATURE = 0.2   # Naive Bayes is overconfident; scales the log-likelihood margin
+
+# --- Training text: short chat-style sentences in each language ---
+_CORPUS = {
+    "es": """
+        hola buenos días me puedes ayudar con mi cuenta por favor
+        puedes darme el clima de la ciudad de méxico mañana
+        cuál es el clima en monterrey en grados centígrados
+        necesito pedir un reembolso de mi último pago
+        no puedo iniciar sesión desde ayer y el sistema me marca error
+        qué es rag y cómo funciona con los modelos de lenguaje
+        quiero saber cuánto cuesta la suscripción anual
+        gracias por la respuesta tan rápida que tengas buen día
+        el pedido llegó incompleto y la caja estaba dañada
+        cómo puedo instalar pandas en mi computadora con windows
+        me cobraron dos veces la misma factura este mes
+        la aplicación se cierra sola cuando intento subir una foto
+        explícame la diferencia entre una lista y una tupla en python
+        dónde está mi paquete y cuándo va a llegar
+        hace mucho calor hoy y parece que va a llover en la tarde
+        tengo una pregunta sobre el contrato que firmé la semana pasada
+        necesito cambiar la dirección de envío de mi pedido
+        también quiero que me expliques por qué el código no compila
+        estoy buscando información sobre los precios de los planes
+        la página no carga y aparece un mensaje de error del servidor
+        podrías revisar si mi pago ya fue procesado
+        que tal como estas espero que todo vaya bien
+        ayúdame a escribir una función que ordene los números
+        el usuario dice que la contraseña no es correcta
+        """,
+    "en": """
+        hello good morning can you help me with my account please
+        can you give me the weather in madrid tomorrow
+        what is the weather like in new york in fahrenheit
+        i need to request a refund for my last payment
+        i cannot log in since yesterday and the system shows an error
+        what is rag and how does it work with language models
+        i want to know how much the yearly subscription costs
+        thanks for the quick answer have a nice day
+        the order arrived incomplete and the box was damaged
+        how can i install pandas on my windows computer
+        i was charged twice for the same invoice this month
+        the app closes by itself when i try to upload a photo
+        explain the difference between a list and a tuple in python
+        where is my package and when will it arrive
+        it is very hot today and it looks like it will rain this afternoon
+        i have a question about the contract i signed last week
+        i need to change the shipping address of my order
+        could you also explain why the code does not compile
+        i am looking for information about the pricing of the plans
+        the page does not load and a server error message appears
+        could you check if my payment has already been processed
+        how are you doing i hope everything is going well
+        help me write a function that sorts the numbers
+        the user says that the password is not correct
+        """,
+}
+
+_NON_LETTERS = re.compile(r"[^a-záéíóúüñ¿¡']+")
+_URLS = re.compile(r"https?://\S+|`[^`]*`")
+
+
+def _normalize(text: str) -> str:
+    text = _URLS.sub(" ", text.lower())
+    return " " + " ".join(_NON_LETTERS.sub(" ", text).split()) + " "
+
+
+def _ngrams(text: str):
+    for n in NGRAM_SIZES:
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if gram.strip():
+                yield gram
+
+
+def _train(corpus: dict[str, str]) -> tuple[dict[str, float], float]:
+    """
+    Returns per-n-gram log-likelihood ratios log P(g|es) - log P(g|en) (add-one
+    smoothed), plus the ratio for n-grams unseen in both languages.
+    """
+    es, en = Counter(_ngrams(_normalize(corpus["es"]))), Counter(_ngrams(_normalize(corpus["en"])))
+    vocab = es.keys() | en.keys()
+    total_es = sum(es.values()) + len(vocab) + 1
+    total_en = sum(en.values()) + len(vocab) + 1
+    ratios = {g: math.log((es[g] + 1) / total_es) - math.log((en[g] + 1) / total_en) for g in vocab}
+    return ratios, math.log(total_en / total_es)
+
+
+_RATIOS, _UNSEEN = _train(_CORPUS)
+# Characters that only occur in Spanish text
+_SPANISH_MARKS = set("ñ¿¡áéíóú")
+
+
+def detect(text: str) -> tuple[str | None, float]:
+    """
+    Detects whether text is Spanish or English.
+
+    Args:
+        text (str): Message to classify
+
+    Returns:
+        tuple: ("es" | "en" | None, confidence in 0.5..1). None if there is not
+               enough text to decide (e.g. only a URL or a number).
+    """
+    norm = _normalize(text)
+    if sum(ch.isalpha() for ch in norm) < MIN_LETTERS:
+        return None, 0.0
+    ratios, unseen = _RATIOS, _UNSEEN
+    margin = sum(ratios.get(gram, unseen) for gram in _ngrams(norm))
+    if _SPANISH_MARKS & set(norm):
+        margin += 5.0
+    margin *= TEMPERATURE
+    p_es = 1 / (1 + math.exp(-max(min(margin, 50), -50)))
+    return ("es", p_es) if p_es >= 0.5 else ("en", 1 - p_es)
+
+
+class LanguageRouter:
+    """
+    Picks an agent by detected language and counts how many messages skipped
+    the LLM triage.
+
+    Args:
+        agents (dict): Language code -> agent, e.g. {"es": spanish_agent, "en": english_agent}
+        fallback: Agent used below the threshold (the LLM triage agent)
+        threshold (float): Minimum confidence to route locally
+    """
+
+    def __init__(self, agents: dict, fallback, threshold: float = THRESHOLD):
+        self.agents = agents
+        self.fallback = fallback
+        self.threshold = threshold
+        self.stats = Counter()
+
+    def route(self, text: str):
+        lang, confidence = detect(text)
+        if lang in self.agents and confidence >= self.threshold:
+            self.stats[f"fast_{lang}"] += 1
+            return self.agents[lang]
+        self.stats["llm_triage"] += 1
+        return self.fallback
+
+    @property
+    def skipped(self) -> int:
+        return sum(v for k, v in self.stats.items() if k.startswith("fast_"))
+
+    def report(self) -> str:
+        total = self.skipped + self.stats["llm_triage"]
+        rate = self.skipped / total if total else 0.0
+        detail = ", ".join(f"{k}={v}" for k, v in sorted(self.stats.items()))
+        return f"LLM triage skipped for {self.skipped}/{total} messages ({rate:.0%}): {detail}"
@@ -0,0 +1,294 @@
+"""
+Exact-match record/replay cache for model calls, below the Runner.
+
+CachedModel wraps any agents Model (e.g. LitellmModel). The key is a sha256 of
+the model name, system instructions, input items, tools, handoffs, output schema
+and model settings, so changing one agent's prompt only misses for that agent
+and everything downstream of it.
+
+Modes (env LLM_CACHE, or set_mode()):
+    passthrough  Always call the model, never touch the cache (default)
+    record       Return cached responses, call and store on a miss
+    replay       Cache only; a miss raises LLMCacheMiss (reproducible/offline runs)
+
+Usage:
+    model = cached(LitellmModel(model="azure/gpt-5", api_key=API_KEY))
+    LLM_CACHE=record python issue_solver_agent.py
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+from agents import Model, ModelResponse, Usage
+from agents.tool import FunctionTool
+from openai.types.responses import (
+    Response,
+    ResponseCompletedEvent,
+    ResponseOutputItem,
+    ResponseOutputItemDoneEvent,
+    ResponseOutputMessage,
+    ResponseTextDeltaEvent,
+)
+from pydantic import TypeAdapter
+
+from page_cache import CACHE_ROOT
+
+MODES = ("passthrough", "record", "replay")
+MODE = os.getenv("LLM_CACHE", "passthrough").lower()
+MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", 512 * 1024 * 1024))   # 512 MB by default
+
+_output_items = TypeAdapter(list[ResponseOutputItem])
+stats: Counter = Counter()
+
+
+class LLMCacheMiss(LookupError):
+    """Raised in replay mode when a call is not in the cache."""
+
+
+def set_mode(mode: str) -> None:
+    global MODE
+    if mode not in MODES:
+        raise ValueError(f"LLM cache mode must be one of {MODES}, got {mode!r}")
+    MODE = mode
+
+
+# --- Key ---
+def _jsonable(obj: Any) -> Any:
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    return str(obj)
+
+
+def _tool_spec(tool) -> dict:
+    if isinstance(tool, FunctionTool):
+        return {"name": tool.name, "description": tool.description,
+                "params": tool.params_json_schema, "strict": tool.strict_json_schema}
+    return {"type": type(tool).__name__, "name": getattr(tool, "name", None)}
+
+
+def cache_key(model: str, system_instructions, input, model_settings, tools, output_schema, handoffs) -> str:
+    """
+    sha256 over everything that determines the model's reply.
+    """
+    schema = None
+    if output_schema is not None and not output_schema.is_plain_text():
+        schema = {"name": output_schema.name(), "schema": output_schema.json_schema()}
+    payload = {
+        "model": model,
+        "instructions": system_instructions,
+        "input": input,
+        "settings": model_settings.to_json_dict(),
+        "tools": [_tool_spec(t) for t in tools],
+        "handoffs": [{"name": h.tool_name, "description": h.tool_description,
+                      "params": h.input_json_schema} for h in handoffs],
+        "output_schema": schema,
+    }
+    data = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=_jsonable)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+# --- Storage ---
+class LLMCache:
+    """
+    One JSON file per call (entries/<key[:2]>/<key>.json). Reads touch the file's
+    mtime, and the least recently used entries are evicted once the cache exceeds
+    max_bytes.
+    """
+
+    def __init__(self, root: Path = CACHE_ROOT / "llm", max_bytes: int = MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.entries = self.root / "entries"
+        self.entries.mkdir(parents=True, exist_ok=True)
+        self._size: int | None = None   # Computed lazily on the first write
+        self._lock = threading.Lock()     # put() runs in worker threads (asyncio.to_thread)
+
+    def _path(self, key: str) -> Path:
+        return self.entries / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> ModelResponse | None:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+            output = _output_items.validate_python(entry["output"])
+        except (OSError, ValueError, KeyError):
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        usage = entry.get("usage") or {}
+        stats["saved_input_tokens"] += usage.get("input_tokens", 0)
+        stats["saved_output_tokens"] += usage.get("output_tokens", 0)
+        # Nothing was spent on a hit: report empty usage so costs stay accurate
+        return ModelResponse(output=output, usage=Usage(), response_id=entry.get("response_id"))
+
+    def put(self, key: str, model: str, response: ModelResponse) -> None:
+        usage = response.usage
+        entry = {
+            "model": model,
+            "created": time.time(),
+            "response_id": response.response_id,
+            "output": [item.model_dump(mode="json", exclude_unset=True) for item in response.output],
+            "usage": {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens},
+        }
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        with self._lock:
+            try:
+                replaced = path.stat().st_size   # Re-recording a key overwrites its entry
+            except OSError:
+                replaced = 0
+            # Unique temp file: concurrent calls may store the same key at once
+            fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    f.write(json.dumps(entry, ensure_ascii=False))
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+            stats["writes"] += 1
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += path.stat().st_size - replaced
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def _disk_usage(self) -> int:
+        return sum(p.stat().st_size for p in self.entries.glob("*/*.json"))
+
+    def evict(self) -> None:
+        """
+        Drops least recently used entries until the cache fits in 90% of max_bytes
+        (called from put() with the lock held).
+        """
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self.entries.glob("*/*.json"), key=lambda p: p.stat().st_mtime)
+        size = sum(p.stat().st_size for p in entries)
+        for path in entries:
+            if size <= target:
+                break
+            size -= path.stat().st_size
+            path.unlink(missing_ok=True)
+        self._size = size
+
+
+_cache: LLMCache | None = None
+
+
+def _get_cache() -> LLMCache:
+    global _cache
+    if _cache is None:
+        _cache = LLMCache()
+    return _cache
+
+
+# --- Model wrapper ---
+class CachedModel(Model):
+    """
+    Model wrapper that consults the LLM cache according to the current MODE.
+
+    Args:
+        inner (Model): The real model (LitellmModel, OpenAIResponsesModel, ...)
+    """
+
+    def __init__(self, inner: Model):
+        self.inner = inner
+        self.model = getattr(inner, "model", type(inner).__name__)   # For usage_report.model_name
+
+    def _key(self, system_instructions, input, model_settings, tools, output_schema, handoffs) -> str:
+        return cache_key(str(self.model), system_instructions, input, model_settings, tools, output_schema, handoffs)
+
+    async def _lookup(self, key: str) -> ModelResponse | None:
+        cached = await asyncio.to_thread(_get_cache().get, key)
+        if cached is not None:
+            stats["hits"] += 1
+            return cached
+        stats["misses"] += 1
+        if MODE == "replay":
+            raise LLMCacheMiss(f"No cached response for {self.model} (key {key[:12]})")
+        return None
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, previous_response_id=None, conversation_id=None,
+                           prompt=None) -> ModelResponse:
+        call = (system_instructions, input, model_settings, tools, output_schema, handoffs)
+        if MODE == "passthrough":
+            return await self.inner.get_response(*call, tracing, previous_response_id=previous_response_id,
+                                                 conversation_id=conversation_id, prompt=prompt)
+        key = self._key(*call)
+        cached = await self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.inner.get_response(*call, tracing, previous_response_id=previous_response_id,
+                                                 conversation_id=conversation_id, prompt=prompt)
+        # Disk writes (and the occasional eviction scan) stay off the event loop
+        await asyncio.to_thread(_get_cache().put, key, str(self.model), response)
+        return response
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema,
+                              handoffs, tracing, previous_response_id=None, conversation_id=None,
+                              prompt=None) -> AsyncIterator:
+        call = (system_instructions, input, model_settings, tools, output_schema, handoffs)
+        key = None if MODE == "passthrough" else self._key(*call)
+        cached = await self._lookup(key) if key else None
+        if cached is not None:
+            for event in _replay_events(cached):
+                yield event
+            return
+
+        async for event in self.inner.stream_response(*call, tracing, previous_response_id=previous_response_id,
+                                                      conversation_id=conversation_id, prompt=prompt):
+            if key and isinstance(event, ResponseCompletedEvent):
+                usage = event.response.usage
+                await asyncio.to_thread(_get_cache().put, key, str(self.model), ModelResponse(
+                    output=event.response.output,
+                    usage=Usage(input_tokens=usage.input_tokens, output_tokens=usage.output_tokens)
+                    if usage else Usage(),
+                    response_id=event.response.id,
+                ))
+            yield event
+
+
+def _replay_events(response: ModelResponse):
+    """
+    Minimal stream for a cached response: one text delta per message part, one
+    item-done per output item, then response.completed (what the Runner consumes).
+    """
+    seq = 0
+    for index, item in enumerate(response.output):
+        if isinstance(item, ResponseOutputMessage):
+            for part_index, part in enumerate(item.content):
+                if getattr(part, "text", None):
+                    yield ResponseTextDeltaEvent.model_construct(
+                        type="response.output_text.delta", item_id=item.id, output_index=index,
+                        content_index=part_index, delta=part.text, logprobs=[], sequence_number=seq,
+                    )
+                    seq += 1
+        yield ResponseOutputItemDoneEvent.model_construct(
+            type="response.output_item.done", item=item, output_index=index, sequence_number=seq,
+        )
+        seq += 1
+    yield ResponseCompletedEvent.model_construct(
+        type="response.completed", sequence_number=seq,
+        response=Response.model_construct(
+            id=response.response_id or "cached", object="response", created_at=time.time(),
+            output=response.output, usage=None, status="completed",
+        ),
+    )
+
+
+def cached(model: Model) -> CachedModel:
+    """
+    Wraps a model with the record/replay cache (a no-op while MODE is passthrough).
+    """
+    return CachedModel(model)
@@ -1,23 +1,14 @@
 from dotenv import load_dotenv
 import os
 from agents import Agent, Runner, set_tracing_disabled, function_tool, ModelSettings
-from agents.extensions.models.litellm_model import LitellmModel
+
+from lang_detect import LanguageRouter
+from rate_scheduler import scheduled
 
 load_dotenv()
 set_tracing_disabled(True)
 
 API_KEY    = os.getenv("AZURE_API_KEY")
-models = {
-    "gpt-4o-mini": "Innovation-gpt4o-mini",
-    "gpt-4o": "Innovation-gpt4o",
-    "gpt-4.1": "gpt-4.1",
-    "gpt-4.1-mini": "gpt-4.1-mini",
-    "gpt-4.1-nano": "gpt-4.1-nano",
-    "gpt-o1": "o1",
-    "gpt-o3": "o3-mini",
-    "gpt-o4-mini": "o4-mini",
-    "gpt-5": "gpt-5"
-}
 
 @function_tool
 def get_weather(city: str, unit: str = "C") -> str:
@@ -38,11 +29,7 @@ spanish_agent = Agent(
         "Responde en español, breve y directo. "
         "Si el usuario pide clima, llama a la tool get_weather."
     ),
-    model=LitellmModel(
-        model=f"azure/{models['gpt-4o']}",
-        api_key=API_KEY,
-        
-    ),
+    model=scheduled("gpt-4o", api_key=API_KEY, spill=True),   # Innovation-gpt4o; gpt-4.1 como respaldo si hay 429
     tools=[get_weather],
     model_settings=ModelSettings(include_usage=True, parallel_tool_calls=True),
 )
@@ -53,11 +40,7 @@ english_agent = Agent(
         "Reply in concise English. "
         "If the user requests weather, call get_weather."
     ),
-    model=LitellmModel(
-        model=f"azure/{models['gpt-4o']}",
-        api_key=API_KEY,
-        
-    ),
+    model=scheduled("gpt-4o", api_key=API_KEY, spill=True),
     tools=[get_weather],
     model_settings=ModelSettings(include_usage=True, parallel_tool_calls=True),
 )
@@ -70,20 +53,48 @@ triage_agent = Agent(
         "No expliques la decisión, solo responde o delega."
     ),
     tools=[get_weather],
-    model=f"litellm/azure/{models['gpt-4o']}",
+    model=scheduled("gpt-4o", api_key=API_KEY, spill=True),
     handoffs=[spanish_agent, english_agent],
     model_settings=ModelSettings(include_usage=True),
 )
 
+# --- Ruteo local por idioma: se salta el triage LLM si la detección es confiable ---
+router = LanguageRouter({"es": spanish_agent, "en": english_agent}, fallback=triage_agent)
+
+
+def pick_agent(input: str | list) -> Agent:
+    """
+    Agente de entrada para un mensaje: spanish_agent / english_agent si el
+    detector local está seguro, si no triage_agent (handoff por LLM).
+
+    Args:
+        input (str | list): Texto del usuario o lista de mensajes (se usa el último del usuario)
+    """
+    if isinstance(input, list):
+        input = next((m.get("content", "") for m in reversed(input)
+                      if isinstance(m, dict) and m.get("role") == "user"), "")
+    return router.route(input if isinstance(input, str) else "")
+
+
+async def run(input: str | list, **kwargs):
+    """
+    Runner.run con el ruteo local por idioma (mismos argumentos que Runner.run).
+    """
+    return await Runner.run(pick_agent(input), input, **kwargs)
+
+
 if __name__ == "__main__":
-    # --- 1) Handoff automático por idioma ---
-    r1 = Runner.run_sync(triage_agent, input="Puedes darme el clima de CDMX en ingles ??")
+    # --- 1) Ruteo por idioma (detector local, triage LLM solo si hay duda) ---
+    msg = "Puedes darme el clima de CDMX en ingles ??"
+    r1 = Runner.run_sync(pick_agent(msg), input=msg)
     print("\n[TRIAGE -> AUTO] (español):")
     print(r1.final_output)
 
-    r2 = Runner.run_sync(triage_agent, input="What's the weather in Madrid in F?")
+    msg = "What's the weather in Madrid in F?"
+    r2 = Runner.run_sync(pick_agent(msg), input=msg)
     print("\n[TRIAGE -> AUTO] (english):")
     print(r2.final_output)
+    print(router.report())
 
     # --- 2) Llamada directa a un solo agente ---
     r3 = Runner.run_sync(spanish_agent, input="¿Me dices el clima de Monterrey en C?")
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, asdict
+from pathlib import Path
+
+# --- Cache location / size ---
+CACHE_ROOT = Path(os.getenv("MULTIAGENT_CACHE_DIR", Path.home() / ".cache" / "multiagent"))
+MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))   # 256 MB by default
+ORPHAN_GRACE_S = 60   # Unreferenced blobs younger than this may belong to a put in progress
+
+
+@dataclass
+class CachedPage:
+    url: str
+    blob: str                 # sha256 of the extracted text (file name under blobs/)
+    max_chars: int            # Extraction budget the text was produced with
+    etag: str | None = None
+    last_modified: str | None = None
+    fresh_until: float = 0.0  # From Cache-Control max-age; 0 means always revalidate
+    fetched_at: float = 0.0
+
+
+def _sha256(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+class PageCache:
+    """
+    Persistent cache of already-extracted page text.
+
+    Entries are keyed by URL (entries/<sha256(url)>.json) and point to the text,
+    which is stored content-addressed (blobs/<sha256(text)>.txt) so mirrors of the
+    same page share one copy; re-storing a URL drops its previous text once no
+    entry refers to it. Reads touch the entry's mtime, and the least recently
+    used entries are evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, root: Path = CACHE_ROOT / "pages", max_bytes: int = MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.entries = self.root / "entries"
+        self.blobs = self.root / "blobs"
+        self.entries.mkdir(parents=True, exist_ok=True)
+        self.blobs.mkdir(parents=True, exist_ok=True)
+        self._size: int | None = None   # Computed lazily on the first write
+        self._refs: Counter | None = None  # blob -> entries pointing to it, loaded on the first write
+        self._lock = threading.Lock()     # Writes run in worker threads (asyncio.to_thread)
+
+    # --- Lookup ---
+    def _entry_path(self, url: str) -> Path:
+        return self.entries / f"{_sha256(url)}.json"
+
+    def get(self, url: str) -> tuple[CachedPage, str] | None:
+        """
+        Returns the cached entry and its text, or None on a miss.
+        """
+        path = self._entry_path(url)
+        try:
+            page = CachedPage(**json.loads(path.read_text(encoding="utf-8")))
+            text = (self.blobs / f"{page.blob}.txt").read_text(encoding="utf-8")
+        except (OSError, ValueError, TypeError):
+            return None
+        self.touch(url)
+        return page, text
+
+    def touch(self, url: str) -> None:
+        """
+        Marks an entry as recently used (LRU order is the entry mtime).
+        """
+        try:
+            os.utime(self._entry_path(url))
+        except OSError:
+            pass
+
+    # --- Store ---
+    def put(self, page: CachedPage, text: str) -> None:
+        page.blob = _sha256(text)
+        with self._lock:
+            blob_path = self.blobs / f"{page.blob}.txt"
+            entry_path = self._entry_path(page.url)
+            try:
+                previous = json.loads(entry_path.read_text(encoding="utf-8"))["blob"]
+            except (OSError, ValueError, KeyError):
+                previous = None
+            if self._refs is None:
+                self._refs = self._load_refs()
+            added = 0
+            if blob_path.exists():
+                try:
+                    os.utime(blob_path)   # Keep it out of evict()'s orphan sweep until the entry is written
+                except OSError:
+                    pass
+            else:
+                added += self._write_atomic(blob_path, text)
+            added += self._write_atomic(entry_path, json.dumps(asdict(page)))
+            self._refs[page.blob] += 1
+            if previous:
+                self._refs[previous] -= 1
+                if self._refs[previous] <= 0:
+                    # The page changed: drop its old text, no other entry points to it
+                    del self._refs[previous]
+                    old = self.blobs / f"{previous}.txt"
+                    try:
+                        added -= old.stat().st_size
+                        old.unlink()
+                    except OSError:
+                        pass
+            if self._size is None:
+                self._size = self._disk_usage()
+            else:
+                self._size += added
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def update_validators(self, page: CachedPage) -> None:
+        """
+        Rewrites an entry's metadata after a 304 revalidation.
+        """
+        with self._lock:
+            self._write_atomic(self._entry_path(page.url), json.dumps(asdict(page)))
+
+    @staticmethod
+    def _write_atomic(path: Path, data: str) -> int:
+        # Unique temp file: concurrent writers of the same path must not share one
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        return path.stat().st_size
+
+    def _load_refs(self) -> Counter:
+        refs: Counter = Counter()
+        for path in self.entries.glob("*.json"):
+            try:
+                refs[json.loads(path.read_text(encoding="utf-8"))["blob"]] += 1
+            except (OSError, ValueError, KeyError):
+                pass
+        return refs
+
+    # --- Eviction ---
+    def _disk_usage(self) -> int:
+        return sum(p.stat().st_size for d in (self.entries, self.blobs) for p in d.iterdir())
+
+    def evict(self) -> None:
+        """
+        Removes blobs no longer referenced by any entry (e.g. the old text of a
+        re-fetched URL), then drops least recently used entries until the cache
+        fits in 90% of max_bytes.
+        """
+        target = int(self.max_bytes * 0.9)
+        started = time.time()
+        entries = sorted(self.entries.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        refs: dict[str, int] = {}
+        metas = {}
+        for path in entries:
+            try:
+                blob = json.loads(path.read_text(encoding="utf-8"))["blob"]
+            except (OSError, ValueError, KeyError):
+                path.unlink(missing_ok=True)
+                continue
+            metas[path] = blob
+            refs[blob] = refs.get(blob, 0) + 1
+        for blob_path in self.blobs.glob("*.txt"):
+            try:
+                if blob_path.stem not in refs and blob_path.stat().st_mtime < started - ORPHAN_GRACE_S:
+                    blob_path.unlink()
+            except OSError:
+                pass
+
+        size = self._disk_usage()
+        for path, blob in metas.items():
+            if size <= target:
+                break
+            size -= path.stat().st_size
+            path.unlink(missing_ok=True)
+            refs[blob] -= 1
+            if refs[blob] == 0:
+                blob_path = self.blobs / f"{blob}.txt"
+                if blob_path.exists():
+                    size -= blob_path.stat().st_size
+                    blob_path.unlink()
+        self._size = size
+        self._refs = Counter({blob: n for blob, n in refs.items() if n > 0})
+
+
+def parse_max_age(cache_control: str | None) -> float:
+    """
+    Returns the freshness lifetime (seconds) from a Cache-Control header.
+    Returns -1 when the response must not be stored.
+    """
+    directives = [d.strip() for d in (cache_control or "").lower().split(",")]
+    if "no-store" in directives:
+        return -1.0
+    if "no-cache" in directives:
+        return 0.0
+    for directive in directives:
+        if directive.startswith("max-age="):
+            try:
+                return max(0.0, float(directive.split("=", 1)[1]))
+            except ValueError:
+                pass
+    return 0.0
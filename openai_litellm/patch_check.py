@@ -0,0 +1,291 @@
+import re
+import subprocess
+from dataclasses import dataclass, field
+
+from worktree_pool import GitError, WorktreePool, default_pool
+
+GIT_TIMEOUT = 120   # Seconds for `git apply --check` itself
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_EXTENDED_HEADERS = (
+    "index ", "old mode ", "new mode ", "deleted file mode ", "new file mode ",
+    "similarity index ", "dissimilarity index ", "rename from ", "rename to ",
+    "copy from ", "copy to ", "Binary files ",
+)
+
+
+@dataclass
+class CheckResult:
+    ok: bool
+    errors: list[str] = field(default_factory=list)
+    files: list[str] = field(default_factory=list)
+    applied: bool | None = None   # None when `git apply --check` was not run
+    notes: list[str] = field(default_factory=list)
+
+    def feedback(self) -> str:
+        """
+        Error summary to send back to the Engineer.
+        """
+        return "\n".join(f"- {e}" for e in self.errors[:10])
+
+
+# --- Format check (no repository needed) ---
+def parse_patch(diff: str) -> CheckResult:
+    """
+    Checks that a patch is a well-formed unified git diff.
+
+    Verifies the file headers, that every hunk header is valid and that each
+    hunk has exactly the number of old/new lines it announces.
+
+    Returns:
+        CheckResult: ok=False with one message per problem found
+    """
+    errors = []
+    files = []
+    if not diff.startswith("diff --git "):
+        errors.append('Patch must start with "diff --git" (no text before it)')
+    if "```" in diff:
+        errors.append("Patch contains Markdown code fences")
+    if diff and not diff.endswith("\n"):
+        errors.append("Patch must end with a newline")
+
+    lines = diff.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    i = 0
+    n = len(lines)
+    while i < n:
+        line = lines[i]
+        if not line.startswith("diff --git "):
+            errors.append(f"Line {i + 1}: unexpected text outside a file section: {line[:80]!r}")
+            i += 1
+            continue
+        m = re.match(r"^diff --git a/(\S+) b/(\S+)$", line)
+        if not m:
+            errors.append(f"Line {i + 1}: malformed diff header: {line[:80]!r}")
+        else:
+            files.append(m.group(2))
+        i += 1
+        while i < n and lines[i].startswith(_EXTENDED_HEADERS):
+            i += 1
+        if i < n and lines[i].startswith("diff --git "):
+            continue   # Header-only section (mode change, rename, binary)
+        if i + 1 >= n or not lines[i].startswith("--- ") or not lines[i + 1].startswith("+++ "):
+            errors.append(f"Line {i + 1}: expected '--- a/<path>' and '+++ b/<path>' headers")
+            while i < n and not lines[i].startswith("diff --git "):
+                i += 1
+            continue
+        i += 2
+        if i >= n or not lines[i].startswith("@@"):
+            errors.append(f"Line {i + 1}: file section without hunks")
+        while i < n and lines[i].startswith("@@"):
+            h = _HUNK_HEADER.match(lines[i])
+            if not h:
+                errors.append(f"Line {i + 1}: malformed hunk header: {lines[i][:80]!r}")
+                i += 1
+                while i < n and lines[i][:1] in (" ", "+", "-", "\\", ""):
+                    i += 1
+                continue
+            old_left = int(h.group(2)) if h.group(2) is not None else 1
+            new_left = int(h.group(4)) if h.group(4) is not None else 1
+            header_line = i + 1
+            i += 1
+            while i < n and (old_left > 0 or new_left > 0):
+                tag = lines[i][:1]
+                if tag in (" ", ""):   # An empty line is an empty context line (git accepts it)
+                    old_left -= 1
+                    new_left -= 1
+                elif tag == "-":
+                    old_left -= 1
+                elif tag == "+":
+                    new_left -= 1
+                elif tag != "\\":
+                    break
+                i += 1
+            while i < n and lines[i].startswith("\\"):
+                i += 1   # "\ No newline at end of file"
+            if old_left != 0 or new_left != 0:
+                errors.append(
+                    f"Line {header_line}: hunk line counts do not match its header "
+                    f"({lines[header_line - 1]})"
+                )
+                while i < n and not lines[i].startswith(("@@", "diff --git ")):
+                    i += 1
+        while i < n and not lines[i].startswith("diff --git "):
+            errors.append(f"Line {i + 1}: unexpected line after hunk: {lines[i][:80]!r}")
+            i += 1
+    if not files and not errors:
+        errors.append("Patch does not modify any file")
+    return CheckResult(ok=not errors, errors=errors, files=files)
+
+
+# --- Incremental format check (streamed output) ---
+class StreamingPatchCheck:
+    """
+    Checks an Engineer's output while it is generated, so a run can be cancelled
+    as soon as the text clearly cannot become a valid patch instead of paying for
+    the rest of the generation.
+
+    feed() takes each text delta and returns the first fatal problem, or None
+    while the output may still be valid. Only unambiguous violations are fatal
+    (text before "diff --git", Markdown fences, lines outside a file section,
+    malformed or overflowing hunks); parse_patch() remains the final verdict.
+
+    Usage:
+        check = StreamingPatchCheck()
+        for delta in deltas:
+            if (error := check.feed(delta)):
+                ...cancel the run...
+    """
+
+    _PREFIX = "diff --git "
+
+    def __init__(self):
+        self.text = ""
+        self.error: str | None = None
+        self._pending = ""          # Current (incomplete) line
+        self._line_no = 0
+        self._state = "start"       # start | header | plus | hunks | hunk
+        self._old_left = self._new_left = 0
+
+    def feed(self, delta: str) -> str | None:
+        if self.error or not delta:
+            return self.error
+        self.text += delta
+        if "```" in self.text[-len(delta) - 2:]:
+            return self._fail("Patch contains Markdown code fences")
+        self._pending += delta
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            self._line_no += 1
+            if self._line(line):
+                return self.error
+        # The first line can be rejected before it is complete
+        if self._state == "start" and not self._PREFIX.startswith(self._pending[:len(self._PREFIX)]):
+            return self._fail('Patch must start with "diff --git" (no text before it)')
+        return None
+
+    def _fail(self, message: str) -> str:
+        self.error = message
+        return message
+
+    def _line(self, line: str) -> bool:
+        """
+        Advances the state machine by one complete line; True if it is fatal.
+        """
+        where = f"Line {self._line_no}"
+        if self._state == "hunk":
+            tag = line[:1]
+            if tag in (" ", ""):
+                self._old_left -= 1
+                self._new_left -= 1
+            elif tag == "-":
+                self._old_left -= 1
+            elif tag == "+":
+                self._new_left -= 1
+            elif tag == "\\":
+                return False
+            else:
+                return bool(self._fail(f"{where}: hunk ended before its announced line counts: {line[:80]!r}"))
+            if self._old_left < 0 or self._new_left < 0:
+                return bool(self._fail(f"{where}: hunk has more lines than its header announces"))
+            if self._old_left == 0 and self._new_left == 0:
+                self._state = "hunks"
+            return False
+
+        if line.startswith(self._PREFIX):
+            # After a header-only section (mode change, rename, binary) a new one may start right away
+            if self._state == "plus":
+                return bool(self._fail(f"{where}: expected '+++ b/<path>' header"))
+            if self._state == "hunks" and self._old_left < 0:
+                return bool(self._fail(f"{where}: file section without hunks"))
+            if not re.match(r"^diff --git a/(\S+) b/(\S+)$", line):
+                return bool(self._fail(f"{where}: malformed diff header: {line[:80]!r}"))
+            self._state = "header"
+            return False
+        if self._state == "start":
+            return bool(self._fail('Patch must start with "diff --git" (no text before it)'))
+        if self._state == "header":
+            if line.startswith(_EXTENDED_HEADERS):
+                return False
+            if line.startswith("--- "):
+                self._state = "plus"
+                return False
+            return bool(self._fail(f"{where}: expected '--- a/<path>' header: {line[:80]!r}"))
+        if self._state == "plus":
+            if line.startswith("+++ "):
+                self._state = "hunks"
+                self._old_left = -1   # No hunk seen yet in this file section
+                return False
+            return bool(self._fail(f"{where}: expected '+++ b/<path>' header"))
+        # state == "hunks": between hunks of a file section
+        if line.startswith("@@"):
+            h = _HUNK_HEADER.match(line)
+            if not h:
+                return bool(self._fail(f"{where}: malformed hunk header: {line[:80]!r}"))
+            self._old_left = int(h.group(2)) if h.group(2) is not None else 1
+            self._new_left = int(h.group(4)) if h.group(4) is not None else 1
+            self._state = "hunk" if self._old_left or self._new_left else "hunks"
+            return False
+        if line.startswith("\\"):
+            return False
+        if line[:1] in ("+", "-", " ") and self._old_left == 0:
+            return bool(self._fail(f"{where}: hunk has more lines than its header announces"))
+        if line == "" and self._old_left == 0:
+            return False   # Possibly the trailing newline; parse_patch decides at the end
+        return bool(self._fail(f"{where}: unexpected text outside a hunk: {line[:80]!r}"))
+
+
+# --- Apply check against the target repository ---
+def git_apply_check(diff: str, repo: str, base_commit: str, pool: WorktreePool | None = None) -> tuple[bool, str]:
+    """
+    Runs `git apply --check` for the patch on a checkout of repo at base_commit,
+    leased from the shared worktree pool.
+
+    Returns:
+        tuple[bool, str]: (applies, git error output)
+    """
+    with (pool or default_pool()).lease(repo, base_commit) as tree:
+        r = subprocess.run(
+            ["git", "apply", "--check", "-"], cwd=tree, input=diff,
+            capture_output=True, text=True, timeout=GIT_TIMEOUT,
+        )
+    return r.returncode == 0, r.stderr.strip()
+
+
+def check_patch(
+    diff: str,
+    repo: str | None = None,
+    base_commit: str | None = None,
+    pool: WorktreePool | None = None,
+) -> CheckResult:
+    """
+    Local validation gate for the Engineer's output.
+
+    Runs the format check first; if it passes and the target repository is
+    known, also runs `git apply --check` at base_commit. Blocking (git
+    subprocesses); call it with asyncio.to_thread from async code.
+
+    Args:
+        diff (str): Engineer output
+        repo (str | None): SWE-bench "repo" field (owner/name)
+        base_commit (str | None): SWE-bench "base_commit" field
+        pool (WorktreePool | None): Checkout pool (defaults to the process-wide one)
+
+    Returns:
+        CheckResult: ok=True only if every check that could run passed
+    """
+    result = parse_patch(diff)
+    if not result.ok or not (repo and base_commit):
+        return result
+    try:
+        applied, stderr = git_apply_check(diff, repo, base_commit, pool)
+    except (GitError, OSError, subprocess.TimeoutExpired) as e:
+        # Infrastructure problem, not the patch's fault: keep the format verdict
+        result.notes.append(f"apply check skipped: {e}")
+        return result
+    result.applied = applied
+    if not applied:
+        result.ok = False
+        result.errors.append(f"git apply --check failed:\n{stderr}")
+    return result
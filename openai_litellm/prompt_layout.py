@@ -0,0 +1,233 @@
+"""
+Prompt layout for provider-side prompt caching.
+
+Azure OpenAI / OpenAI reuse the work done for the longest prompt prefix they
+have already seen (prompts of 1024+ tokens, matched in 128-token steps): cached
+input tokens are billed at a fraction of the price (usage_report.PRICES_PER_1M)
+and skip prefill. A hit needs a byte-identical prefix, and the agents SDK sends
+
+    tool + handoff schemas | system = agent instructions | input (issue, transcript)
+
+so whatever is shared across a batch has to live in the instructions, ahead of
+anything instance-specific, and must not change from one call to the next.
+On their own the issue solver's instructions are 150-270 tokens: no prefix was
+long enough to be cached.
+
+layered(text) builds an agent's instructions as:
+    1. the static instructions, canonicalised (dedented, no trailing spaces)
+    2. when the run context is a CodeContext, the shared context of its repo: a
+       map of its source directories, built once per repo and release period
+       (MAP_BUCKET_MONTHS of commit dates) and kept on disk, so the instances of
+       that repo and period (in this batch and later ones) send the same bytes.
+       warm() builds it off the event loop; the instructions only read it.
+Instance data (base commit, issue text) stays in the user message, after the
+prefix. usage_report shows the resulting cached-token hit rate per agent.
+
+Usage:
+    agent = Agent(name="Analyzer", instructions=layered(ANALYZER_PROMPT), ...)
+    python openai_litellm/prompt_layout.py [--repo django/django --commit <sha>]   # Prefix sizes
+"""
+import argparse
+import inspect
+import json
+import os
+import tempfile
+import textwrap
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any
+
+from agents import Agent, RunContextWrapper
+
+from code_index import CodeContext
+from page_cache import CACHE_ROOT
+from tokens import count_tokens
+from worktree_pool import GitError, _git, _slug, default_pool
+
+LAYOUT_ROOT = CACHE_ROOT / "prompt_layout"
+MIN_CACHED_PREFIX = 1024          # Provider minimum for a prompt to be cached
+REPO_CONTEXT_TOKENS = int(os.getenv("REPO_CONTEXT_TOKENS", "1500"))
+MAX_DEPTH = 3                     # Directory levels listed in the repo map
+MAP_BUCKET_MONTHS = 6             # Commits within one period share a repo map
+
+_repo_contexts: dict[tuple[str, str], str] = {}   # (repo, commit) -> context, "" if it could not be built
+_repo_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+_lock = threading.Lock()                            # Guards _repo_locks
+
+
+def canonical(text: str) -> str:
+    """
+    Byte-stable form of a prompt: dedented, no trailing spaces, one final newline.
+    """
+    lines = [line.rstrip() for line in textwrap.dedent(text).strip("\n").split("\n")]
+    return "\n".join(lines) + "\n"
+
+
+# --- Shared repo context ---
+def _repo_map(repo: str, commit: str) -> str:
+    """
+    Source directories of repo at commit, shallowest first, with their file counts.
+    """
+    mirror = default_pool().mirror(repo, commit)
+    paths = _git("ls-tree", "-r", "--name-only", commit, cwd=mirror).splitlines()
+    files = Counter()
+    top_files = []
+    for path in paths:
+        parts = path.split("/")
+        if len(parts) == 1:
+            top_files.append(path)
+        for depth in range(1, min(len(parts), MAX_DEPTH + 1)):
+            files["/".join(parts[:depth]) + "/"] += 1
+    lines = [
+        f"## Shared context: repository {repo}",
+        "Source directories (file counts). The map is shared by the instances of this repo from the same "
+        "period and may be slightly out of date for a given base commit; confirm paths with search_code / "
+        "read_file_range.",
+        "",
+        "Top-level files: " + ", ".join(sorted(top_files)),
+    ]
+    # Whole lines only, shallowest directories first, within REPO_CONTEXT_TOKENS
+    budget = REPO_CONTEXT_TOKENS - count_tokens("\n".join(lines))
+    for directory in sorted(files, key=lambda d: (d.count("/"), d)):
+        line = f"{directory} ({files[directory]})"
+        budget -= count_tokens(line) + 1
+        if budget < 0:
+            break
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def _bucket(repo: str, commit: str) -> str:
+    """
+    Release period of a commit ("2019p2" for MAP_BUCKET_MONTHS=6), from its committer date.
+    """
+    mirror = default_pool().mirror(repo, commit)
+    year, month = _git("show", "-s", "--format=%cs", commit, cwd=mirror).strip().split("-")[:2]
+    return f"{year}p{(int(month) - 1) // MAP_BUCKET_MONTHS + 1}"
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def warm(repo: str, commit: str) -> str:
+    """
+    Builds (or loads from LAYOUT_ROOT) the shared context of repo for the period
+    of commit. Blocking (git clone on the first call per repo): call it with
+    asyncio.to_thread before the run. A failure is remembered as "" for this
+    process, so the run goes on with the static instructions only.
+    """
+    key = (repo, commit)
+    if key in _repo_contexts:
+        return _repo_contexts[key]
+    with _lock:
+        repo_lock = _repo_locks[repo]
+    with repo_lock:   # Other repos build in parallel
+        if key not in _repo_contexts:
+            try:
+                path = LAYOUT_ROOT / f"{_slug(repo)}-{_bucket(repo, commit)}.txt"
+                try:
+                    text = path.read_text(encoding="utf-8")
+                except OSError:
+                    text = _repo_map(repo, commit)
+                    _write_atomic(path, text)
+            except (GitError, OSError, ValueError):
+                text = ""
+            _repo_contexts[key] = text
+    return _repo_contexts[key]
+
+
+def repo_context(repo: str, commit: str) -> str:
+    """
+    Shared context of repo at commit if warm() built it, else "". Never blocks.
+    """
+    return _repo_contexts.get((repo, commit), "")
+
+
+# --- Instructions ---
+class LayeredInstructions:
+    """
+    Dynamic instructions (Agent(instructions=...)): static text, then the shared
+    repo context when the run has a CodeContext.
+    """
+
+    def __init__(self, static: str, repo: bool = True):
+        self.static = canonical(static)
+        self.repo = repo
+
+    def __call__(self, ctx: RunContextWrapper[Any], agent: Agent) -> str:
+        context = ctx.context
+        if self.repo and isinstance(context, CodeContext):
+            shared = repo_context(context.repo, context.base_commit)
+            if shared:
+                return f"{self.static}\n{shared}"
+        return self.static
+
+    def replace(self, static: str) -> "LayeredInstructions":
+        return LayeredInstructions(static, repo=self.repo)
+
+
+def layered(static: str, repo: bool = True) -> LayeredInstructions:
+    return LayeredInstructions(static, repo=repo)
+
+
+def static_text(agent: Agent) -> str:
+    """
+    The static part of an agent's instructions (plain strings are returned as is).
+    """
+    instructions = agent.instructions
+    return instructions.static if isinstance(instructions, LayeredInstructions) else instructions or ""
+
+
+# --- Report ---
+def prefix_tokens(agent: Agent, context: Any = None) -> int:
+    """
+    Tokens of the part of agent's prompt that is identical across instances:
+    tool and handoff schemas plus the instructions (with the repo context of `context`).
+    """
+    schemas = [{"name": t.name, "description": t.description, "parameters": t.params_json_schema}
+               for t in agent.tools if hasattr(t, "params_json_schema")]
+    schemas += [{"name": getattr(h, "tool_name", None) or f"transfer_to_{h.name}"} for h in agent.handoffs]
+    instructions = agent.instructions
+    if callable(instructions) and not inspect.iscoroutinefunction(instructions):
+        instructions = instructions(RunContextWrapper(context=context), agent)
+    return count_tokens(json.dumps(schemas)) + count_tokens(instructions or "")
+
+
+def prefix_report(agents: list[Agent], context: Any = None) -> str:
+    lines = [f"{'agent':<18} {'prefix tok':>10}  cacheable (>= {MIN_CACHED_PREFIX})"]
+    for agent in agents:
+        n = prefix_tokens(agent, context)
+        lines.append(f"{agent.name[:18]:<18} {n:>10}  {'yes' if n >= MIN_CACHED_PREFIX else 'no'}")
+    return "\n".join(lines)
+
+
+# --- Example execution ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stable prompt prefix size per agent")
+    parser.add_argument("--repo", default=None, help="SWE-bench repo (owner/name) for the shared context")
+    parser.add_argument("--commit", default=None, help="Commit the repo map is built from")
+    args = parser.parse_args()
+
+    import code_multiagent
+    import issue_solver_agent
+
+    context = CodeContext(args.repo, args.commit) if args.repo and args.commit else None
+    if context:
+        warm(args.repo, args.commit)
+    graph = [issue_solver_agent.orchestrator_agent, issue_solver_agent.analyzer_agent,
+             issue_solver_agent.researcher_agent, issue_solver_agent.solver_agent,
+             issue_solver_agent.validator_agent]
+    print(prefix_report(graph, context))
+    print()
+    print(prefix_report([code_multiagent.triage_agent, code_multiagent.doc_explainer,
+                         code_multiagent.code_agent]))
@@ -0,0 +1,332 @@
+"""
+Rate-limit-aware scheduling of model calls across Azure deployments.
+
+Each deployment gets two token buckets (requests and tokens per minute, from
+deployments.QUOTAS). Before a call, its token cost is estimated from the prompt
+size plus the expected output and reserved in the buckets; callers that would
+exceed the quota wait their turn (FIFO pacing) instead of firing and collecting
+429s. Reservations are corrected with the real usage once the call returns.
+
+On a 429 the deployment is put in a shared cooldown (Retry-After, or jittered
+exponential backoff), so every in-flight caller backs off together, and the
+request is retried, on an equivalent deployment (deployments.EQUIVALENTS) if
+that one can serve it sooner and the model opted in (spill=True).
+
+Usage:
+    model = scheduled("gpt-5", api_key=API_KEY)        # A drop-in Model for Agent(model=...)
+    model = scheduled("gpt-4o", api_key=API_KEY, spill=True)   # May be served by gpt-4.1 under load
+    print(default_scheduler().format_stats())
+"""
+import asyncio
+import json
+import os
+import random
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import replace
+from typing import Awaitable, Callable, TypeVar
+
+import openai
+from agents import Model, ModelResponse
+
+from deployments import deployment, equivalents, quota
+from tokens import count_tokens
+
+T = TypeVar("T")
+
+MAX_RETRIES = int(os.getenv("RATE_MAX_RETRIES", 6))
+BASE_DELAY = 1.0            # Backoff base (s) when the 429 has no Retry-After
+MAX_DELAY = 60.0
+SPILL_AFTER = 2.0           # Use an equivalent deployment if the primary's wait exceeds this (s)
+BURST_WINDOW = 10.0         # Azure enforces quotas over ~10 s windows: bucket capacity = rate * window
+DEFAULT_OUTPUT_TOKENS = 1024
+
+# Deployment that served the current task's latest scheduled call (see served_by)
+_served: ContextVar[str | None] = ContextVar("served_deployment", default=None)
+
+
+class TokenBucket:
+    """
+    Bucket refilled at per_minute / 60 per second. take() may drive the level
+    negative; the debt is the caller's wait, so concurrent callers queue up in order.
+    """
+
+    def __init__(self, per_minute: float, window: float = BURST_WINDOW):
+        self.rate = per_minute / 60
+        self.capacity = max(self.rate * window, 1.0)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> float:
+        wait = self.wait_time(amount)
+        self.level -= min(amount, self.capacity)
+        return wait
+
+    def give_back(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class DeploymentState:
+    def __init__(self, name: str):
+        self.name = name
+        rpm, tpm = quota(name)
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.cooldown_until = 0.0
+        self.stats: Counter = Counter()
+
+    def wait_time(self, tokens: int) -> float:
+        cooldown = max(0.0, self.cooldown_until - time.monotonic())
+        return max(cooldown, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+
+    def reserve(self, tokens: int) -> float:
+        cooldown = max(0.0, self.cooldown_until - time.monotonic())
+        return max(cooldown, self.requests.take(1), self.tokens.take(tokens))
+
+    def settle(self, estimated: int, actual: int | None) -> None:
+        """
+        Corrects the token reservation with the real usage (negative = more was used).
+        """
+        if actual is not None:
+            self.tokens.give_back(estimated - actual)
+
+    def throttle(self, delay: float) -> None:
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + delay)
+
+
+def _retry_after(exc: Exception) -> float | None:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def is_rate_limit(exc: Exception) -> bool:
+    return isinstance(exc, openai.RateLimitError) or getattr(exc, "status_code", None) == 429
+
+
+class RateScheduler:
+    """
+    Paces and retries calls per deployment. Shared by every ScheduledModel so
+    all agents draw from the same quotas.
+    """
+
+    def __init__(self, max_retries: int = MAX_RETRIES, spill_after: float = SPILL_AFTER):
+        self.max_retries = max_retries
+        self.spill_after = spill_after
+        self.states: dict[str, DeploymentState] = {}
+
+    def state(self, name: str) -> DeploymentState:
+        if name not in self.states:
+            self.states[name] = DeploymentState(name)
+        return self.states[name]
+
+    def pick(self, candidates: list[str], tokens: int) -> DeploymentState:
+        """
+        The primary deployment, unless it would wait longer than spill_after and
+        an equivalent one is available sooner.
+        """
+        primary = self.state(candidates[0])
+        wait = primary.wait_time(tokens)
+        if wait <= self.spill_after or len(candidates) == 1:
+            return primary
+        best = min((self.state(c) for c in candidates[1:]), key=lambda s: s.wait_time(tokens))
+        if best.wait_time(tokens) < wait:
+            best.stats["spilled_in"] += 1
+            return best
+        return primary
+
+    async def acquire(self, candidates: list[str], tokens: int) -> DeploymentState:
+        state = self.pick(candidates, tokens)
+        wait = state.reserve(tokens)
+        state.stats["requests"] += 1
+        if wait > 0:
+            state.stats["paced"] += 1
+            state.stats["wait_ms"] += int(wait * 1000)
+            await asyncio.sleep(wait)
+        # A 429 may have put the deployment in cooldown while this call was queued
+        while (cooldown := state.cooldown_until - time.monotonic()) > 0:
+            state.stats["wait_ms"] += int(cooldown * 1000)
+            await asyncio.sleep(cooldown)
+        return state
+
+    def on_rate_limit(self, state: DeploymentState, exc: Exception, tokens: int, attempt: int) -> None:
+        """
+        Shared cooldown for the deployment: Retry-After (plus a little jitter) or
+        full-jitter exponential backoff. The rejected request's tokens are returned.
+        """
+        retry_after = _retry_after(exc)
+        if retry_after is not None:
+            delay = retry_after + random.uniform(0, BASE_DELAY)
+        else:
+            delay = random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** attempt))
+        state.throttle(delay)
+        state.tokens.give_back(tokens)
+        state.stats["throttled"] += 1
+
+    async def run(self, candidates: list[str], tokens: int, call: Callable[[str], Awaitable[T]],
+                  usage: Callable[[T], int | None] = lambda r: None) -> T:
+        """
+        Runs call(deployment) within the quotas, retrying 429s.
+
+        Args:
+            candidates (list[str]): Primary deployment first, then equivalents
+            tokens (int): Estimated tokens of the request (prompt + expected output)
+            call (callable): Coroutine function taking the deployment name
+            usage (callable): Real total tokens of a result, to correct the reservation
+        """
+        for attempt in range(self.max_retries + 1):
+            state = await self.acquire(candidates, tokens)
+            try:
+                result = await call(state.name)
+            except Exception as exc:
+                if not is_rate_limit(exc) or attempt == self.max_retries:
+                    raise
+                self.on_rate_limit(state, exc, tokens, attempt)
+                continue
+            state.settle(tokens, usage(result))
+            return result
+        raise RuntimeError("unreachable")
+
+    def format_stats(self) -> str:
+        lines = []
+        for name, s in sorted(self.states.items()):
+            rpm, tpm = quota(name)
+            lines.append(f"{name:<24} rpm={rpm:<6} tpm={tpm:<8} " + " ".join(f"{k}={v}" for k, v in sorted(s.stats.items())))
+        return "\n".join(lines)
+
+
+_scheduler: RateScheduler | None = None
+
+
+def default_scheduler() -> RateScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RateScheduler()
+    return _scheduler
+
+
+# --- Model wrapper ---
+def estimate_tokens(system_instructions, input, model_settings, tools, output_schema, handoffs) -> int:
+    """
+    Prompt tokens (instructions, input items, tool/handoff schemas) plus the expected output.
+    """
+    prompt = count_tokens(system_instructions or "")
+    prompt += count_tokens(input if isinstance(input, str) else json.dumps(input, default=str))
+    specs = [getattr(t, "params_json_schema", None) or getattr(t, "name", "") for t in tools]
+    specs += [h.input_json_schema for h in handoffs]
+    if output_schema is not None and not output_schema.is_plain_text():
+        specs.append(output_schema.json_schema())
+    prompt += count_tokens(json.dumps(specs, default=str))
+    return prompt + (model_settings.max_tokens or DEFAULT_OUTPUT_TOKENS)
+
+
+class ScheduledModel(Model):
+    """
+    LitellmModel behind the RateScheduler, with optional spill-over to equivalent deployments.
+
+    Args:
+        alias (str): Key of deployments.models (or a deployment name)
+        api_key (str): Azure API key
+        spill (bool): Allow equivalent deployments when the primary is throttled
+    """
+
+    def __init__(self, alias: str, api_key: str | None = None, spill: bool = False,
+                 scheduler: RateScheduler | None = None):
+        self.deployments = [deployment(alias)] + (equivalents(alias) if spill else [])
+        self.model = f"azure/{self.deployments[0]}"   # For usage_report / llm_cache
+        self.api_key = api_key
+        self.scheduler = scheduler or default_scheduler()
+        self._models: dict[str, Model] = {}
+
+    def _inner(self, name: str) -> Model:
+        if name not in self._models:
+            # Imported on the first call: litellm takes ~2s to import and replayed runs never need it
+            from agents.extensions.models.litellm_model import LitellmModel
+
+            self._models[name] = LitellmModel(model=f"azure/{name}", api_key=self.api_key)
+        return self._models[name]
+
+    @staticmethod
+    def _no_client_retries(model_settings):
+        # The scheduler owns retries; the OpenAI client's own retries would bypass the pacing.
+        # LiteLLM caches one client per key/base URL, so don't mix plain LitellmModels on the same deployment
+        return replace(model_settings, extra_args={**(model_settings.extra_args or {}), "max_retries": 0})
+
+    async def get_response(self, system_instructions, input, model_settings, tools, output_schema,
+                           handoffs, tracing, previous_response_id=None, conversation_id=None,
+                           prompt=None) -> ModelResponse:
+        tokens = estimate_tokens(system_instructions, input, model_settings, tools, output_schema, handoffs)
+        settings = self._no_client_retries(model_settings)
+
+        async def call(name: str) -> ModelResponse:
+            response = await self._inner(name).get_response(
+                system_instructions, input, settings, tools, output_schema, handoffs, tracing,
+                previous_response_id=previous_response_id, conversation_id=conversation_id, prompt=prompt,
+            )
+            _served.set(name)
+            return response
+
+        return await self.scheduler.run(self.deployments, tokens, call,
+                                        usage=lambda r: r.usage.total_tokens or None)
+
+    async def stream_response(self, system_instructions, input, model_settings, tools, output_schema,
+                              handoffs, tracing, previous_response_id=None, conversation_id=None,
+                              prompt=None):
+        tokens = estimate_tokens(system_instructions, input, model_settings, tools, output_schema, handoffs)
+        settings = self._no_client_retries(model_settings)
+        scheduler = self.scheduler
+        for attempt in range(scheduler.max_retries + 1):
+            state = await scheduler.acquire(self.deployments, tokens)
+            started = False
+            try:
+                async for event in self._inner(state.name).stream_response(
+                    system_instructions, input, settings, tools, output_schema, handoffs, tracing,
+                    previous_response_id=previous_response_id, conversation_id=conversation_id, prompt=prompt,
+                ):
+                    started = True
+                    if getattr(event, "type", "") == "response.completed":
+                        _served.set(state.name)
+                        if event.response.usage:
+                            state.settle(tokens, event.response.usage.total_tokens)
+                    yield event
+                return
+            except Exception as exc:
+                # Only retry if nothing was streamed yet (429s arrive before the first event)
+                if started or not is_rate_limit(exc) or attempt == scheduler.max_retries:
+                    raise
+                scheduler.on_rate_limit(state, exc, tokens, attempt)
+
+
+def scheduled(alias: str, api_key: str | None = None, spill: bool = False) -> ScheduledModel:
+    return ScheduledModel(alias, api_key=api_key, spill=spill)
+
+
+def served_by(model: Model) -> str | None:
+    """
+    Deployment that served the latest call of `model` (a ScheduledModel, possibly
+    wrapped by llm_cache) in the current task, or None. Read it right after the
+    call (RunHooks.on_llm_end): with spill-over it may not be the primary.
+    """
+    model = getattr(model, "inner", model)
+    name = _served.get()
+    if isinstance(model, ScheduledModel) and name in model.deployments:
+        return name
+    return None
@@ -0,0 +1,158 @@
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Iterable, Iterator
+
+INDEX_SUFFIX = ".idx.json"
+
+
+def index_path(path: str | Path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+# --- Writing ---
+def write_store(instances: Iterable[dict], path: str | Path) -> int:
+    """
+    Writes SWE-bench instances as JSONL plus a sidecar offset index.
+
+    The index maps instance_id -> [byte offset, byte length, repo], so readers
+    can jump to one instance (or filter by repo) without parsing the rest.
+
+    Args:
+        instances (Iterable[dict]): Instances, e.g. a streamed HF dataset split
+        path (str | Path): Output .jsonl file; the index is written next to it
+
+    Returns:
+        int: Number of instances written
+    """
+    path = Path(path)
+    index = {}
+    offset = 0
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        for item in instances:
+            line = (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+            f.write(line)
+            index[item["instance_id"]] = [offset, len(line), item.get("repo")]
+            offset += len(line)
+    os.replace(tmp, path)
+    _write_index(index, path)
+    return len(index)
+
+
+def _write_index(index: dict, path: Path) -> None:
+    idx = index_path(path)
+    tmp = idx.with_name(idx.name + ".tmp")
+    tmp.write_text(json.dumps(index), encoding="utf-8")
+    os.replace(tmp, idx)
+
+
+def build_index(path: str | Path) -> dict:
+    """
+    Rebuilds the offset index by scanning the JSONL file once.
+    """
+    path = Path(path)
+    index = {}
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                index[item["instance_id"]] = [offset, len(line), item.get("repo")]
+            offset += len(line)
+    _write_index(index, path)
+    return index
+
+
+# --- Reading ---
+class InstanceStore:
+    """
+    Lazy, memory-mapped access to a SWE-bench JSONL store.
+
+    Only the index is loaded up front; instances are decoded on demand from
+    the mapped file, so looking up one instance costs a dict lookup and a
+    single json.loads.
+
+    Usage:
+        with InstanceStore("swe_bench_lite_test.jsonl") as store:
+            inst = store["django__django-11099"]
+            for inst in store.iter(repo="sympy/sympy"):
+                ...
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        idx = index_path(self.path)
+        if idx.exists() and idx.stat().st_mtime >= self.path.stat().st_mtime:
+            self.index = json.loads(idx.read_text(encoding="utf-8"))
+        else:
+            self.index = build_index(self.path)   # Missing or stale index
+        self._file = None
+        self._map = None
+
+    def _data(self) -> mmap.mmap | bytes:
+        if self._map is None:
+            self._file = open(self.path, "rb")
+            if os.fstat(self._file.fileno()).st_size == 0:
+                self._map = b""
+            else:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def close(self) -> None:
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = self._file = None
+
+    def __enter__(self) -> "InstanceStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- Mapping interface ---
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __contains__(self, instance_id: str) -> bool:
+        return instance_id in self.index
+
+    def __getitem__(self, instance_id: str) -> dict:
+        offset, length, _ = self.index[instance_id]
+        return json.loads(self._data()[offset:offset + length])
+
+    def get(self, instance_id: str, default=None):
+        return self[instance_id] if instance_id in self.index else default
+
+    # --- Filtering ---
+    def ids(self, repo: str | None = None) -> list[str]:
+        """
+        Instance ids in file order, optionally only those of one repo (e.g. "django/django").
+        """
+        return [iid for iid, (_, _, r) in self.index.items() if repo is None or r == repo]
+
+    def repos(self) -> dict[str, int]:
+        """
+        Number of instances per repo.
+        """
+        counts: dict[str, int] = {}
+        for _, _, repo in self.index.values():
+            counts[repo] = counts.get(repo, 0) + 1
+        return counts
+
+    def iter(self, repo: str | None = None, ids: Iterable[str] | None = None) -> Iterator[dict]:
+        """
+        Yields instances lazily, filtered by repo and/or an explicit id list.
+        """
+        selected = self.ids(repo) if ids is None else [i for i in ids if i in self.index]
+        if ids is not None and repo is not None:
+            selected = [i for i in selected if self.index[i][2] == repo]
+        for instance_id in selected:
+            yield self[instance_id]
+
+    def __iter__(self) -> Iterator[dict]:
+        return self.iter()
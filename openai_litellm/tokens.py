@@ -0,0 +1,47 @@
+"""
+Token counting for prompt budgets.
+
+Uses tiktoken's o200k_base (gpt-4o / gpt-4.1 / gpt-5) when it is installed and
+its encoding file can be loaded; otherwise falls back to ~4 characters per token,
+which is close enough for budgeting.
+"""
+import functools
+
+ENCODING = "o200k_base"
+CHARS_PER_TOKEN = 4
+
+
+@functools.lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding(ENCODING)
+    except Exception:   # Not installed, or the BPE file cannot be downloaded (offline)
+        return None
+
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    enc = _encoding()
+    if enc is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int, marker: str = " […] ") -> str:
+    """
+    Shortens text to about max_tokens, keeping the head and the tail (where
+    tracebacks and conclusions usually are).
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    enc = _encoding()
+    if enc is None:
+        keep = max_tokens * CHARS_PER_TOKEN
+        return text[:keep * 2 // 3] + marker + text[len(text) - keep // 3:]
+    ids = enc.encode(text, disallowed_special=())
+    head = max_tokens * 2 // 3
+    return enc.decode(ids[:head]) + marker + enc.decode(ids[-(max_tokens - head):])
@@ -0,0 +1,250 @@
+import json
+import time
+from collections import defaultdict
+from dataclasses import dataclass, asdict
+
+from agents import RunHooks
+
+from rate_scheduler import served_by
+
+# --- Prices (USD per 1M tokens: input, cached input, output) ---
+# Keys are base model names; Azure deployment names are mapped in DEPLOYMENT_MODELS.
+PRICES_PER_1M = {
+    "gpt-5": (1.25, 0.125, 10.00),
+    "gpt-5-chat": (1.25, 0.125, 10.00),
+    "gpt-4.1": (2.00, 0.50, 8.00),
+    "gpt-4.1-mini": (0.40, 0.10, 1.60),
+    "gpt-4.1-nano": (0.10, 0.025, 0.40),
+    "gpt-4o": (2.50, 1.25, 10.00),
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "o1": (15.00, 7.50, 60.00),
+    "o3-mini": (1.10, 0.55, 4.40),
+    "o4-mini": (1.10, 0.275, 4.40),
+}
+DEPLOYMENT_MODELS = {
+    "Innovation-gpt4o": "gpt-4o",
+    "Innovation-gpt4o-mini": "gpt-4o-mini",
+}
+
+
+def model_name(agent) -> str:
+    """
+    Deployment name of an agent's model ("azure/gpt-5", "litellm/azure/x" or a Model object).
+    """
+    model = agent.model
+    name = model if isinstance(model, str) else getattr(model, "model", type(model).__name__)
+    return str(name).rsplit("/", 1)[-1]
+
+
+def estimate_cost(model: str, input_tokens: int, cached_tokens: int, output_tokens: int) -> float | None:
+    prices = PRICES_PER_1M.get(DEPLOYMENT_MODELS.get(model, model))
+    if prices is None:
+        return None
+    price_in, price_cached, price_out = prices
+    uncached = max(input_tokens - cached_tokens, 0)
+    return (uncached * price_in + cached_tokens * price_cached + output_tokens * price_out) / 1_000_000
+
+
+@dataclass
+class UsageEvent:
+    run_id: str
+    kind: str                 # "llm" | "tool" | "handoff"
+    agent: str
+    name: str                 # Model, tool or target agent name
+    start: float              # Unix time
+    duration_s: float
+    input_tokens: int = 0
+    cached_tokens: int = 0
+    output_tokens: int = 0
+    reasoning_tokens: int = 0
+    cost_usd: float | None = None
+
+
+class UsageHooks(RunHooks):
+    """
+    RunHooks that time every LLM call, tool call and handoff of one run and
+    report them to a UsageRecorder. Pass as Runner.run(..., hooks=...).
+    """
+
+    def __init__(self, recorder: "UsageRecorder", run_id: str):
+        self.recorder = recorder
+        self.run_id = run_id
+        self._llm_start: dict[str, float] = {}
+        self._tool_start: dict[tuple[str, str], list[float]] = defaultdict(list)
+        self._handoff_start: dict[str, tuple[str, float]] = {}
+
+    async def on_llm_start(self, context, agent, system_prompt, input_items) -> None:
+        now = time.perf_counter()
+        self._llm_start[agent.name] = now
+        pending = self._handoff_start.pop(agent.name, None)
+        if pending:
+            # Handoff cost = transfer tool + input filtering until the target agent calls its model
+            from_agent, start = pending
+            self._emit("handoff", from_agent, agent.name, start, now - start)
+
+    async def on_llm_end(self, context, agent, response) -> None:
+        start = self._llm_start.pop(agent.name, time.perf_counter())
+        usage = response.usage
+        model = model_name(agent)
+        if usage.total_tokens:
+            # A spilled call was served (and billed) by an equivalent deployment; cache hits cost nothing
+            model = served_by(agent.model) or model
+        cached = usage.input_tokens_details.cached_tokens or 0
+        self._emit(
+            "llm", agent.name, model, start, time.perf_counter() - start,
+            input_tokens=usage.input_tokens,
+            cached_tokens=cached,
+            output_tokens=usage.output_tokens,
+            reasoning_tokens=usage.output_tokens_details.reasoning_tokens or 0,
+            cost_usd=estimate_cost(model, usage.input_tokens, cached, usage.output_tokens),
+        )
+
+    async def on_tool_start(self, context, agent, tool) -> None:
+        self._tool_start[(agent.name, tool.name)].append(time.perf_counter())
+
+    async def on_tool_end(self, context, agent, tool, result) -> None:
+        starts = self._tool_start[(agent.name, tool.name)]
+        start = starts.pop(0) if starts else time.perf_counter()
+        self._emit("tool", agent.name, tool.name, start, time.perf_counter() - start)
+
+    async def on_handoff(self, context, from_agent, to_agent) -> None:
+        self._handoff_start[to_agent.name] = (from_agent.name, time.perf_counter())
+
+    def _emit(self, kind: str, agent: str, name: str, start: float, duration: float, **tokens) -> None:
+        wall_start = time.time() - (time.perf_counter() - start)
+        self.recorder.add(UsageEvent(
+            run_id=self.run_id, kind=kind, agent=agent, name=name,
+            start=round(wall_start, 3), duration_s=round(duration, 4), **tokens,
+        ))
+
+
+def percentile(values: list[float], p: float) -> float:
+    """
+    Nearest-rank percentile (p in 0..100).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * p // 100))   # ceil
+    return ordered[int(rank) - 1]
+
+
+class UsageRecorder:
+    """
+    Collects UsageEvents across runs (e.g. a whole batch) and exports them.
+
+    Usage:
+        recorder = UsageRecorder()
+        r = await Runner.run(agent, input, hooks=recorder.hooks("run-1"))
+        recorder.write_jsonl("usage.jsonl")
+        print(recorder.format_summary())
+    """
+
+    def __init__(self):
+        self.events: list[UsageEvent] = []
+        self._flushed = 0
+
+    def hooks(self, run_id: str) -> UsageHooks:
+        return UsageHooks(self, run_id)
+
+    def add(self, event: UsageEvent) -> None:
+        self.events.append(event)
+
+    # --- Export ---
+    def write_jsonl(self, path: str) -> int:
+        """
+        Appends the events recorded since the previous call to a JSONL file.
+
+        Returns:
+            int: Number of events written
+        """
+        new = self.events[self._flushed:]
+        with open(path, "a", encoding="utf-8") as f:
+            for event in new:
+                f.write(json.dumps(asdict(event)) + "\n")
+        self._flushed = len(self.events)
+        return len(new)
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Per-agent aggregates: LLM call count, p50/p95 latency, tokens, cost,
+        tool time and handoff overhead.
+        """
+        by_agent: dict[str, dict] = defaultdict(lambda: {
+            "llm_calls": 0, "llm_latency": [], "input_tokens": 0, "cached_tokens": 0,
+            "output_tokens": 0, "reasoning_tokens": 0, "cost_usd": 0.0,
+            "tool_calls": 0, "tool_latency": [], "handoffs_out": 0, "handoff_latency": [],
+        })
+        for e in self.events:
+            s = by_agent[e.agent]
+            if e.kind == "llm":
+                s["llm_calls"] += 1
+                s["llm_latency"].append(e.duration_s)
+                s["input_tokens"] += e.input_tokens
+                s["cached_tokens"] += e.cached_tokens
+                s["output_tokens"] += e.output_tokens
+                s["reasoning_tokens"] += e.reasoning_tokens
+                s["cost_usd"] += e.cost_usd or 0.0
+            elif e.kind == "tool":
+                s["tool_calls"] += 1
+                s["tool_latency"].append(e.duration_s)
+            elif e.kind == "handoff":
+                s["handoffs_out"] += 1
+                s["handoff_latency"].append(e.duration_s)
+
+        result = {}
+        for agent, s in by_agent.items():
+            result[agent] = {
+                "llm_calls": s["llm_calls"],
+                "llm_p50_s": percentile(s["llm_latency"], 50),
+                "llm_p95_s": percentile(s["llm_latency"], 95),
+                "llm_total_s": round(sum(s["llm_latency"]), 3),
+                "input_tokens": s["input_tokens"],
+                "cached_tokens": s["cached_tokens"],
+                "cache_hit_rate": round(s["cached_tokens"] / s["input_tokens"], 3) if s["input_tokens"] else 0.0,
+                "output_tokens": s["output_tokens"],
+                "reasoning_tokens": s["reasoning_tokens"],
+                "cost_usd": round(s["cost_usd"], 4),
+                "tool_calls": s["tool_calls"],
+                "tool_p50_s": percentile(s["tool_latency"], 50),
+                "tool_p95_s": percentile(s["tool_latency"], 95),
+                "handoffs_out": s["handoffs_out"],
+                "handoff_p95_s": percentile(s["handoff_latency"], 95),
+            }
+        return result
+
+    def format_summary(self) -> str:
+        rows = self.summary()
+        header = (f"{'agent':<18} {'calls':>5} {'p50 s':>7} {'p95 s':>7} {'in tok':>9} "
+                  f"{'cached':>8} {'hit %':>6} {'out tok':>8} {'cost $':>8} {'tools':>5} {'tool p95':>8}")
+        lines = [header, "-" * len(header)]
+        for agent, s in sorted(rows.items(), key=lambda kv: -kv[1]["llm_total_s"]):
+            lines.append(
+                f"{agent[:18]:<18} {s['llm_calls']:>5} {s['llm_p50_s']:>7.2f} {s['llm_p95_s']:>7.2f} "
+                f"{s['input_tokens']:>9} {s['cached_tokens']:>8} {s['cache_hit_rate'] * 100:>6.1f} "
+                f"{s['output_tokens']:>8} "
+                f"{s['cost_usd']:>8.4f} {s['tool_calls']:>5} {s['tool_p95_s']:>8.2f}"
+            )
+        return "\n".join(lines)
+
+    def prometheus(self, prefix: str = "multiagent") -> str:
+        """
+        Prometheus text exposition of cumulative per-agent counters.
+        """
+        totals: dict[tuple, float] = defaultdict(float)
+        for e in self.events:
+            labels = f'agent="{e.agent}",name="{e.name}"'
+            totals[(f"{prefix}_{e.kind}_calls_total", labels)] += 1
+            totals[(f"{prefix}_{e.kind}_seconds_total", labels)] += e.duration_s
+            if e.kind == "llm":
+                totals[(f"{prefix}_input_tokens_total", labels)] += e.input_tokens
+                totals[(f"{prefix}_cached_tokens_total", labels)] += e.cached_tokens
+                totals[(f"{prefix}_output_tokens_total", labels)] += e.output_tokens
+                totals[(f"{prefix}_cost_usd_total", labels)] += e.cost_usd or 0.0
+        lines = []
+        for metric in sorted({m for m, _ in totals}):
+            lines.append(f"# TYPE {metric} counter")
+            for (m, labels), value in sorted(totals.items()):
+                if m == metric:
+                    lines.append(f"{m}{{{labels}}} {value:g}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+import httpx
+from agents import FunctionTool, RunContextWrapper, function_tool
+
+from chunking import fit_to_budget
+from html_text import TextExtractor, extract_text
+from page_cache import PageCache, CachedPage, parse_max_age
+
+# --- Pool configuration ---
+MAX_CONNECTIONS = 64          # Total open connections shared by every tool call
+MAX_KEEPALIVE = 32            # Idle connections kept alive for reuse
+MAX_PER_HOST = 6              # Concurrent requests to the same host (browser-like)
+TIMEOUT = httpx.Timeout(15.0, connect=5.0)   # 15s overall, as in the original requests.get
+MAX_CHARS = 8000              # Default text limit of fetch_text/html_to_text
+SOURCE_CHARS = 200_000        # Text read from a page before condensing it to the tool's token budget
+
+# --- Token budget of fetch_url's result, per calling agent ---
+FETCH_BUDGET_TOKENS = int(os.getenv("FETCH_BUDGET_TOKENS", "2000"))
+FETCH_BUDGETS = {
+    "Analyzer": 3000,    # Reads linked docs/issues to pin down the problem
+    "Explorer": 4000,    # code_multiagent's documentation explainer
+}
+
+HEADERS = {"User-Agent": "multiagent-fetch/1.0"}
+USE_CACHE = os.getenv("PAGE_CACHE", "on").lower() not in ("0", "off", "false")
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_host_limits: dict[str, asyncio.Semaphore] = {}
+_cache: PageCache | None = None
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Returns the pooled client for the running event loop.
+
+    httpx clients are bound to the loop that created them, and scripts such as
+    multiagent.py call Runner.run_sync several times (one loop each), so the
+    client and the per-host semaphores are rebuilt when the loop changes.
+    """
+    global _client, _client_loop, _host_limits
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=TIMEOUT,
+            headers=HEADERS,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE,
+            ),
+        )
+        _client_loop = loop
+        _host_limits = {}
+    return _client
+
+
+def _host_semaphore(url: str) -> asyncio.Semaphore:
+    host = urlsplit(url).netloc.lower()
+    if host not in _host_limits:
+        _host_limits[host] = asyncio.Semaphore(MAX_PER_HOST)
+    return _host_limits[host]
+
+
+def _get_cache() -> PageCache | None:
+    global _cache
+    if USE_CACHE and _cache is None:
+        _cache = PageCache()
+    return _cache
+
+
+async def aclose() -> None:
+    """
+    Closes the pooled client (call at the end of long-running processes).
+    """
+    global _client
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+
+
+# --- HTML -> text ---
+def html_to_text(html: str, max_chars: int = MAX_CHARS) -> str:
+    """
+    Extracts readable text from an HTML document (see html_text.extract_text).
+    """
+    return extract_text(html, max_chars)
+
+
+# --- Fetching ---
+async def fetch_text(url: str, max_chars: int = MAX_CHARS) -> str:
+    """
+    Downloads a URL through the shared pool and returns its plain text.
+
+    Extracted text is kept in the on-disk PageCache: fresh entries are served
+    directly, stale ones are revalidated with If-None-Match/If-Modified-Since.
+
+    Args:
+        url (str): URL to fetch
+        max_chars (int): Maximum number of characters returned
+
+    Returns:
+        str: Plain text from the page
+
+    Raises:
+        httpx.HTTPError: On network errors or non-2xx responses
+    """
+    cache = _get_cache()
+    cached = await asyncio.to_thread(cache.get, url) if cache else None
+    if cached and cached[0].max_chars < max_chars:
+        cached = None   # Stored text was cut shorter than this caller wants
+    headers = {}
+    if cached:
+        page, text = cached
+        if page.fresh_until > time.time():
+            return text[:max_chars]
+        if page.etag:
+            headers["If-None-Match"] = page.etag
+        if page.last_modified:
+            headers["If-Modified-Since"] = page.last_modified
+
+    client = _get_client()
+    async with _host_semaphore(url):
+        async with client.stream("GET", url, headers=headers) as r:
+            if r.status_code == 304 and cached:
+                # Not modified: reuse the extracted text, no download or parse
+                max_age = parse_max_age(r.headers.get("cache-control"))
+                page.fresh_until = time.time() + max(max_age, 0)
+                page.etag = r.headers.get("etag", page.etag)
+                page.last_modified = r.headers.get("last-modified", page.last_modified)
+                await asyncio.to_thread(cache.update_validators, page)
+                return text[:max_chars]
+            r.raise_for_status()
+            # Parse while downloading and stop reading once the text budget is filled.
+            # Tokenizing is CPU bound, so each chunk is handed to a worker thread.
+            extractor = TextExtractor(max_chars)
+            async for chunk in r.aiter_text():
+                if await asyncio.to_thread(extractor.feed, chunk):
+                    break
+    text = extractor.close()
+
+    max_age = parse_max_age(r.headers.get("cache-control"))
+    etag, last_modified = r.headers.get("etag"), r.headers.get("last-modified")
+    if cache and max_age >= 0 and (etag or last_modified or max_age > 0):
+        page = CachedPage(
+            url=url,
+            blob="",
+            max_chars=max_chars,
+            etag=etag,
+            last_modified=last_modified,
+            fresh_until=time.time() + max_age,
+            fetched_at=time.time(),
+        )
+        await asyncio.to_thread(cache.put, page, text)
+    return text
+
+
+# --- function_tool: fetch_url -> shared by every agent that reads web pages ---
+def fetch_url_tool(budget_tokens: int = FETCH_BUDGET_TOKENS) -> FunctionTool:
+    """
+    Builds a fetch_url tool whose result fits budget_tokens: long pages are
+    chunked and condensed (chunking.fit_to_budget) instead of being cut.
+
+    Args:
+        budget_tokens (int): Max tokens returned to the agent (see FETCH_BUDGETS)
+
+    Returns:
+        FunctionTool: Named "fetch_url"
+    """
+
+    @function_tool(name_override="fetch_url")
+    async def _fetch_url(ctx: RunContextWrapper[Any], url: str, focus: str = "") -> str:
+        """
+        Scrapes the content of a URL and returns only plain text.
+
+        Args:
+            url (str): URL provided by the user
+            focus (str): What you are looking for in the page (used to keep the relevant parts)
+
+        Returns:
+            str: Plain text from the page, condensed to the agent's token budget if it is long
+        """
+        try:
+            print("[Looking for info]")
+            text = await fetch_text(url, SOURCE_CHARS)
+            return await fit_to_budget(text, budget_tokens, focus=focus, ctx=ctx)
+        except Exception as e:
+            return f"Error fetching {url}: {e}"
+
+    return _fetch_url
+
+
+def fetch_url_for(agent_name: str) -> FunctionTool:
+    """
+    fetch_url with the budget of agent_name (FETCH_BUDGETS, else FETCH_BUDGET_TOKENS).
+    """
+    return fetch_url_tool(FETCH_BUDGETS.get(agent_name, FETCH_BUDGET_TOKENS))
+
+
+fetch_url = fetch_url_tool()
@@ -0,0 +1,248 @@
+import asyncio
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+from page_cache import CACHE_ROOT
+
+GIT_TIMEOUT = 1800   # Seconds; the first mirror of a large repo can be slow
+REMOTE_URL = "https://github.com/{repo}.git"
+
+
+class GitError(RuntimeError):
+    pass
+
+
+def _git(*args: str, cwd: Path | None = None) -> str:
+    r = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, timeout=GIT_TIMEOUT)
+    if r.returncode != 0:
+        raise GitError(f"git {' '.join(args[:3])} failed: {r.stderr.strip()}")
+    return r.stdout
+
+
+def _slug(repo: str) -> str:
+    return repo.replace("/", "__")
+
+
+class WorktreePool:
+    """
+    Reusable checkouts of SWE-bench target repositories.
+
+    Each repo is fetched once into a bare mirror (root/mirrors/<owner>__<name>.git);
+    checkouts are `git worktree`s of that mirror (root/trees/...). Leasing a tree
+    at a commit reuses an idle worktree of the same repo when possible (a
+    checkout + clean instead of a clone); at most max_trees worktrees exist, and
+    the least recently used idle one is removed to make room. Existing worktrees
+    under root are adopted on start, so the pool survives across batch runs.
+
+    One pool per root per process; leases are thread-safe.
+
+    Usage:
+        pool = WorktreePool()
+        with pool.lease(instance["repo"], instance["base_commit"]) as tree:
+            subprocess.run(["git", "apply", "--check", "-"], cwd=tree, input=diff, text=True)
+    """
+
+    def __init__(self, root: Path = CACHE_ROOT / "worktrees", max_trees: int = 16,
+                 remote_url: str = REMOTE_URL):
+        # Absolute: git worktree add runs in the mirror, where a relative tree path would resolve
+        self.root = Path(root).resolve()
+        self.max_trees = max_trees
+        self.remote_url = remote_url
+        self.mirrors = self.root / "mirrors"
+        self.trees = self.root / "trees"
+        self.mirrors.mkdir(parents=True, exist_ok=True)
+        self.trees.mkdir(parents=True, exist_ok=True)
+
+        self._cond = threading.Condition()
+        self._idle: OrderedDict[Path, str] = OrderedDict()   # tree -> repo, LRU first
+        self._leased: dict[Path, str] = {}
+        self._pending = 0
+        self._repo_locks: dict[str, threading.Lock] = {}
+        self._adopt_existing()
+
+    # --- Startup ---
+    def _adopt_existing(self) -> None:
+        for mirror in self.mirrors.glob("*.git"):
+            try:
+                _git("worktree", "prune", cwd=mirror)
+            except GitError:
+                pass
+        trees = sorted(
+            (p for p in self.trees.iterdir() if (p / ".git").is_file()),
+            key=lambda p: p.stat().st_mtime,
+        )
+        for tree in trees:
+            slug = tree.name.rsplit("-", 1)[0]
+            if (self.mirrors / f"{slug}.git").exists():
+                self._idle[tree] = slug.replace("__", "/", 1)
+            else:
+                shutil.rmtree(tree, ignore_errors=True)
+        while len(self._idle) > self.max_trees:
+            tree, repo = self._idle.popitem(last=False)
+            self._remove(tree, self.mirrors / f"{_slug(repo)}.git")
+
+    # --- Mirrors ---
+    def _repo_lock(self, repo: str) -> threading.Lock:
+        with self._cond:
+            return self._repo_locks.setdefault(repo, threading.Lock())
+
+    def mirror(self, repo: str, commit: str | None = None) -> Path:
+        """
+        Returns the bare mirror of repo, creating it or fetching when commit is missing.
+        """
+        path = self.mirrors / f"{_slug(repo)}.git"
+        with self._repo_lock(repo):
+            if not path.exists():
+                tmp = path.with_name(path.name + ".tmp")
+                shutil.rmtree(tmp, ignore_errors=True)
+                _git("clone", "--mirror", "--quiet", self.remote_url.format(repo=repo), str(tmp))
+                tmp.rename(path)
+            if commit and not self._has_commit(path, commit):
+                try:
+                    _git("fetch", "--quiet", "origin", commit, cwd=path)
+                except GitError:
+                    _git("remote", "update", "--prune", cwd=path)
+        return path
+
+    @staticmethod
+    def _has_commit(mirror: Path, commit: str) -> bool:
+        try:
+            _git("cat-file", "-e", f"{commit}^{{commit}}", cwd=mirror)
+            return True
+        except GitError:
+            return False
+
+    # --- Leasing ---
+    def acquire(self, repo: str, commit: str) -> Path:
+        """
+        Leases a worktree of repo checked out (clean) at commit. Blocks while
+        max_trees worktrees are all leased. Pair with release().
+        """
+        mirror = self.mirror(repo, commit)
+        evict = None
+        with self._cond:
+            # _pending counts trees taken out of idle or being built, so that
+            # idle + leased + pending never exceeds max_trees
+            while True:
+                tree = next((t for t, r in reversed(self._idle.items()) if r == repo), None)
+                if tree is not None:
+                    del self._idle[tree]
+                    break
+                if len(self._idle) + len(self._leased) + self._pending < self.max_trees:
+                    break
+                if self._idle:
+                    evict, evict_repo = self._idle.popitem(last=False)   # LRU of any repo
+                    break
+                self._cond.wait()
+            self._pending += 1
+
+        try:
+            if tree is not None:
+                try:
+                    self._reset(tree, commit)
+                except GitError:
+                    # Broken checkout: drop it and build a fresh one in its place
+                    self._remove(tree, mirror)
+                    tree = None
+            if tree is None:
+                if evict is not None:
+                    self._remove(evict, self.mirrors / f"{_slug(evict_repo)}.git")
+                tree = self._create(repo, mirror, commit)
+        except BaseException:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._pending -= 1
+            self._leased[tree] = repo
+        return tree
+
+    def release(self, tree: Path) -> None:
+        """
+        Returns a leased worktree to the pool (as most recently used).
+        """
+        with self._cond:
+            repo = self._leased.pop(tree)
+            self._idle[tree] = repo
+            self._cond.notify_all()
+
+    @contextmanager
+    def lease(self, repo: str, commit: str) -> Iterator[Path]:
+        tree = self.acquire(repo, commit)
+        try:
+            yield tree
+        finally:
+            self.release(tree)
+
+    @asynccontextmanager
+    async def alease(self, repo: str, commit: str) -> AsyncIterator[Path]:
+        """
+        Async variant of lease(): git work runs in a thread, off the event loop.
+        """
+        tree = await asyncio.to_thread(self.acquire, repo, commit)
+        try:
+            yield tree
+        finally:
+            self.release(tree)
+
+    # --- Worktree operations ---
+    def _create(self, repo: str, mirror: Path, commit: str) -> Path:
+        n = 0
+        while True:
+            tree = self.trees / f"{_slug(repo)}-{n}"
+            try:
+                tree.mkdir()   # Atomic: reserves the name against concurrent creators
+                break
+            except FileExistsError:
+                n += 1
+        try:
+            with self._repo_lock(repo):
+                _git("worktree", "add", "--detach", "--force", str(tree), commit, cwd=mirror)
+        except GitError:
+            shutil.rmtree(tree, ignore_errors=True)
+            raise
+        return tree
+
+    @staticmethod
+    def _reset(tree: Path, commit: str) -> None:
+        _git("checkout", "--quiet", "--detach", "--force", commit, cwd=tree)
+        _git("clean", "-ffdxq", cwd=tree)
+        tree.touch()   # mtime = last use, for LRU adoption on the next start
+
+    def _remove(self, tree: Path, mirror: Path) -> None:
+        repo = tree.name.rsplit("-", 1)[0].replace("__", "/", 1)
+        with self._repo_lock(repo):
+            try:
+                _git("worktree", "remove", "--force", str(tree), cwd=mirror)
+            except GitError:
+                shutil.rmtree(tree, ignore_errors=True)
+                try:
+                    _git("worktree", "prune", cwd=mirror)
+                except GitError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {"idle": len(self._idle), "leased": len(self._leased), "max_trees": self.max_trees}
+
+
+_default_pool: WorktreePool | None = None
+_default_lock = threading.Lock()
+
+
+def default_pool() -> WorktreePool:
+    """
+    Process-wide pool shared by patch checking and evaluation.
+    """
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = WorktreePool()
+        return _default_pool
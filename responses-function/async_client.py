@@ -0,0 +1,171 @@
+"""
+Cliente asíncrono compartido para la Responses API de Azure OpenAI.
+
+Un solo AsyncOpenAI (con pool de conexiones httpx) por event loop, peticiones
+concurrentes con límite configurable y métricas por petición: time-to-first-token
+(TTFT), duración total y tokens/segundo.
+
+Uso:
+    from async_client import create, stream_text, run_many
+
+    resp, m = await create(model="gpt-4.1", input="Hola")
+    text, m = await stream_text(model="gpt-4.1", input="Que es RAG ???", on_delta=print)
+    results = await run_many([{"model": "gpt-4.1", "input": q} for q in preguntas], limit=8)
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI
+
+load_dotenv()
+
+DEFAULT_LIMIT = int(os.getenv("RESPONSES_CONCURRENCY", "8"))
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE = 32
+
+_client: AsyncOpenAI | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_closing: set[asyncio.Future] = set()   # Cierres en curso de clientes de loops anteriores
+
+
+@dataclass
+class RequestMetrics:
+    ttft_s: float            # Tiempo hasta el primer token (en no-streaming = duración total)
+    duration_s: float
+    output_tokens: int
+    streamed: bool
+
+    @property
+    def tokens_per_s(self) -> float:
+        """
+        Velocidad de generación, medida desde el primer token.
+        """
+        gen = self.duration_s - self.ttft_s if self.streamed else self.duration_s
+        return self.output_tokens / gen if gen > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (f"ttft={self.ttft_s * 1000:.0f}ms total={self.duration_s * 1000:.0f}ms "
+                f"tokens={self.output_tokens} ({self.tokens_per_s:.1f} tok/s)")
+
+
+# --- Cliente ---
+def get_client() -> AsyncOpenAI:
+    """
+    Devuelve el AsyncOpenAI compartido. Se recrea si cambia el event loop
+    (p. ej. entre varios asyncio.run), ya que el pool httpx queda ligado al loop.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        if _client is not None:
+            _retire(_client, _client_loop)
+        _client = AsyncOpenAI(
+            api_key=os.getenv("AZURE_API_KEY"),
+            base_url=f"{os.getenv('AZURE_API_BASE').rstrip('/')}/openai/v1/",
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE),
+                timeout=httpx.Timeout(120, connect=10),
+            ),
+        )
+        _client_loop = loop
+    return _client
+
+
+def _retire(client: AsyncOpenAI, old_loop: asyncio.AbstractEventLoop) -> None:
+    """
+    Cierra el cliente de un loop anterior sin bloquear: en su propio loop si sigue
+    corriendo (otro hilo), si no en el actual (el loop de asyncio.run ya terminó).
+    """
+    if old_loop.is_running() and not old_loop.is_closed():
+        future = asyncio.wrap_future(asyncio.run_coroutine_threadsafe(client.close(), old_loop))
+    else:
+        future = asyncio.ensure_future(client.close())
+    _closing.add(future)
+    future.add_done_callback(lambda f: (_closing.discard(f), f.cancelled() or f.exception()))
+
+
+async def aclose() -> None:
+    """
+    Cierra el pool de conexiones (llamar al final de la ejecución).
+    """
+    global _client, _client_loop
+    if _client is not None:
+        await _client.close()
+    _client, _client_loop = None, None
+
+
+# --- Peticiones ---
+async def create(**kwargs) -> tuple[Any, RequestMetrics]:
+    """
+    responses.create sin streaming.
+
+    Args:
+        **kwargs: Argumentos de client.responses.create (model, input, ...)
+
+    Returns:
+        tuple: (Response, RequestMetrics)
+    """
+    start = time.perf_counter()
+    resp = await get_client().responses.create(**kwargs)
+    duration = time.perf_counter() - start
+    tokens = resp.usage.output_tokens if resp.usage else 0
+    return resp, RequestMetrics(duration, duration, tokens, streamed=False)
+
+
+async def stream_text(on_delta: Callable[[str], None] | None = None, **kwargs) -> tuple[str, RequestMetrics]:
+    """
+    responses.create con streaming; consume los eventos sin retrasos artificiales.
+
+    Args:
+        on_delta (callable): Se llama con cada fragmento de texto (p. ej. para imprimirlo)
+        **kwargs: Argumentos de client.responses.create (model, input, ...)
+
+    Returns:
+        tuple: (texto completo, RequestMetrics)
+    """
+    start = time.perf_counter()
+    ttft = None
+    parts: list[str] = []
+    tokens = 0
+    stream = await get_client().responses.create(stream=True, **kwargs)
+    async for event in stream:
+        if event.type == "response.output_text.delta":
+            if ttft is None:
+                ttft = time.perf_counter() - start
+            parts.append(event.delta)
+            if on_delta:
+                on_delta(event.delta)
+        elif event.type == "response.completed" and event.response.usage:
+            tokens = event.response.usage.output_tokens
+    duration = time.perf_counter() - start
+    if not tokens:
+        tokens = len(parts)   # Sin usage: aproximación de un token por delta
+    return "".join(parts), RequestMetrics(ttft if ttft is not None else duration, duration, tokens, streamed=True)
+
+
+async def run_many(requests: list[dict], limit: int = DEFAULT_LIMIT, stream: bool = False,
+                   return_exceptions: bool = False) -> list[tuple[Any, RequestMetrics] | BaseException]:
+    """
+    Lanza muchas peticiones en paralelo con un máximo de `limit` en vuelo.
+
+    Args:
+        requests (list[dict]): kwargs de cada petición
+        limit (int): Máximo de peticiones simultáneas
+        stream (bool): Usa stream_text (devuelve texto) en lugar de create (devuelve Response)
+        return_exceptions (bool): Devuelve los errores en su posición en lugar de propagarlos
+
+    Returns:
+        list: Resultados en el mismo orden que `requests`
+    """
+    sem = asyncio.Semaphore(limit)
+
+    async def one(kwargs: dict):
+        async with sem:
+            return await (stream_text(**kwargs) if stream else create(**kwargs))
+
+    return await asyncio.gather(*(one(r) for r in requests), return_exceptions=return_exceptions)
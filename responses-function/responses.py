@@ -2,58 +2,79 @@ import os
 import time
 import asyncio
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from async_client import create, stream_text, run_many, aclose
+import vision_input
 
 load_dotenv()
 
 MODEL = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME")
-CLIENT = OpenAI(
-    api_key=os.getenv("AZURE_API_KEY"),
-    base_url=f"{os.getenv('AZURE_API_BASE').rstrip('/')}/openai/v1/",
-)
+IMAGE_URL = "https://upload.wikimedia.org/wikipedia/commons/6/6e/Golde33443.jpg"
+VISION_DETAIL = os.getenv("VISION_DETAIL", "low")   # low | auto | high (ver vision_input.DETAIL_BUDGETS)
 
 
 # --- 1) Texto simple ---
 async def text_demo():
-    resp = CLIENT.responses.create(
+    resp, metrics = await create(
         model="gpt-4.1",
         input='Solamente di: "OK, esto es una prueba"',
     )
     print("\n[Texto simple]")
     print(resp.output_text)
+    print(f"  ({metrics})")
 
 
 # --- 2) Visión por URL ---
 async def vision_demo():
-    resp = CLIENT.responses.create(
+    resp, metrics = await create(
         model="gpt-5",
         input=[{
             "role": "user",
             "content": [
                 {"type": "input_text", "text": "What is the name of the animal in this image?"},
-                {"type": "input_image", "image_url": "https://upload.wikimedia.org/wikipedia/commons/6/6e/Golde33443.jpg"},
+                # Descargada una vez, reducida al presupuesto de detalle y enviada inline
+                await vision_input.prepare_image(IMAGE_URL, detail=VISION_DETAIL),
             ],
         }],
     )
-    print("\n[Visión por URL]")
+    print("\n[Visión]")
     print(resp.output_text)
+    print(f"  ({metrics}, imagen: {dict(vision_input.stats)})")
+    if resp.usage:
+        # Estimación local frente a lo que factura el servicio (texto + imagen)
+        print(f"  tokens de imagen estimados: {vision_input.stats['image_tokens']}, "
+              f"input_tokens reportados: {resp.usage.input_tokens}")
 
 
 # --- 3) Streaming ---
 async def stream_demo():
-    stream = CLIENT.responses.create(
+    print("\n[Streaming]")
+    _, metrics = await stream_text(
         model=MODEL,
         input=[{"role": "user", "content": "Que es RAG ???"}],
-        stream=True,
+        on_delta=lambda delta: print(delta, end="", flush=True),
     )
-    print("\n[Streaming]")
-    for event in stream:
-        if event.type == "response.output_text.delta":
-            print(event.delta, end="", flush=True)
-            time.sleep(0.03)
+    print(f"\n  ({metrics})")
+
+
+# --- 4) Fan-out: muchas preguntas en paralelo ---
+async def fanout_demo(n: int = 8, limit: int = 4):
+    questions = [f'Solamente di: "OK, prueba {i}"' for i in range(n)]
+    start = time.perf_counter()
+    results = await run_many([{"model": "gpt-4.1", "input": q} for q in questions], limit=limit)
+    print(f"\n[Fan-out] {n} peticiones, límite {limit}: {time.perf_counter() - start:.2f}s")
+    for resp, metrics in results:
+        print(f"  {resp.output_text[:40]!r:<44} {metrics}")
+
+
+async def main():
+    # Las demos independientes corren a la vez sobre el mismo pool de conexiones
+    await asyncio.gather(text_demo(), vision_demo())
+    await stream_demo()
+    await fanout_demo()
+    await aclose()
+    await vision_input.aclose()
 
 
 if __name__ == "__main__":
-    asyncio.run(text_demo())
-    asyncio.run(vision_demo())
-    asyncio.run(stream_demo())
\ No newline at end of file
+    asyncio.run(main())
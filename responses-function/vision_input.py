@@ -0,0 +1,276 @@
+"""
+Etapa de entrada de imágenes para las peticiones de visión (Responses API).
+
+Pasar la URL remota al modelo hace que el servicio descargue el original a
+resolución completa en cada llamada, y se pagan tokens de imagen por píxeles que
+el modelo no necesita. Aquí cada imagen:
+    1. se descarga una sola vez a una caché local direccionada por contenido
+       (originals/<sha256>; urls/<sha256 de la URL> apunta a su contenido)
+    2. se reduce al presupuesto de detalle y se recodifica (JPEG; PNG si tiene
+       transparencia) en un pool de procesos, y la variante también se cachea
+    3. se envía inline como data URL (input_image)
+Repetir una consulta no descarga ni procesa nada. stats["image_tokens"] acumula los
+tokens de entrada estimados de las imágenes enviadas (image_tokens).
+
+Presupuestos de detalle (DETAIL_BUDGETS, lado mayor / lado menor en píxeles):
+    low   512 / 512      el modelo usa 512x512 de todos modos (tarifa fija)
+    auto  1024 / 768
+    high  2048 / 768     el modelo reduce a esto antes de contar tiles de 512 px
+max_side=... fija otro lado mayor. Pillow es opcional: sin él las imágenes se
+envían tal cual desde la caché.
+
+Uso:
+    from vision_input import prepare_image, prepare_images
+
+    content = [{"type": "input_text", "text": "¿Qué animal es?"}, await prepare_image(url, detail="low")]
+    images = await prepare_images(urls, detail="auto")    # Lote: descargas y recodificación en paralelo
+"""
+import asyncio
+import base64
+import hashlib
+import json
+import math
+import mimetypes
+import os
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import httpx
+
+try:
+    from PIL import Image, ImageOps   # Opcional: reducción y recodificación
+except ImportError:
+    Image = ImageOps = None
+
+CACHE_ROOT = Path(os.getenv("MULTIAGENT_CACHE_DIR", Path.home() / ".cache" / "multiagent")) / "vision"
+DETAIL_BUDGETS = {"low": (512, 512), "auto": (1024, 768), "high": (2048, 768)}
+QUALITY = int(os.getenv("VISION_JPEG_QUALITY", "85"))
+WORKERS = int(os.getenv("VISION_WORKERS", str(os.cpu_count() or 1)))
+MAX_BYTES = 50 * 1024 * 1024           # Límite de descarga por imagen
+HEADERS = {"User-Agent": "multiagent-vision/1.0"}   # Wikimedia rechaza peticiones sin User-Agent
+
+stats: Counter = Counter()   # downloads, url_hits, processed, variant_hits, bytes_original, bytes_sent, image_tokens
+
+_client: httpx.AsyncClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+_closing: set[asyncio.Future] = set()   # Cierres en curso de clientes de loops anteriores
+_pool: ProcessPoolExecutor | None = None
+_inflight: dict[str, asyncio.Future] = {}
+
+
+# --- Caché direccionada por contenido ---
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Archivo temporal único: dos hilos pueden guardar la misma imagen a la vez
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def _original(sha: str) -> Path:
+    return CACHE_ROOT / "originals" / sha
+
+
+def _shared(key: str, factory) -> asyncio.Future:
+    """
+    Una sola tarea por clave mientras está en curso (p. ej. la misma URL repetida en un lote).
+    """
+    if key not in _inflight:
+        _inflight[key] = asyncio.ensure_future(factory())
+        _inflight[key].add_done_callback(lambda _: _inflight.pop(key, None))
+    return asyncio.shield(_inflight[key])
+
+
+def _get_client() -> httpx.AsyncClient:
+    """
+    Cliente httpx compartido; se recrea si cambia el event loop.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop or _client.is_closed:
+        if _client is not None and not _client.is_closed:
+            # Se cierra el cliente anterior para no dejar su pool de sockets abierto:
+            # en su loop si sigue corriendo (otro hilo), si no en el actual
+            if _client_loop.is_running() and not _client_loop.is_closed():
+                future = asyncio.wrap_future(asyncio.run_coroutine_threadsafe(_client.aclose(), _client_loop))
+            else:
+                future = asyncio.ensure_future(_client.aclose())
+            _closing.add(future)
+            future.add_done_callback(lambda f: (_closing.discard(f), f.cancelled() or f.exception()))
+        _client = httpx.AsyncClient(headers=HEADERS, follow_redirects=True,
+                                    timeout=httpx.Timeout(60, connect=10))
+        _client_loop = loop
+    return _client
+
+
+async def _download(url: str) -> str:
+    link = CACHE_ROOT / "urls" / _sha256(url.encode())
+    if link.exists():
+        stats["url_hits"] += 1
+        return link.read_text(encoding="utf-8")
+    async with _get_client().stream("GET", url) as r:
+        r.raise_for_status()
+        chunks, size = [], 0
+        async for chunk in r.aiter_bytes():
+            size += len(chunk)
+            if size > MAX_BYTES:
+                raise ValueError(f"Imagen mayor a {MAX_BYTES // (1024 * 1024)} MB: {url}")
+            chunks.append(chunk)
+    data = b"".join(chunks)
+    sha = _sha256(data)
+    if not _original(sha).exists():
+        await asyncio.to_thread(_write, _original(sha), data)
+    await asyncio.to_thread(_write, link, sha.encode())
+    stats["downloads"] += 1
+    stats["bytes_original"] += len(data)
+    return sha
+
+
+async def fetch(source: str) -> str:
+    """
+    Guarda la imagen (URL o ruta local) en la caché y devuelve el sha256 de su contenido.
+    Descargas simultáneas de la misma URL se comparten.
+    """
+    if not source.startswith(("http://", "https://")):
+        data = await asyncio.to_thread(Path(source).read_bytes)
+        sha = _sha256(data)
+        if not _original(sha).exists():
+            await asyncio.to_thread(_write, _original(sha), data)
+        return sha
+    return await _shared(source, lambda: _download(source))
+
+
+# --- Reducción y recodificación (en los procesos del pool) ---
+def _target_size(width: int, height: int, max_side: int, min_side: int) -> tuple[int, int]:
+    scale = min(1.0, max_side / max(width, height), min_side / min(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _process(src: str, dst: str, max_side: int, min_side: int, quality: int) -> dict:
+    """
+    Reduce y recodifica src en dst; devuelve los metadatos de la variante.
+    """
+    with Image.open(src) as image:
+        image = ImageOps.exif_transpose(image)
+        size = _target_size(*image.size, max_side, min_side)
+        if size != image.size:
+            image = image.resize(size, Image.Resampling.LANCZOS)
+        alpha = image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info)
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        if alpha:
+            image.save(tmp, "PNG", optimize=True)
+            mime = "image/png"
+        else:
+            image.convert("RGB").save(tmp, "JPEG", quality=quality, optimize=True)
+            mime = "image/jpeg"
+    os.replace(tmp, dst)
+    return {"mime": mime, "width": size[0], "height": size[1]}
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=WORKERS)
+    return _pool
+
+
+async def variant(sha: str, detail: str = "auto", max_side: int | None = None,
+                  quality: int = QUALITY) -> tuple[Path, dict]:
+    """
+    Variante cacheada de una imagen para un presupuesto de detalle (se procesa una vez).
+
+    Returns:
+        tuple[Path, dict]: (archivo, {"mime", "width", "height"})
+    """
+    budget_max, budget_min = DETAIL_BUDGETS[detail]
+    max_side = max_side or budget_max
+    min_side = min(budget_min, max_side)
+    path = CACHE_ROOT / "variants" / f"{sha}-{max_side}x{min_side}-q{quality}"
+    meta_path = path.with_name(path.name + ".json")
+
+    async def build() -> dict:
+        if meta_path.exists():
+            stats["variant_hits"] += 1
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        meta = await loop.run_in_executor(_get_pool(), _process, str(_original(sha)), str(path),
+                                          max_side, min_side, quality)
+        await asyncio.to_thread(_write, meta_path, json.dumps(meta).encode())
+        stats["processed"] += 1
+        return meta
+
+    return path, await _shared(path.name, build)
+
+
+# --- Entrada para la Responses API ---
+async def prepare_image(source: str, detail: str = "auto", max_side: int | None = None,
+                        quality: int = QUALITY) -> dict:
+    """
+    Convierte una imagen (URL o ruta) en un input_image inline, reducida al presupuesto.
+
+    Args:
+        source (str): URL http(s) o ruta local
+        detail (str): "low" | "auto" | "high" (presupuesto y parámetro detail del modelo)
+        max_side (int | None): Lado mayor en píxeles (por defecto, el del presupuesto)
+        quality (int): Calidad JPEG
+
+    Returns:
+        dict: {"type": "input_image", "image_url": "data:...", "detail": detail}
+    """
+    sha = await fetch(source)
+    if Image is None:
+        path = _original(sha)
+        mime = mimetypes.guess_type(source.split("?")[0])[0] or "image/jpeg"
+    else:
+        path, meta = await variant(sha, detail, max_side, quality)
+        mime = meta["mime"]
+        stats["image_tokens"] += image_tokens(meta["width"], meta["height"], detail)
+    data = await asyncio.to_thread(path.read_bytes)
+    stats["bytes_sent"] += len(data)
+    return {"type": "input_image", "image_url": f"data:{mime};base64,{base64.b64encode(data).decode()}",
+            "detail": detail}
+
+
+async def prepare_images(sources: list[str], **kwargs) -> list[dict]:
+    """
+    prepare_image para un lote: descargas concurrentes y recodificación en el pool de procesos.
+
+    Returns:
+        list[dict]: En el mismo orden que sources
+    """
+    return await asyncio.gather(*(prepare_image(s, **kwargs) for s in sources))
+
+
+def image_tokens(width: int, height: int, detail: str = "high") -> int:
+    """
+    Tokens de entrada estimados de una imagen (tiles de 512 px, modelos gpt-4o / gpt-4.1).
+    """
+    if detail == "low":
+        return 85
+    w, h = _target_size(width, height, 2048, 768)
+    return 85 + 170 * math.ceil(w / 512) * math.ceil(h / 512)
+
+
+async def aclose() -> None:
+    """
+    Cierra el cliente httpx y el pool de procesos (llamar al final de la ejecución).
+    """
+    global _client, _pool
+    if _client is not None and not _client.is_closed:
+        await _client.aclose()
+    _client = None
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
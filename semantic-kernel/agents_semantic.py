@@ -7,26 +7,44 @@ from semantic_kernel.agents import ChatCompletionAgent
 from semantic_kernel.core_plugins.text_plugin import TextPlugin
 from semantic_kernel.core_plugins.math_plugin import MathPlugin
 
-async def main():
-    # 1. Cargar variables de entorno
-    load_dotenv()
+from intent_router import IntentRouter
 
-    # 2. Crear el kernel y agregar plugins
+
+def build_kernel(async_client=None) -> Kernel:
+    """
+    Crea el kernel con el servicio de chat de Azure y los plugins de los agentes.
+
+    Args:
+        async_client (AsyncAzureOpenAI | None): Cliente compartido (pool de conexiones);
+            si es None el servicio crea el suyo a partir de las variables de entorno
+
+    Returns:
+        Kernel: Kernel listo para los agentes
+    """
     kernel = Kernel()
-    
+
     # Agregar el servicio de chat al kernel
     kernel.add_service(AzureChatCompletion(
         deployment_name=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME"),
         api_key=os.getenv("AZURE_OPENAI_API_KEY"),
         endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-10-21-preview")
+        api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-10-21-preview"),
+        async_client=async_client,
     ))
-    
+
     # Agregar plugins al kernel
-    math_plugin = kernel.add_plugin(MathPlugin(), plugin_name="math")
-    text_plugin = kernel.add_plugin(TextPlugin(), plugin_name="text")
+    kernel.add_plugin(MathPlugin(), plugin_name="math")
+    kernel.add_plugin(TextPlugin(), plugin_name="text")
+    return kernel
 
-    # 3. Definir los agentes especializados
+
+def build_agents(kernel: Kernel) -> dict[str, ChatCompletionAgent]:
+    """
+    Crea los agentes especializados sobre un kernel compartido.
+
+    Returns:
+        dict[str, ChatCompletionAgent]: Agentes por nombre (los nombres de ruta de routes.json)
+    """
     billing_agent = ChatCompletionAgent(
         name="BillingAgent",
         instructions="""
@@ -55,29 +73,30 @@ async def main():
         """,
         kernel=kernel
     )
+    return {a.name: a for a in (billing_agent, refund_agent, tech_agent)}
+
+
+async def main():
+    # 1. Cargar variables de entorno
+    load_dotenv()
+
+    # 2. Crear el kernel y agregar plugins
+    kernel = build_kernel()
+
+    # 3. Definir los agentes especializados
+    agents_by_name = build_agents(kernel)
+
+    # 4. Enrutamiento: palabras clave de routes.json compiladas en un autómata (intent_router.py)
+    router = IntentRouter.from_file()
 
-    # 4. Crear un sistema de enrutamiento simple
     async def route_query(user_query: str):
         """
         Función para determinar qué agente debe manejar la consulta
         """
-        query_lower = user_query.lower()
-        
-        # Palabras clave para cada agente
-        billing_keywords = ["factur", "cobr", "pag", "tarif", "ciclo", "cargo", "costo", "precio"]
-        refund_keywords = ["reembol", "devol", "cancelar", "anular", "política"]
-        tech_keywords = ["error", "bug", "login", "conectar", "instalar", "técnico", "problema"]
-        
-        # Verificar palabras clave
-        if any(keyword in query_lower for keyword in refund_keywords):
-            return refund_agent
-        elif any(keyword in query_lower for keyword in billing_keywords):
-            return billing_agent
-        elif any(keyword in query_lower for keyword in tech_keywords):
-            return tech_agent
-        else:
-            # Por defecto, usar el agente de soporte técnico
-            return tech_agent
+        decision = router.route(user_query)
+        if decision.ambiguous:
+            print(f"(Consulta ambigua: {decision.scores})")
+        return agents_by_name[decision.route]
 
     # 5. Procesar la consulta del usuario
     user_query = "Quiero pedir un reembolso de mi suscripción anual"
@@ -105,5 +124,7 @@ async def main():
         async for response in selected_agent.invoke(user_input):
             print(f"{selected_agent.name}: {response.content}")
 
+    print(f"Consultas por ruta: {dict(router.stats)}")
+
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,172 @@
+"""
+Router de intenciones para los agentes de soporte (Semantic Kernel).
+
+Las tablas de palabras clave se cargan de un JSON (routes.json) y se compilan
+en un autómata Aho-Corasick: una sola pasada sobre la consulta encuentra todas
+las coincidencias de todas las rutas, sin importar cuántas palabras clave haya.
+Las palabras clave son raíces: coinciden al inicio de una palabra ("pag" en
+"pagar", no en "apagar"), y donde se solapan cuenta solo la más larga ("página"
+tapa a "pag"). Cada ruta suma el peso de sus palabras clave encontradas; gana
+la de mayor puntaje (empates por el orden del archivo) y se marca como ambigua
+si la segunda queda dentro del margen configurado.
+
+Uso:
+    router = IntentRouter.from_file("routes.json")
+    decision = router.route("Quiero pedir un reembolso")
+    decision.route, decision.scores, decision.ambiguous
+    router.stats   # Counter de aciertos por ruta
+"""
+import json
+import unicodedata
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from pathlib import Path
+
+ROUTES_PATH = Path(__file__).resolve().parent / "routes.json"
+
+
+def normalize(text: str) -> str:
+    """
+    Minúsculas y sin acentos ("Política" -> "politica"); se aplica igual a
+    palabras clave y consultas. La ñ se conserva.
+    """
+    text = text.lower().replace("ñ", "\0")
+    text = "".join(ch for ch in unicodedata.normalize("NFD", text) if not unicodedata.combining(ch))
+    return text.replace("\0", "ñ")
+
+
+@dataclass
+class RouteDecision:
+    route: str
+    scores: dict[str, float]
+    ambiguous: bool = False
+    default: bool = False                                    # Ninguna palabra clave coincidió
+    matches: dict[str, list[str]] = field(default_factory=dict)
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick sobre cadenas normalizadas. Cada palabra clave lleva un valor
+    asociado (aquí: lista de (ruta, peso)).
+    """
+
+    def __init__(self, keywords: dict[str, list]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[str, list]]] = [[]]
+        for word, value in keywords.items():
+            self._add(word, value)
+        self._build()
+
+    def _add(self, word: str, value: list) -> None:
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][ch] = nxt
+            state = nxt
+        self._out[state].append((word, value))
+
+    def _build(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                # Las salidas del estado de fallo también terminan aquí
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> dict[str, list]:
+        """
+        Palabras clave (distintas) que empiezan una palabra de text, con su valor.
+        Una coincidencia contenida en otra más larga no cuenta.
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        spans = []
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for word, value in out[state]:
+                start = end - len(word)
+                if start == 0 or not text[start - 1].isalnum():
+                    spans.append((start, end, word, value))
+        found = {}
+        covered = 0
+        for start, end, word, value in sorted(spans, key=lambda s: (s[0], -s[1])):
+            if end > covered:
+                found[word] = value
+                covered = end
+        return found
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+
+class IntentRouter:
+    """
+    Router multi-etiqueta: puntúa todas las rutas en una pasada.
+
+    Args:
+        routes (list[dict]): [{"name": str, "keywords": {palabra: peso} | [palabra, ...]}],
+                             en orden de prioridad para desempates
+        default (str): Ruta si ninguna palabra clave coincide
+        ambiguity_margin (float): Ambigua si (primera - segunda) / primera <= margen
+    """
+
+    def __init__(self, routes: list[dict], default: str, ambiguity_margin: float = 0.2):
+        self.names = [r["name"] for r in routes]
+        self.default = default
+        self.ambiguity_margin = ambiguity_margin
+        self._priority = {name: i for i, name in enumerate(self.names)}
+        table: dict[str, list[tuple[str, float]]] = {}
+        for r in routes:
+            keywords = r["keywords"]
+            if isinstance(keywords, list):
+                keywords = {k: 1.0 for k in keywords}
+            for word, weight in keywords.items():
+                table.setdefault(normalize(word), []).append((r["name"], float(weight)))
+        self._automaton = KeywordAutomaton(table)
+        self.keyword_count = len(table)
+        self.stats: Counter = Counter()
+
+    @classmethod
+    def from_file(cls, path: str | Path = ROUTES_PATH) -> "IntentRouter":
+        config = json.loads(Path(path).read_text(encoding="utf-8"))
+        return cls(config["routes"], config["default"], config.get("ambiguity_margin", 0.2))
+
+    def score(self, query: str) -> tuple[dict[str, float], dict[str, list[str]]]:
+        """
+        Puntaje de cada ruta y palabras clave que coincidieron.
+        """
+        scores = dict.fromkeys(self.names, 0.0)
+        matches: dict[str, list[str]] = {}
+        for word, targets in self._automaton.find(normalize(query)).items():
+            for name, weight in targets:
+                scores[name] += weight
+                matches.setdefault(name, []).append(word)
+        return scores, matches
+
+    def route(self, query: str) -> RouteDecision:
+        scores, matches = self.score(query)
+        ranked = sorted(self.names, key=lambda n: (-scores[n], self._priority[n]))
+        best = ranked[0]
+        if scores[best] <= 0:
+            self.stats[self.default] += 1
+            self.stats["_default"] += 1
+            return RouteDecision(self.default, scores, default=True)
+        runner_up = scores[ranked[1]] if len(ranked) > 1 else 0.0
+        ambiguous = (scores[best] - runner_up) / scores[best] <= self.ambiguity_margin
+        self.stats[best] += 1
+        if ambiguous:
+            self.stats["_ambiguous"] += 1
+        return RouteDecision(best, scores, ambiguous=ambiguous, matches=matches)
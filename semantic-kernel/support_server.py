@@ -0,0 +1,321 @@
+"""
+Servidor asíncrono de larga duración para los agentes de soporte (Semantic Kernel).
+
+El kernel, el servicio de Azure (con un solo pool de conexiones httpx), los
+plugins, los agentes y el router se construyen una vez al arrancar y se
+comparten entre todas las sesiones. Cada sesión tiene su propio hilo de chat
+acotado (ChatHistoryTruncationReducer) y sus mensajes se atienden en orden; las
+sesiones distintas corren en paralelo, hasta MAX_CONCURRENCY llamadas al modelo
+a la vez (el resto espera en cola).
+
+Endpoints:
+    POST   /chat                {"message": "...", "session_id": "..."?, "stream": true?}
+                                stream=true responde con SSE: route, delta..., done
+    DELETE /sessions/{id}       Cierra una sesión
+    GET    /metrics             Métricas en formato Prometheus (cola, latencias, sesiones)
+    GET    /healthz
+
+Uso:
+    python semantic-kernel/support_server.py --port 8080 --max-concurrency 32
+    curl -N localhost:8080/chat -d '{"message": "Quiero un reembolso", "stream": true}'
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import Counter, OrderedDict, deque
+from contextlib import aclosing
+from dataclasses import dataclass, field
+
+import httpx
+from aiohttp import web
+from dotenv import load_dotenv
+from openai import AsyncAzureOpenAI
+from semantic_kernel.agents import ChatHistoryAgentThread
+from semantic_kernel.contents import ChatHistoryTruncationReducer
+
+from agents_semantic import build_agents, build_kernel
+from intent_router import IntentRouter
+
+MAX_CONCURRENCY = int(os.getenv("SUPPORT_MAX_CONCURRENCY", "32"))   # Llamadas al modelo en paralelo
+MAX_QUEUE = int(os.getenv("SUPPORT_MAX_QUEUE", "256"))              # Más allá de esto: 503
+MAX_SESSIONS = int(os.getenv("SUPPORT_MAX_SESSIONS", "10000"))
+SESSION_TTL_S = float(os.getenv("SUPPORT_SESSION_TTL_S", "1800"))
+HISTORY_MESSAGES = int(os.getenv("SUPPORT_HISTORY_MESSAGES", "20"))  # Mensajes que conserva cada hilo
+LATENCY_WINDOW = 1000                                               # Muestras para p50/p95
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE = 50
+
+
+# --- Sesiones ---
+@dataclass
+class Session:
+    id: str
+    thread: ChatHistoryAgentThread
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)   # Un turno a la vez por sesión
+    last_used: float = field(default_factory=time.monotonic)
+    turns: int = 0
+
+
+class SessionStore:
+    """
+    Sesiones en memoria con expiración por inactividad y límite LRU.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, ttl_s: float = SESSION_TTL_S,
+                 history_messages: int = HISTORY_MESSAGES):
+        self.max_sessions = max_sessions
+        self.ttl_s = ttl_s
+        self.history_messages = history_messages
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self.evicted = 0
+
+    def get(self, session_id: str | None) -> Session:
+        self._expire()
+        session_id = session_id or uuid.uuid4().hex
+        session = self._sessions.get(session_id)
+        if session is None:
+            history = ChatHistoryTruncationReducer(target_count=self.history_messages, auto_reduce=True)
+            session = Session(id=session_id, thread=ChatHistoryAgentThread(chat_history=history))
+            self._sessions[session_id] = session
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evicted += 1
+        self._sessions.move_to_end(session_id)
+        session.last_used = time.monotonic()
+        return session
+
+    def close(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self) -> None:
+        limit = time.monotonic() - self.ttl_s
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if oldest.last_used >= limit or oldest.lock.locked():
+                break
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# --- Métricas ---
+class Metrics:
+    def __init__(self):
+        self.queued = 0                      # Esperando turno de modelo
+        self.in_flight = 0
+        self.requests: Counter = Counter()   # Por ruta
+        self.errors = 0
+        self.rejected = 0
+        self.ttft: deque = deque(maxlen=LATENCY_WINDOW)
+        self.latency: deque = deque(maxlen=LATENCY_WINDOW)
+        self.queue_wait: deque = deque(maxlen=LATENCY_WINDOW)
+
+    @staticmethod
+    def _percentile(values, p: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    def prometheus(self, sessions: int) -> str:
+        lines = [
+            f"support_queue_depth {self.queued}",
+            f"support_in_flight {self.in_flight}",
+            f"support_sessions {sessions}",
+            f"support_errors_total {self.errors}",
+            f"support_rejected_total {self.rejected}",
+        ]
+        lines += [f'support_requests_total{{route="{route}"}} {n}' for route, n in sorted(self.requests.items())]
+        for name, values in (("ttft", self.ttft), ("latency", self.latency), ("queue_wait", self.queue_wait)):
+            for q in (50, 95):
+                lines.append(f'support_{name}_seconds{{quantile="0.{q}"}} {self._percentile(values, q):.4f}')
+        return "\n".join(lines) + "\n"
+
+
+# --- Servicio ---
+class SupportService:
+    """
+    Kernel, agentes y router compartidos por todas las sesiones.
+
+    Args:
+        max_concurrency (int): Llamadas al modelo simultáneas
+        max_queue (int): Peticiones en espera antes de rechazar con 503
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, max_queue: int = MAX_QUEUE):
+        load_dotenv()
+        # Un solo cliente (y pool de conexiones) para todas las sesiones
+        self.http_client = httpx.AsyncClient(limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE))
+        self.client = AsyncAzureOpenAI(
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-10-21-preview"),
+            http_client=self.http_client,
+        )
+        self.kernel = build_kernel(async_client=self.client)
+        self.agents = build_agents(self.kernel)
+        self.router = IntentRouter.from_file()
+        self.sessions = SessionStore()
+        self.metrics = Metrics()
+        self.max_queue = max_queue
+        self._slots = asyncio.Semaphore(max_concurrency)
+
+    async def close(self) -> None:
+        await self.http_client.aclose()
+
+    def overloaded(self) -> bool:
+        return self.metrics.queued >= self.max_queue
+
+    async def reply(self, session: Session, message: str):
+        """
+        Atiende un turno: enruta, espera turno de modelo y genera la respuesta en streaming.
+
+        Yields:
+            tuple[str, str]: ("route", nombre del agente) y luego ("delta", texto)...
+        """
+        start = time.perf_counter()
+        decision = self.router.route(message)
+        agent = self.agents[decision.route]
+        self.metrics.requests[decision.route] += 1
+        yield "route", agent.name
+
+        # En cola = esperando el turno de su sesión o un lugar libre de modelo
+        self.metrics.queued += 1
+        try:
+            await session.lock.acquire()
+            try:
+                await self._slots.acquire()
+            except BaseException:
+                session.lock.release()
+                raise
+        finally:
+            self.metrics.queued -= 1
+        try:
+            self.metrics.queue_wait.append(time.perf_counter() - start)
+            self.metrics.in_flight += 1
+            first = None
+            try:
+                async for response in agent.invoke_stream(messages=message, thread=session.thread):
+                    session.thread = response.thread
+                    text = str(response.content or "")
+                    if text:
+                        if first is None:
+                            first = time.perf_counter() - start
+                            self.metrics.ttft.append(first)
+                        yield "delta", text
+                session.turns += 1
+            except Exception:
+                self.metrics.errors += 1
+                raise
+            finally:
+                self.metrics.in_flight -= 1
+                self.metrics.latency.append(time.perf_counter() - start)
+        finally:
+            self._slots.release()
+            session.lock.release()
+
+
+# --- HTTP ---
+SERVICE = web.AppKey("service", SupportService)
+
+
+async def chat(request: web.Request) -> web.StreamResponse:
+    service = request.app[SERVICE]
+    try:
+        body = await request.json()
+        message = body["message"].strip()
+    except (ValueError, KeyError, AttributeError):
+        return web.json_response({"error": 'Se esperaba JSON con "message"'}, status=400)
+    if service.overloaded():
+        service.metrics.rejected += 1
+        return web.json_response({"error": "Servidor saturado, reintente"}, status=503,
+                                 headers={"Retry-After": "1"})
+    session = service.sessions.get(body.get("session_id"))
+
+    if not body.get("stream"):
+        route, parts = None, []
+        async with aclosing(service.reply(session, message)) as events:
+            async for kind, value in events:
+                if kind == "route":
+                    route = value
+                else:
+                    parts.append(value)
+        return web.json_response({"session_id": session.id, "agent": route, "content": "".join(parts)})
+
+    response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+    await response.prepare(request)
+
+    async def send(event: str, data: dict) -> None:
+        await response.write(f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode())
+
+    try:
+        # aclosing: si el cliente se desconecta, el turno libera su lugar de inmediato
+        async with aclosing(service.reply(session, message)) as events:
+            async for kind, value in events:
+                if kind == "route":
+                    await send("route", {"session_id": session.id, "agent": value})
+                else:
+                    await send("delta", {"text": value})
+        await send("done", {"session_id": session.id, "turns": session.turns})
+    except ConnectionResetError:
+        pass   # El cliente cerró la conexión
+    except Exception as e:
+        await send("error", {"error": f"{type(e).__name__}: {e}"})
+    return response
+
+
+async def close_session(request: web.Request) -> web.Response:
+    closed = request.app[SERVICE].sessions.close(request.match_info["session_id"])
+    return web.json_response({"closed": closed}, status=200 if closed else 404)
+
+
+async def metrics(request: web.Request) -> web.Response:
+    service = request.app[SERVICE]
+    return web.Response(text=service.metrics.prometheus(len(service.sessions)),
+                        content_type="text/plain")
+
+
+async def healthz(request: web.Request) -> web.Response:
+    return web.json_response({"ok": True})
+
+
+def create_app(**service_kwargs) -> web.Application:
+    """
+    Aplicación aiohttp; el servicio (kernel, agentes, pool) se crea una vez al
+    arrancar, dentro del event loop del servidor.
+
+    Args:
+        **service_kwargs: Para SupportService (max_concurrency, max_queue)
+    """
+    app = web.Application()
+
+    async def lifecycle(app: web.Application):
+        app[SERVICE] = SupportService(**service_kwargs)
+        yield
+        await app[SERVICE].close()
+
+    app.cleanup_ctx.append(lifecycle)
+    app.router.add_post("/chat", chat)
+    app.router.add_delete("/sessions/{session_id}", close_session)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/healthz", healthz)
+    return app
+
+
+# --- Ejecución ---
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor de agentes de soporte")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    args = parser.parse_args()
+
+    web.run_app(create_app(max_concurrency=args.max_concurrency, max_queue=args.max_queue),
+                host=args.host, port=args.port)